@@ -2,24 +2,67 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
-def generate_activos(num_activos=30):
+from dinero import a_centavos, a_moneda
+from depreciacion import depreciacion_acumulada
+from vocabularios import elegir_por_categoria, codigos_modelo
+
+# Define asset types and their characteristics
+TIPOS_ACTIVO = [
+    {'nombre': 'Maquinaria', 'costo_min': 5000, 'costo_max': 50000, 'vida_util': [5, 10], 'valor_residual_pct': [0.05, 0.15]},
+    {'nombre': 'Equipo', 'costo_min': 1000, 'costo_max': 10000, 'vida_util': [3, 7], 'valor_residual_pct': [0.03, 0.10]},
+    {'nombre': 'Vehículos', 'costo_min': 15000, 'costo_max': 80000, 'vida_util': [5, 8], 'valor_residual_pct': [0.10, 0.20]},
+    {'nombre': 'Inmuebles', 'costo_min': 100000, 'costo_max': 500000, 'vida_util': [20, 40], 'valor_residual_pct': [0.20, 0.40]},
+    {'nombre': 'Mobiliario', 'costo_min': 500, 'costo_max': 5000, 'vida_util': [5, 10], 'valor_residual_pct': [0.05, 0.10]}
+]
+
+# Name vocabulary of each asset type
+NOMBRES_ACTIVO = {
+    'Maquinaria': {
+        'prefijos': ['Máquina', 'Equipo', 'Sistema', 'Línea', 'Unidad'],
+        'tipos': ['Producción', 'Ensamblaje', 'Empaque', 'Procesamiento', 'Industrial'],
+        'marcas': ['IndusTech', 'MaquiPro', 'TechMach', 'PowerEquip', 'MachSystems']
+    },
+    'Equipo': {
+        'prefijos': ['Equipo', 'Sistema', 'Dispositivo', 'Unidad', 'Kit'],
+        'tipos': ['Medición', 'Análisis', 'Control', 'Seguridad', 'Comunicación'],
+        'marcas': ['TechEquip', 'ProSystems', 'EquipTech', 'DevicePro', 'TechTools']
+    },
+    'Vehículos': {
+        'prefijos': ['Automóvil', 'Camión', 'Furgoneta', 'Camioneta', 'Vehículo'],
+        'tipos': ['Reparto', 'Ejecutivo', 'Transporte', 'Carga', 'Comercial'],
+        'marcas': ['Toyota', 'Ford', 'Mercedes', 'Volkswagen', 'Nissan']
+    },
+    'Inmuebles': {
+        'prefijos': ['Edificio', 'Local', 'Oficina', 'Bodega', 'Terreno'],
+        'tipos': ['Comercial', 'Industrial', 'Corporativo', 'Almacén', 'Administrativo'],
+        'marcas': ['Ubicación', 'Sector', 'Zona', 'Área', 'Región']
+    },
+    'Mobiliario': {
+        'prefijos': ['Escritorio', 'Silla', 'Archivero', 'Mesa', 'Estantería'],
+        'tipos': ['Ejecutivo', 'Ergonómico', 'Modular', 'Funcional', 'Profesional'],
+        'marcas': ['OfficePro', 'ErgoStyle', 'ModuOffice', 'FurniTech', 'ComfortDesign']
+    }
+}
+
+COLUMNAS_ACTIVOS = ['ID_Activo', 'Nombre_Activo', 'Tipo_Activo', 'Fecha_Compra',
+                    'Costo_Adquisicion', 'Vida_Util_Anios', 'Valor_Residual',
+                    'Depreciacion_Acumulada', 'Valor_Neto_Libros']
+
+def generate_activos(num_activos=30, vectorized=False):
     """
     Generate a synthetic dataset of fixed assets with realistic attributes.
     
     Args:
         num_activos: Number of assets to generate
+        vectorized: If True, draw the whole table as NumPy arrays instead of
+            one asset at a time (same columns and distributions, different
+            random stream)
         
     Returns:
         DataFrame: A pandas DataFrame containing asset information
     """
-    # Define asset types and their characteristics
-    tipos_activos = [
-        {'nombre': 'Maquinaria', 'costo_min': 5000, 'costo_max': 50000, 'vida_util': [5, 10], 'valor_residual_pct': [0.05, 0.15]},
-        {'nombre': 'Equipo', 'costo_min': 1000, 'costo_max': 10000, 'vida_util': [3, 7], 'valor_residual_pct': [0.03, 0.10]},
-        {'nombre': 'Vehículos', 'costo_min': 15000, 'costo_max': 80000, 'vida_util': [5, 8], 'valor_residual_pct': [0.10, 0.20]},
-        {'nombre': 'Inmuebles', 'costo_min': 100000, 'costo_max': 500000, 'vida_util': [20, 40], 'valor_residual_pct': [0.20, 0.40]},
-        {'nombre': 'Mobiliario', 'costo_min': 500, 'costo_max': 5000, 'vida_util': [5, 10], 'valor_residual_pct': [0.05, 0.10]}
-    ]
+    if vectorized:
+        return _generate_activos_vectorized(num_activos)
     
     # Generate start date range (3 years before simulation start to simulation start)
     start_date = datetime.strptime('2017-01-01', '%Y-%m-%d')  # 3 years before simulation
@@ -41,7 +84,7 @@ def generate_activos(num_activos=30):
     
     # Generate data for each asset
     for _ in range(num_activos):
-        tipo_activo = np.random.choice(tipos_activos)
+        tipo_activo = np.random.choice(TIPOS_ACTIVO)
         costo_adquisicion = np.random.uniform(tipo_activo['costo_min'], tipo_activo['costo_max'])
         vida_util = np.random.randint(tipo_activo['vida_util'][0], tipo_activo['vida_util'][1] + 1)
         valor_residual_pct = np.random.uniform(tipo_activo['valor_residual_pct'][0], tipo_activo['valor_residual_pct'][1])
@@ -69,26 +112,9 @@ def generate_activos(num_activos=30):
     # Generate asset names based on type
     nombres_activos = []
     for tipo in data['Tipo_Activo']:
-        if tipo == 'Maquinaria':
-            prefijos = ['Máquina', 'Equipo', 'Sistema', 'Línea', 'Unidad']
-            tipos = ['Producción', 'Ensamblaje', 'Empaque', 'Procesamiento', 'Industrial']
-            marcas = ['IndusTech', 'MaquiPro', 'TechMach', 'PowerEquip', 'MachSystems']
-        elif tipo == 'Equipo':
-            prefijos = ['Equipo', 'Sistema', 'Dispositivo', 'Unidad', 'Kit']
-            tipos = ['Medición', 'Análisis', 'Control', 'Seguridad', 'Comunicación']
-            marcas = ['TechEquip', 'ProSystems', 'EquipTech', 'DevicePro', 'TechTools']
-        elif tipo == 'Vehículos':
-            prefijos = ['Automóvil', 'Camión', 'Furgoneta', 'Camioneta', 'Vehículo']
-            tipos = ['Reparto', 'Ejecutivo', 'Transporte', 'Carga', 'Comercial']
-            marcas = ['Toyota', 'Ford', 'Mercedes', 'Volkswagen', 'Nissan']
-        elif tipo == 'Inmuebles':
-            prefijos = ['Edificio', 'Local', 'Oficina', 'Bodega', 'Terreno']
-            tipos = ['Comercial', 'Industrial', 'Corporativo', 'Almacén', 'Administrativo']
-            marcas = ['Ubicación', 'Sector', 'Zona', 'Área', 'Región']
-        else:  # Mobiliario
-            prefijos = ['Escritorio', 'Silla', 'Archivero', 'Mesa', 'Estantería']
-            tipos = ['Ejecutivo', 'Ergonómico', 'Modular', 'Funcional', 'Profesional']
-            marcas = ['OfficePro', 'ErgoStyle', 'ModuOffice', 'FurniTech', 'ComfortDesign']
+        prefijos = NOMBRES_ACTIVO[tipo]['prefijos']
+        tipos = NOMBRES_ACTIVO[tipo]['tipos']
+        marcas = NOMBRES_ACTIVO[tipo]['marcas']
         
         prefijo = np.random.choice(prefijos)
         tipo_especifico = np.random.choice(tipos)
@@ -104,6 +130,55 @@ def generate_activos(num_activos=30):
     df = pd.DataFrame(data)
     
     # Return the DataFrame with columns in the correct order
-    return df[['ID_Activo', 'Nombre_Activo', 'Tipo_Activo', 'Fecha_Compra', 
-               'Costo_Adquisicion', 'Vida_Util_Anios', 'Valor_Residual', 
-               'Depreciacion_Acumulada', 'Valor_Neto_Libros']]
\ No newline at end of file
+    return df[COLUMNAS_ACTIVOS]
+
+def _generate_activos_vectorized(num_activos):
+    """
+    Vectorized version of generate_activos.
+    
+    Asset types are drawn as integer codes first; their cost, useful life
+    and residual value ranges and their name vocabularies are then looked
+    up by integer indexing, and depreciation comes from the shared engine
+    in depreciacion.
+    """
+    # Generate start date range (3 years before simulation start to simulation start)
+    start_date = np.datetime64('2017-01-01', 'D')
+    end_date = np.datetime64('2020-01-01', 'D')
+    days_range = int((end_date - start_date).astype(int))
+    
+    codigos = np.random.randint(0, len(TIPOS_ACTIVO), size=num_activos)
+    
+    def rango(clave, posicion=None):
+        valores = [tipo[clave] if posicion is None else tipo[clave][posicion] for tipo in TIPOS_ACTIVO]
+        return np.array(valores)[codigos]
+    
+    costo_adquisicion = np.random.uniform(rango('costo_min'), rango('costo_max'))
+    vida_util = np.random.randint(rango('vida_util', 0), rango('vida_util', 1) + 1)
+    valor_residual = costo_adquisicion * np.random.uniform(rango('valor_residual_pct', 0), rango('valor_residual_pct', 1))
+    
+    # Generate random purchase dates
+    fecha_compra = start_date + np.random.randint(0, days_range, size=num_activos)
+    
+    # Calculate straight-line depreciation up to the start of the simulation
+    depreciacion = depreciacion_acumulada(costo_adquisicion, vida_util, fecha_compra, end_date,
+                                          valor_residual=valor_residual)[:, 0]
+    
+    # Generate asset names based on type
+    vocabularios = [NOMBRES_ACTIVO[tipo['nombre']] for tipo in TIPOS_ACTIVO]
+    prefijo = elegir_por_categoria(codigos, [vocabulario['prefijos'] for vocabulario in vocabularios])
+    tipo_especifico = elegir_por_categoria(codigos, [vocabulario['tipos'] for vocabulario in vocabularios])
+    marca = elegir_por_categoria(codigos, [vocabulario['marcas'] for vocabulario in vocabularios])
+    nombre = prefijo + ' ' + tipo_especifico + ' ' + marca + ' ' + codigos_modelo(num_activos)
+    
+    df = pd.DataFrame({
+        'ID_Activo': np.arange(1, num_activos + 1),
+        'Nombre_Activo': nombre,
+        'Tipo_Activo': np.array([tipo['nombre'] for tipo in TIPOS_ACTIVO], dtype=object)[codigos],
+        'Fecha_Compra': np.datetime_as_string(fecha_compra, unit='D'),
+        'Costo_Adquisicion': a_moneda(a_centavos(costo_adquisicion)),
+        'Vida_Util_Anios': vida_util,
+        'Valor_Residual': a_moneda(a_centavos(valor_residual)),
+        'Depreciacion_Acumulada': a_moneda(a_centavos(depreciacion)),
+        'Valor_Neto_Libros': a_moneda(a_centavos(costo_adquisicion - depreciacion))
+    })
+    return df[COLUMNAS_ACTIVOS]
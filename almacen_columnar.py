@@ -0,0 +1,133 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# On-disk intermediate tables for handing stage outputs between processes.
+# A table is a directory with one .npy file per column plus a small JSON
+# schema. Numeric columns are memory-mapped on read, so every process that
+# opens a table shares the same pages instead of receiving a pickled copy.
+# Text columns (dates, concepts, account codes) are dictionary-encoded: an
+# int32 code per row plus the sorted distinct values.
+
+ARCHIVO_ESQUEMA = 'esquema.json'
+
+def guardar_columnar(directorio, df):
+    """
+    Write a table to a columnar directory, replacing any previous one.
+
+    The table is written to a temporary directory first and then renamed,
+    so readers never see a partial table.
+
+    Args:
+        directorio: Directory of the table
+        df: DataFrame to store (its index is not stored)
+
+    Returns:
+        TablaColumnar: Reference to the stored table
+    """
+    temporal = directorio.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+
+    columnas = []
+    for i, (nombre, serie) in enumerate(df.items()):
+        base = os.path.join(temporal, f"{i:03d}")
+        if pd.api.types.is_numeric_dtype(serie.dtype) or pd.api.types.is_bool_dtype(serie.dtype):
+            np.save(base + '.npy', serie.to_numpy())
+            columnas.append({'nombre': nombre, 'tipo': 'numerico'})
+        else:
+            # Missing values get code -1
+            codigos, valores = pd.factorize(serie, sort=True)
+            np.save(base + '.codigos.npy', codigos.astype(np.int32))
+            np.save(base + '.diccionario.npy', np.asarray(valores, dtype=str))
+            columnas.append({'nombre': nombre, 'tipo': 'diccionario'})
+
+    with open(os.path.join(temporal, ARCHIVO_ESQUEMA), 'w', encoding='utf-8') as archivo:
+        json.dump({'filas': len(df), 'columnas': columnas}, archivo)
+
+    shutil.rmtree(directorio, ignore_errors=True)
+    os.replace(temporal, directorio)
+    return TablaColumnar(directorio)
+
+class TablaColumnar:
+    """
+    Reference to a table stored by guardar_columnar.
+
+    Only the directory is pickled, so a reference can be sent to worker
+    processes for free; each process maps the columns it reads.
+
+    Args:
+        directorio: Directory of the table
+    """
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        with open(os.path.join(directorio, ARCHIVO_ESQUEMA), encoding='utf-8') as archivo:
+            esquema = json.load(archivo)
+        self.filas = esquema['filas']
+        self._columnas = {c['nombre']: (i, c['tipo']) for i, c in enumerate(esquema['columnas'])}
+
+    def __len__(self):
+        return self.filas
+
+    @property
+    def columnas(self):
+        return list(self._columnas)
+
+    def columna(self, nombre):
+        """Memory-mapped values (numeric columns) or codes (dictionary-encoded columns) of a column."""
+        i, tipo = self._columnas[nombre]
+        sufijo = '.npy' if tipo == 'numerico' else '.codigos.npy'
+        return np.load(os.path.join(self.directorio, f"{i:03d}{sufijo}"), mmap_mode='r')
+
+    def diccionario(self, nombre):
+        """Distinct values of a dictionary-encoded column, indexed by code."""
+        i, _ = self._columnas[nombre]
+        return np.load(os.path.join(self.directorio, f"{i:03d}.diccionario.npy"))
+
+    def leer(self, columnas=None, inicio=0, fin=None, categorias=False):
+        """
+        Read rows [inicio, fin) of some columns as a DataFrame.
+
+        Numeric columns are views of the memory-mapped files (read-only, no
+        copy). Dictionary-encoded columns are decoded into strings, or kept
+        as codes in a Categorical with categorias=True.
+
+        Args:
+            columnas: Columns to read (all by default)
+            inicio: First row
+            fin: Row after the last one (the end of the table by default)
+            categorias: If True, return text columns as Categoricals
+
+        Returns:
+            DataFrame
+        """
+        filas = slice(inicio, fin)
+        datos = {}
+        for nombre in columnas or self.columnas:
+            valores = self.columna(nombre)[filas]
+            if self._columnas[nombre][1] == 'diccionario':
+                diccionario = self.diccionario(nombre)
+                if categorias:
+                    valores = pd.Categorical.from_codes(valores, diccionario)
+                else:
+                    # Plain object strings, as the generators build them;
+                    # pandas infers its default string dtype from them
+                    faltantes = valores < 0
+                    valores = diccionario[valores].astype(object)
+                    if faltantes.any():
+                        valores[faltantes] = None
+            datos[nombre] = valores
+        return pd.DataFrame(datos, copy=False)
+
+def como_dataframe(tabla):
+    """Materialize a TablaColumnar as a DataFrame; DataFrames are returned as they are."""
+    return tabla.leer() if isinstance(tabla, TablaColumnar) else tabla
+
+def particiones(filas, num_particiones):
+    """Contiguous (inicio, fin) row ranges splitting `filas` rows into near-equal parts."""
+    limites = np.linspace(0, filas, num_particiones + 1).astype(np.int64)
+    return [(int(inicio), int(fin)) for inicio, fin in zip(limites[:-1], limites[1:])]
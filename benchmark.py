@@ -0,0 +1,321 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from instrumentacion import memoria_pico_mb, formatear_mb
+
+# Benchmark harness for the generators. Every (stage, size) pair runs in a
+# fresh process, so peak RSS is not inflated by earlier runs; its inputs are
+# generated first with the vectorized generators and only the stage itself
+# is timed. Catalogs grow with the number of transactions, so a per-row scan
+# of a catalog shows up as a scaling exponent near 2.
+
+# Sizes (number of sales, or rows of a master table) of the default ladder
+ESCALERA = [1000, 10000, 100000]
+
+# Scaling exponent above which a stage is reported as super-linear
+EXPONENTE_MAXIMO = 1.3
+
+# Slowdown versus a previous run above which a result is a regression
+REGRESION_MAXIMA = 1.25
+
+# Cold-start budget of the CLI: seconds to import dataset_generator in a
+# fresh interpreter (pandas and numpy included), and optional heavy modules
+# that must only be imported by the stages that use them
+PRESUPUESTO_IMPORTACION = 1.5
+MODULOS_PESADOS = ['torch', 'ctgan', 'sdv', 'rdt', 'sklearn']
+
+# Stages with a vectorized flag, benchmarked with vectorized=False by --legacy
+ETAPAS_VECTORIZABLES = {'clientes', 'productos', 'activos', 'ventas', 'compras',
+                        'movimientos_bancarios', 'patrimonio'}
+
+ETAPAS_BENCHMARK = ['clientes', 'productos', 'activos', 'ventas', 'compras',
+                    'movimientos_bancarios', 'libro_diario', 'libro_mayor', 'patrimonio']
+
+def preparar(etapa, n, vectorized=True):
+    """
+    Inputs of one benchmark run.
+
+    Args:
+        etapa: Stage name, one of ETAPAS_BENCHMARK
+        n: Size of the run: rows of a master table, or number of sales (with
+            n/2 purchases, n/5 extra movements, n/10 clients and n/20 products)
+        vectorized: Value of the stage's vectorized flag
+
+    Returns:
+        tuple: (function, positional arguments, keyword arguments)
+    """
+    from clientes_generator import generate_clientes
+    from productos_generator import generate_productos
+    from activos_generator import generate_activos
+    from cuentas_bancarias_generator import generate_cuentas_bancarias
+    from plan_cuentas_generator import generate_plan_cuentas
+    from ventas_generator import generate_ventas
+    from compras_generator import generate_compras
+    from movimientos_bancarios_generator import generate_movimientos_bancarios
+    from libro_diario_generator import generate_libro_diario
+    from libro_mayor_generator import generate_libro_mayor
+
+    if etapa == 'clientes':
+        return generate_clientes, [n], {'vectorized': vectorized}
+    if etapa == 'productos':
+        return generate_productos, [n], {'vectorized': vectorized}
+    if etapa == 'activos':
+        return generate_activos, [n], {'vectorized': vectorized}
+    if etapa == 'patrimonio':
+        from generate_patrimonio import generate_activos_base, generate_patrimonio_data
+        activos = generate_activos_base()
+        activos = activos.sample(n, replace=True, random_state=0).reset_index(drop=True)
+        activos['id_activo'] = np.arange(1, n + 1)
+        return generate_patrimonio_data, [activos], {'vectorized': vectorized}
+
+    clientes = generate_clientes(max(n // 10, 1), vectorized=True)
+    productos = generate_productos(max(n // 20, 1), vectorized=True)
+    if etapa == 'ventas':
+        return generate_ventas, [clientes, productos, n], {'vectorized': vectorized}
+
+    ventas = generate_ventas(clientes, productos, n, vectorized=True)
+    compras = generate_compras(productos, max(n // 2, 1), vectorized=True)
+    if etapa == 'compras':
+        return generate_compras, [productos, max(n // 2, 1)], {'vectorized': vectorized}
+
+    cuentas_bancarias = generate_cuentas_bancarias()
+    if etapa == 'movimientos_bancarios':
+        return (generate_movimientos_bancarios, [cuentas_bancarias, ventas, compras, max(n // 5, 1)],
+                {'vectorized': vectorized})
+
+    movimientos = generate_movimientos_bancarios(cuentas_bancarias, ventas, compras, max(n // 5, 1),
+                                                 vectorized=True)
+    plan_cuentas = generate_plan_cuentas()
+    if etapa == 'libro_diario':
+        return generate_libro_diario, [plan_cuentas, ventas, compras, movimientos, productos], {}
+
+    libro_diario = generate_libro_diario(plan_cuentas, ventas, compras, movimientos, productos)
+    if etapa == 'libro_mayor':
+        return generate_libro_mayor, [plan_cuentas, libro_diario], {}
+
+    raise ValueError(f"Unknown benchmark stage '{etapa}'; expected one of {ETAPAS_BENCHMARK}")
+
+def medir(etapa, n, vectorized=True, seed=0):
+    """
+    Run one benchmark in the current process and measure it.
+
+    Meant to run in a fresh child process (see ejecutar_benchmark).
+
+    Returns:
+        dict: etapa, n, filas (rows produced), segundos, filas_por_segundo,
+            rss_pico_mb (peak RSS of the process) and rss_etapa_mb (growth of
+            the peak during the timed call); both None where memory cannot
+            be measured
+    """
+    np.random.seed(seed)
+    funcion, argumentos, parametros = preparar(etapa, n, vectorized)
+
+    rss_antes = memoria_pico_mb()
+    inicio = time.perf_counter()
+    resultado = funcion(*argumentos, **parametros)
+    segundos = time.perf_counter() - inicio
+    rss_pico = memoria_pico_mb()
+
+    return {
+        'etapa': etapa,
+        'n': n,
+        'vectorized': vectorized if etapa in ETAPAS_VECTORIZABLES else None,
+        'filas': len(resultado),
+        'segundos': segundos,
+        'filas_por_segundo': len(resultado) / segundos if segundos > 0 else None,
+        'rss_pico_mb': rss_pico,
+        'rss_etapa_mb': None if rss_pico is None else rss_pico - rss_antes
+    }
+
+def ejecutar_benchmark(etapas=None, tamanos=None, vectorized=True, max_segundos=60.0):
+    """
+    Run every stage over the size ladder, each run in a fresh process.
+
+    A stage stops climbing the ladder once a run takes longer than
+    max_segundos, so slow legacy paths do not stall the suite.
+
+    Returns:
+        dict: Run report with metadata, results and scaling exponents
+    """
+    etapas = etapas or ETAPAS_BENCHMARK
+    tamanos = sorted(tamanos or ESCALERA)
+    contexto = multiprocessing.get_context('spawn')
+
+    resultados = []
+    for etapa in etapas:
+        for n in tamanos:
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as pool:
+                try:
+                    resultado = pool.submit(medir, etapa, n, vectorized).result()
+                except Exception as e:
+                    resultado = {'etapa': etapa, 'n': n, 'error': f"{type(e).__name__}: {e}"}
+            resultados.append(resultado)
+            print(_formatear_resultado(resultado), flush=True)
+            if 'error' in resultado or resultado['segundos'] > max_segundos:
+                break
+
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'version': _version_codigo(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'vectorized': vectorized,
+        'resultados': resultados,
+        'exponentes': exponentes_escala(resultados)
+    }
+
+def exponentes_escala(resultados, segundos_minimos=0.005):
+    """
+    Scaling exponent of every stage: the slope of log(time) over log(size).
+
+    About 1 is linear; about 2 means quadratic behaviour. Runs shorter than
+    segundos_minimos are too noisy and are ignored.
+
+    Returns:
+        dict: Exponent per stage (only stages with two or more usable runs)
+    """
+    exponentes = {}
+    for etapa in dict.fromkeys(r['etapa'] for r in resultados):
+        puntos = [(r['n'], r['segundos']) for r in resultados
+                  if r['etapa'] == etapa and 'error' not in r and r['segundos'] >= segundos_minimos]
+        if len(puntos) >= 2:
+            tamanos, segundos = np.log(np.array(puntos, dtype=float)).T
+            exponentes[etapa] = float(np.polyfit(tamanos, segundos, 1)[0])
+    return exponentes
+
+def comparar(reporte, anterior, umbral=REGRESION_MAXIMA):
+    """
+    Compare a run with a previous report, result by result (same stage,
+    size and vectorized flag).
+
+    Returns:
+        list: (etapa, n, seconds before, seconds now, ratio) of every
+            result that got slower by more than `umbral`
+    """
+    previos = {(r['etapa'], r['n'], r['vectorized']): r for r in anterior['resultados'] if 'error' not in r}
+    regresiones = []
+    for r in reporte['resultados']:
+        previo = previos.get((r['etapa'], r['n'], r.get('vectorized')))
+        if previo is None or 'error' in r:
+            continue
+        ratio = r['segundos'] / previo['segundos'] if previo['segundos'] > 0 else float('inf')
+        if ratio > umbral:
+            regresiones.append((r['etapa'], r['n'], previo['segundos'], r['segundos'], ratio))
+    return regresiones
+
+def medir_importacion(modulo='dataset_generator'):
+    """
+    Time a cold import of a module in a fresh interpreter.
+
+    The import runs from an empty temporary directory, so any file it
+    creates as a side effect is caught.
+
+    Returns:
+        dict: 'segundos' of the import, the MODULOS_PESADOS it loaded
+            ('pesados') and the files it created ('archivos')
+    """
+    codigo = ("import json, sys, time\n"
+              f"sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})\n"
+              "inicio = time.perf_counter()\n"
+              f"import {modulo}\n"
+              "print(json.dumps({'segundos': time.perf_counter() - inicio,"
+              f" 'pesados': [m for m in {MODULOS_PESADOS!r} if m in sys.modules]}}))")
+    with tempfile.TemporaryDirectory() as directorio:
+        salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True,
+                                cwd=directorio, check=True).stdout
+        archivos = sorted(os.listdir(directorio))
+    return dict(json.loads(salida.splitlines()[-1]), modulo=modulo, archivos=archivos)
+
+def comprobar_importacion(presupuesto=PRESUPUESTO_IMPORTACION):
+    """
+    Check the cold-start budget of the CLI and print the result.
+
+    Returns:
+        tuple: (medir_importacion result, True if the check failed)
+    """
+    importacion = medir_importacion()
+    lento = importacion['segundos'] > presupuesto
+    print(f"Cold import of {importacion['modulo']}: {importacion['segundos']:.3f}s "
+          f"(budget {presupuesto:.3f}s){'  <-- over budget' if lento else ''}")
+    if importacion['pesados']:
+        print(f"  Heavy optional modules imported at startup: {', '.join(importacion['pesados'])}")
+    if importacion['archivos']:
+        print(f"  Files created by the import: {', '.join(importacion['archivos'])}")
+    return importacion, lento or bool(importacion['pesados']) or bool(importacion['archivos'])
+
+def _version_codigo():
+    """Current git commit of the code, if available."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _formatear_resultado(r):
+    if 'error' in r:
+        return f"{r['etapa']:<22} {r['n']:>10,}  error: {r['error']}"
+    return (f"{r['etapa']:<22} {r['n']:>10,}  {r['segundos']:>9.3f}s  {r['filas_por_segundo'] or 0:>13,.0f} rows/s"
+            f"  {formatear_mb(r['rss_pico_mb']):>8} MB peak")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dataset generators over a ladder of sizes.")
+    parser.add_argument('--stages', nargs='+', choices=ETAPAS_BENCHMARK, help="Stages to run (default: all)")
+    parser.add_argument('--sizes', nargs='+', type=int, help=f"Size ladder (default: {ESCALERA})")
+    parser.add_argument('--legacy', action='store_true', help="Benchmark the row-by-row generators")
+    parser.add_argument('--max-seconds', type=float, default=60.0,
+                        help="Stop a stage's ladder after a run slower than this")
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    parser.add_argument('--compare', help="Previous JSON report to check for regressions")
+    parser.add_argument('--import-budget', type=float, default=PRESUPUESTO_IMPORTACION,
+                        help="Maximum seconds for a cold import of the generator CLI")
+    parser.add_argument('--import-only', action='store_true',
+                        help="Only check the cold-start import budget (fast; for CI)")
+    args = parser.parse_args(argv)
+
+    if args.import_only:
+        return 1 if comprobar_importacion(args.import_budget)[1] else 0
+
+    reporte = ejecutar_benchmark(args.stages, args.sizes, vectorized=not args.legacy,
+                                 max_segundos=args.max_seconds)
+
+    fallos = False
+    print("\nScaling exponents (time ~ size^k):")
+    for etapa, exponente in reporte['exponentes'].items():
+        aviso = "  <-- super-linear" if exponente > EXPONENTE_MAXIMO else ""
+        fallos |= bool(aviso)
+        print(f"  {etapa:<22} k = {exponente:.2f}{aviso}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as archivo:
+            regresiones = comparar(reporte, json.load(archivo))
+        print(f"\nRegressions versus {args.compare}: {len(regresiones)}")
+        for etapa, n, antes, ahora, ratio in regresiones:
+            print(f"  {etapa:<22} {n:>10,}  {antes:.3f}s -> {ahora:.3f}s  (x{ratio:.2f})")
+        fallos |= bool(regresiones)
+
+    print()
+    reporte['importacion'], fallo = comprobar_importacion(args.import_budget)
+    fallos |= fallo
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as archivo:
+            json.dump(reporte, archivo, indent=2)
+        print(f"\nSaved benchmark report to {args.output}")
+
+    return 1 if fallos else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
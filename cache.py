@@ -0,0 +1,160 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+import time
+
+import pandas as pd
+
+# On-disk cache of pipeline stage outputs. An entry is addressed by a hash
+# of everything that determines the stage's output: its name, parameters,
+# RNG seed, the source code it runs and the keys of its inputs. Keys can
+# therefore be computed for the whole DAG before anything runs, and a
+# stage is regenerated only when something upstream of it changed.
+
+DIRECTORIO_REPO = os.path.dirname(os.path.abspath(__file__))
+
+# Stage parameters that do not change a stage's output (e.g. the number of
+# processes of a sharded stage, or where trained models are kept) and are
+# left out of its key
+PARAMETROS_SIN_EFECTO = {'workers', 'directorio_modelos'}
+
+class CacheEtapas:
+    """
+    Content-addressed store of stage outputs.
+
+    Tables are stored as Parquet when pyarrow is available and pickled
+    otherwise. Entries are evicted by total size (least recently used
+    first) and by age when the cache is opened and after every write.
+
+    Args:
+        directorio: Directory the entries are stored in
+        max_bytes: Maximum total size of the cache (None for no limit)
+        max_edad: Maximum age of an entry in seconds since it was last
+            used (None for no limit)
+    """
+
+    def __init__(self, directorio, max_bytes=None, max_edad=None):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.max_edad = max_edad
+        self.aciertos = 0
+        self.fallos = 0
+        os.makedirs(directorio, exist_ok=True)
+        self.limpiar()
+
+    def clave(self, nombre, etapa, semilla, claves_entradas):
+        """
+        Cache key of a stage.
+
+        Args:
+            nombre: Stage name
+            etapa: Stage definition as in pipeline_scheduler.ETAPAS
+            semilla: RNG seed of the stage
+            claves_entradas: Cache keys of the stage's inputs, in order
+
+        Returns:
+            str: Hex SHA-256 digest
+        """
+        contenido = {
+            'nombre': nombre,
+            'parametros': {clave: repr(valor) for clave, valor in sorted(etapa['parametros'].items())
+                           if clave not in PARAMETROS_SIN_EFECTO},
+            'semilla': int(semilla),
+            'codigo': huella_codigo(etapa['funcion']),
+            'entradas': list(claves_entradas)
+        }
+        return hashlib.sha256(json.dumps(contenido, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def cargar(self, clave):
+        """Return the cached table of a key, or None on a miss."""
+        for ruta, leer in ((self._ruta(clave, '.parquet'), pd.read_parquet),
+                           (self._ruta(clave, '.pkl'), pd.read_pickle)):
+            if os.path.exists(ruta):
+                df = leer(ruta)
+                # Touch the entry so eviction is least-recently-used
+                os.utime(ruta)
+                self.aciertos += 1
+                return df
+        self.fallos += 1
+        return None
+
+    def guardar(self, clave, df):
+        """Store the table of a key, then evict entries over the limits."""
+        try:
+            ruta = self._ruta(clave, '.parquet')
+            df.to_parquet(ruta + '.tmp', index=False)
+        except (ImportError, ValueError, TypeError):
+            ruta = self._ruta(clave, '.pkl')
+            with open(ruta + '.tmp', 'wb') as archivo:
+                pickle.dump(df, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        # Publish the entry atomically, so a crash never leaves half a table
+        os.replace(ruta + '.tmp', ruta)
+        self.limpiar()
+
+    def limpiar(self):
+        """Evict entries older than max_edad, then the least recently used ones over max_bytes."""
+        entradas = []
+        for archivo in os.listdir(self.directorio):
+            ruta = os.path.join(self.directorio, archivo)
+            if os.path.isfile(ruta):
+                estado = os.stat(ruta)
+                entradas.append((estado.st_mtime, estado.st_size, ruta))
+
+        ahora = time.time()
+        if self.max_edad is not None:
+            for mtime, _, ruta in entradas:
+                if ahora - mtime > self.max_edad:
+                    os.remove(ruta)
+            entradas = [entrada for entrada in entradas if ahora - entrada[0] <= self.max_edad]
+
+        if self.max_bytes is not None:
+            total = sum(tamano for _, tamano, _ in entradas)
+            for _, tamano, ruta in sorted(entradas):
+                if total <= self.max_bytes:
+                    break
+                os.remove(ruta)
+                total -= tamano
+
+    def _ruta(self, clave, extension):
+        return os.path.join(self.directorio, clave + extension)
+
+def huella_codigo(funcion):
+    """
+    Hash of the source code a stage function runs.
+
+    Covers the module defining the function and, transitively, every module
+    of this repository it imports from, so editing a shared helper (e.g.
+    dinero) invalidates the stages that use it.
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    modulos = _modulos_locales(sys.modules[funcion.__module__], set())
+    resumen = hashlib.sha256()
+    for nombre in sorted(modulos):
+        resumen.update(nombre.encode('utf-8'))
+        with open(sys.modules[nombre].__file__, 'rb') as archivo:
+            resumen.update(archivo.read())
+    return resumen.hexdigest()
+
+def _modulos_locales(modulo, vistos):
+    """Names of the repository modules reachable from a module's globals."""
+    vistos.add(modulo.__name__)
+    for valor in vars(modulo).values():
+        if inspect.ismodule(valor):
+            dependencia = valor
+        else:
+            nombre_modulo = getattr(valor, '__module__', None)
+            dependencia = sys.modules.get(nombre_modulo) if isinstance(nombre_modulo, str) else None
+        if (dependencia is not None and dependencia.__name__ not in vistos
+                and _es_local(dependencia)):
+            _modulos_locales(dependencia, vistos)
+    return vistos
+
+def _es_local(modulo):
+    """Whether a module is a source file of this repository."""
+    archivo = getattr(modulo, '__file__', None)
+    return archivo is not None and os.path.dirname(os.path.abspath(archivo)) == DIRECTORIO_REPO
@@ -0,0 +1,47 @@
+import numpy as np
+
+# Time-ordered generation. Instead of drawing a random date per row and
+# sorting the table afterwards, the number of rows of every day is drawn
+# once from a multinomial over the calendar, and rows take their day from
+# their position. Any slice of rows is then already in date order, so tables
+# can be produced and written chunk by chunk without a global sort. The
+# per-day counts have the same distribution as counting n uniform draws.
+
+def conteos_diarios(total, start_date, end_date, pesos=None):
+    """
+    Number of rows of every day of a period.
+
+    Args:
+        total: Total number of rows
+        start_date: First day of the period ('YYYY-MM-DD')
+        end_date: Last day of the period ('YYYY-MM-DD'), included
+        pesos: Optional relative weight of every day (uniform if None)
+
+    Returns:
+        ndarray: int64 count per day, summing to `total`
+    """
+    dias = int((np.datetime64(end_date, 'D') - np.datetime64(start_date, 'D')).astype(int)) + 1
+    if dias <= 0:
+        raise ValueError(f"end_date {end_date} is before start_date {start_date}")
+    if pesos is None:
+        probabilidades = np.full(dias, 1.0 / dias)
+    else:
+        probabilidades = np.asarray(pesos, dtype=np.float64)
+        if len(probabilidades) != dias:
+            raise ValueError(f"Expected {dias} daily weights, got {len(probabilidades)}")
+        probabilidades = probabilidades / probabilidades.sum()
+    return np.random.multinomial(total, probabilidades).astype(np.int64)
+
+def dias_de_filas(acumulado, inicio, fin):
+    """
+    Day offset of rows [inicio, fin) of a time-ordered table.
+
+    Args:
+        acumulado: Cumulative sum of conteos_diarios
+        inicio: First row (0-based)
+        fin: Row after the last one
+
+    Returns:
+        ndarray: Non-decreasing day offsets from the start of the period
+    """
+    return np.searchsorted(acumulado, np.arange(inicio, fin), side='right')
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from conceptos import PLANTILLAS_CONCEPTO
+
+# Posting rules for bank movements, evaluated in order. A rule applies to a
+# movement when its concept matches the regex 'patron' (None matches any
+# concept) and its 'Tipo' equals 'tipo' (None matches any type); the first
+# rule that applies decides the posting template and the counter-account.
+# New concept types only need a new row here.
+REGLAS_MOVIMIENTOS = [
+    # Collections and supplier payments take precedence over the movement type
+    {'patron': 'Cobro venta', 'tipo': None, 'plantilla': 'ingreso_bancario', 'contrapartida': 'Cuentas por Cobrar'},
+    {'patron': 'Pago compra', 'tipo': None, 'plantilla': 'egreso_bancario', 'contrapartida': 'Proveedores'},
+
+    # Other income
+    {'patron': 'Préstamo', 'tipo': 'Ingreso', 'plantilla': 'ingreso_bancario', 'contrapartida': 'Préstamos Bancarios a Largo Plazo'},
+    {'patron': 'Devolución impuestos', 'tipo': 'Ingreso', 'plantilla': 'ingreso_bancario', 'contrapartida': 'ISR por Pagar'},
+    {'patron': 'Venta de activo', 'tipo': 'Ingreso', 'plantilla': 'ingreso_bancario', 'contrapartida': 'Otros Ingresos'},
+    {'patron': None, 'tipo': 'Ingreso', 'plantilla': 'ingreso_bancario', 'contrapartida': 'Otros Ingresos'},
+
+    # Other expenses (any movement that is not an Ingreso)
+    {'patron': '(?i:nómina)', 'tipo': None, 'plantilla': 'egreso_bancario', 'contrapartida': 'Gastos de Administración'},
+    {'patron': 'Servicios', 'tipo': None, 'plantilla': 'egreso_bancario', 'contrapartida': 'Gastos de Administración'},
+    {'patron': 'Impuestos', 'tipo': None, 'plantilla': 'egreso_bancario', 'contrapartida': 'ISR por Pagar'},
+    {'patron': 'Seguros|Mantenimiento', 'tipo': None, 'plantilla': 'egreso_bancario', 'contrapartida': 'Gastos de Administración'},
+    {'patron': 'Alquiler', 'tipo': None, 'plantilla': 'egreso_bancario', 'contrapartida': 'Gastos de Administración'},
+    {'patron': None, 'tipo': None, 'plantilla': 'egreso_bancario', 'contrapartida': 'Otros Gastos'}
+]
+
+def clasificar_movimientos(movimientos_bancarios_df, cuentas, reglas=None):
+    """
+    Assign a posting template and a counter-account to every bank movement.
+
+    Each rule is one vectorized pass over the movements that no earlier
+    rule has claimed yet, so the common concepts are matched first and the
+    later rules only scan what is left. Encoded concepts (see conceptos)
+    are matched through their templates, once per rule.
+
+    Args:
+        movimientos_bancarios_df: DataFrame containing bank transactions
+        cuentas: PlanCuentas of the chart of accounts
+        reglas: Rule table (defaults to REGLAS_MOVIMIENTOS)
+
+    Returns:
+        tuple: (template name per movement, counter-account ID per movement)
+            as arrays; movements no rule applies to get None
+    """
+    if reglas is None:
+        reglas = REGLAS_MOVIMIENTOS
+
+    num_movimientos = len(movimientos_bancarios_df)
+    if 'Concepto' in movimientos_bancarios_df:
+        concepto = movimientos_bancarios_df['Concepto']
+        codigos = None
+    else:
+        concepto = pd.Series(PLANTILLAS_CONCEPTO)
+        codigos = movimientos_bancarios_df['Concepto_Plantilla'].to_numpy()
+    tipo = movimientos_bancarios_df['Tipo'].to_numpy()
+
+    plantillas = np.full(num_movimientos, None, dtype=object)
+    contrapartidas = np.full(num_movimientos, None, dtype=object)
+    pendientes = np.ones(num_movimientos, dtype=bool)
+
+    for regla in reglas:
+        candidatos = pendientes if regla['tipo'] is None else pendientes & (tipo == regla['tipo'])
+        if regla['patron'] is not None:
+            posiciones = np.flatnonzero(candidatos)
+            if codigos is None:
+                coincide = concepto.iloc[posiciones].str.contains(regla['patron'], regex=True).to_numpy(dtype=bool)
+            else:
+                coincide = concepto.str.contains(regla['patron'], regex=True).to_numpy(dtype=bool)[codigos[posiciones]]
+            candidatos = np.zeros(num_movimientos, dtype=bool)
+            candidatos[posiciones[coincide]] = True
+
+        plantillas[candidatos] = regla['plantilla']
+        contrapartidas[candidatos] = cuentas[regla['contrapartida']]
+        pendientes &= ~candidatos
+        if not pendientes.any():
+            break
+
+    return plantillas, contrapartidas
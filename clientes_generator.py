@@ -1,16 +1,51 @@
 import pandas as pd
 import numpy as np
 
-def generate_clientes(num_clientes=100):
+from vocabularios import elegir_por_categoria
+
+# Client categories and their distribution (60% Minorista, 30% Mayorista,
+# 10% Corporativo)
+CATEGORIAS_CLIENTE = ['Minorista', 'Mayorista', 'Corporativo']
+PROBABILIDADES_CATEGORIA = [0.6, 0.3, 0.1]
+
+# Sample names for each category
+NOMBRES_CLIENTE = {
+    'Minorista': [
+        'Juan Pérez', 'María García', 'Carlos López', 'Ana Martínez', 'Pedro Rodríguez',
+        'Laura Sánchez', 'Miguel González', 'Carmen Fernández', 'José Ramírez', 'Isabel Torres',
+        'Francisco Díaz', 'Sofía Ruiz', 'Antonio Vargas', 'Elena Castro', 'Manuel Ortega',
+        'Rosa Jiménez', 'Javier Romero', 'Patricia Moreno', 'David Álvarez', 'Lucía Gutiérrez'
+    ],
+    'Mayorista': [
+        'Distribuidora González S.A.', 'Comercial López e Hijos', 'Mayorista Fernández',
+        'Distribuciones Martínez', 'Comercializadora Rodríguez', 'Mayoreo Sánchez',
+        'Abastecedora Torres', 'Distribuidora Nacional', 'Comercial del Centro',
+        'Mayorista del Sur'
+    ],
+    'Corporativo': [
+        'Industrias Globales S.A.', 'Corporación Tecnológica', 'Grupo Empresarial Omega',
+        'Conglomerado Industrial', 'Multinacional Sigma', 'Corporación Financiera Alpha',
+        'Grupo Hotelero Internacional', 'Consorcio Energético', 'Corporación Alimentaria',
+        'Grupo Farmacéutico'
+    ]
+}
+
+def generate_clientes(num_clientes=100, vectorized=False):
     """
     Generate a synthetic dataset of clients with realistic attributes.
     
     Args:
         num_clientes: Number of clients to generate
+        vectorized: If True, draw the names as arrays instead of one client
+            at a time (same columns and distributions, different random
+            stream)
         
     Returns:
         DataFrame: A pandas DataFrame containing client information
     """
+    if vectorized:
+        return _generate_clientes_vectorized(num_clientes)
+    
     # Define the structure of the clients dataset
     data = {
         'ID_Cliente': list(range(1, num_clientes + 1)),
@@ -18,47 +53,32 @@ def generate_clientes(num_clientes=100):
         'Categoria': []
     }
     
-    # Define client categories and their distribution
-    categorias = ['Minorista', 'Mayorista', 'Corporativo']
-    categoria_probs = [0.6, 0.3, 0.1]  # 60% Minorista, 30% Mayorista, 10% Corporativo
-    
     # Generate categories based on probabilities
-    data['Categoria'] = np.random.choice(categorias, size=num_clientes, p=categoria_probs)
-    
-    # Define sample names for each category
-    nombres_minorista = [
-        'Juan Pérez', 'María García', 'Carlos López', 'Ana Martínez', 'Pedro Rodríguez',
-        'Laura Sánchez', 'Miguel González', 'Carmen Fernández', 'José Ramírez', 'Isabel Torres',
-        'Francisco Díaz', 'Sofía Ruiz', 'Antonio Vargas', 'Elena Castro', 'Manuel Ortega',
-        'Rosa Jiménez', 'Javier Romero', 'Patricia Moreno', 'David Álvarez', 'Lucía Gutiérrez'
-    ]
-    
-    nombres_mayorista = [
-        'Distribuidora González S.A.', 'Comercial López e Hijos', 'Mayorista Fernández',
-        'Distribuciones Martínez', 'Comercializadora Rodríguez', 'Mayoreo Sánchez',
-        'Abastecedora Torres', 'Distribuidora Nacional', 'Comercial del Centro',
-        'Mayorista del Sur'
-    ]
-    
-    nombres_corporativo = [
-        'Industrias Globales S.A.', 'Corporación Tecnológica', 'Grupo Empresarial Omega',
-        'Conglomerado Industrial', 'Multinacional Sigma', 'Corporación Financiera Alpha',
-        'Grupo Hotelero Internacional', 'Consorcio Energético', 'Corporación Alimentaria',
-        'Grupo Farmacéutico'
-    ]
+    data['Categoria'] = np.random.choice(CATEGORIAS_CLIENTE, size=num_clientes, p=PROBABILIDADES_CATEGORIA)
     
     # Assign realistic names based on category
     nombres = []
     for categoria in data['Categoria']:
-        if categoria == 'Minorista':
-            nombres.append(np.random.choice(nombres_minorista))
-        elif categoria == 'Mayorista':
-            nombres.append(np.random.choice(nombres_mayorista))
-        else:  # Corporativo
-            nombres.append(np.random.choice(nombres_corporativo))
+        nombres.append(np.random.choice(NOMBRES_CLIENTE[categoria]))
     
     data['Nombre'] = nombres
     
     # Create and return DataFrame
     df = pd.DataFrame(data)
-    return df[['ID_Cliente', 'Nombre', 'Categoria']]
\ No newline at end of file
+    return df[['ID_Cliente', 'Nombre', 'Categoria']]
+
+def _generate_clientes_vectorized(num_clientes):
+    """
+    Vectorized version of generate_clientes.
+    
+    Categories are drawn as integer codes and every name is picked from its
+    category's vocabulary by integer indexing.
+    """
+    codigos = np.random.choice(len(CATEGORIAS_CLIENTE), size=num_clientes, p=PROBABILIDADES_CATEGORIA)
+    
+    df = pd.DataFrame({
+        'ID_Cliente': np.arange(1, num_clientes + 1),
+        'Nombre': elegir_por_categoria(codigos, [NOMBRES_CLIENTE[categoria] for categoria in CATEGORIAS_CLIENTE]),
+        'Categoria': np.array(CATEGORIAS_CLIENTE, dtype=object)[codigos]
+    })
+    return df[['ID_Cliente', 'Nombre', 'Categoria']]
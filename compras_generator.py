@@ -2,20 +2,50 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
-def generate_compras(productos_df, num_compras=500):
+from dinero import a_centavos, a_moneda
+from calendario import conteos_diarios, dias_de_filas
+
+# Purchase tiers by unit cost, from most to least expensive: quantity range
+# [min, max), the quantity above which the larger discount range applies,
+# and the two discount ranges
+TRAMOS_COMPRA = [
+    {'costo_min': 1000, 'cantidad': (5, 30), 'umbral_cantidad': 15,
+     'descuento_alto': (0.05, 0.15), 'descuento_bajo': (0.03, 0.08)},  # Productos caros (electrónica)
+    {'costo_min': 200, 'cantidad': (15, 80), 'umbral_cantidad': 40,
+     'descuento_alto': (0.04, 0.12), 'descuento_bajo': (0.02, 0.06)},  # Productos de precio medio (hogar)
+    {'costo_min': -np.inf, 'cantidad': (30, 250), 'umbral_cantidad': 100,
+     'descuento_alto': (0.03, 0.10), 'descuento_bajo': (0.02, 0.05)}   # Productos más económicos
+]
+
+def generate_compras(productos_df, num_compras=500, vectorized=False,
+                     start_date='2020-01-01', end_date='2023-12-31', ordered=False):
     """
     Generate a synthetic dataset of inventory purchases with realistic attributes.
     
     Args:
         productos_df: DataFrame containing product information
         num_compras: Number of purchase transactions to generate
+        vectorized: If True, draw the whole table as NumPy arrays instead of
+            one purchase at a time (same columns and distributions, different
+            random stream)
+        start_date: First day of the simulation period ('YYYY-MM-DD')
+        end_date: Last day of the simulation period ('YYYY-MM-DD')
+        ordered: If True, draw the number of purchases of every day and fill
+            each day's rows, so the table is generated in date order without
+            a sort and IDs follow the dates (implies vectorized)
         
     Returns:
         DataFrame: A pandas DataFrame containing purchase information
     """
-    # Define date range for the simulation (4 years)
-    start_date = datetime.strptime('2020-01-01', '%Y-%m-%d')
-    end_date = datetime.strptime('2023-12-31', '%Y-%m-%d')
+    if ordered:
+        dias = dias_de_filas(np.cumsum(conteos_diarios(num_compras, start_date, end_date)), 0, num_compras)
+        return _generate_compras_vectorized(productos_df, num_compras, start_date, end_date, dias)
+    if vectorized:
+        return _generate_compras_vectorized(productos_df, num_compras, start_date, end_date)
+    
+    # Define date range for the simulation
+    start_date = datetime.strptime(start_date, '%Y-%m-%d')
+    end_date = datetime.strptime(end_date, '%Y-%m-%d')
     days_range = (end_date - start_date).days
     
     # Initialize data lists
@@ -77,4 +107,97 @@ def generate_compras(productos_df, num_compras=500):
     
     # Return the DataFrame with columns in the correct order
     return df[['ID_Compra', 'ID_Producto', 'Fecha_Compra', 
-              'Cantidad_Adquirida', 'Costo_Unitario', 'Costo_Total_Compra']]
\ No newline at end of file
+              'Cantidad_Adquirida', 'Costo_Unitario', 'Costo_Total_Compra']]
+
+def _generate_compras_vectorized(productos_df, num_compras, start_date='2020-01-01', end_date='2023-12-31',
+                                 dias=None):
+    """
+    Vectorized version of generate_compras.
+    
+    Products are drawn as row positions, the purchase tier of each row is
+    picked from TRAMOS_COMPRA by unit cost, and money is rounded once to
+    whole cents. Dates are drawn over the whole period, end_date included,
+    unless `dias` gives the already sorted day offsets of the rows (see
+    calendario), in which case nothing is sorted.
+    """
+    # Define date range for the simulation
+    start_date = np.datetime64(start_date, 'D')
+    end_date = np.datetime64(end_date, 'D')
+    days_range = int((end_date - start_date).astype(int)) + 1
+    
+    # Generate random dates within the simulation period
+    random_days = np.random.randint(0, days_range, size=num_compras) if dias is None else dias
+    
+    # Select random products by row position
+    pos_producto = np.random.randint(0, len(productos_df), size=num_compras)
+    id_producto = productos_df['ID_Producto'].to_numpy()[pos_producto]
+    costo_variable_unitario = productos_df['Costo_Variable_Unitario'].to_numpy()[pos_producto]
+    
+    # Pick the first tier whose minimum cost the product exceeds
+    tramo = np.select([costo_variable_unitario > t['costo_min'] for t in TRAMOS_COMPRA],
+                      np.arange(len(TRAMOS_COMPRA)))
+    columna = lambda clave, i: np.array([t[clave][i] for t in TRAMOS_COMPRA])[tramo]
+    
+    # Generate random quantity and discount based on the tier
+    cantidad = np.random.randint(columna('cantidad', 0), columna('cantidad', 1))
+    alto = cantidad > np.array([t['umbral_cantidad'] for t in TRAMOS_COMPRA])[tramo]
+    descuento = np.random.uniform(np.where(alto, columna('descuento_alto', 0), columna('descuento_bajo', 0)),
+                                  np.where(alto, columna('descuento_alto', 1), columna('descuento_bajo', 1)))
+    
+    # Aplicar descuento al costo unitario
+    costo_unitario = costo_variable_unitario * (1 - descuento)
+    
+    costo_total = a_moneda(a_centavos(cantidad * costo_unitario))
+    costo_unitario = a_moneda(a_centavos(costo_unitario))
+    
+    if dias is None:
+        # Sort by date on the integer day offsets (stable, so same-day
+        # purchases keep their ID order)
+        orden = np.argsort(random_days, kind='stable')
+        random_days, id_producto, cantidad, costo_unitario, costo_total = (
+            columna[orden] for columna in (random_days, id_producto, cantidad, costo_unitario, costo_total))
+    else:
+        orden = np.arange(num_compras)
+    fechas = start_date + random_days
+    
+    df = pd.DataFrame({
+        'ID_Compra': orden + 1,
+        'ID_Producto': id_producto,
+        'Fecha_Compra': np.datetime_as_string(fechas, unit='D'),
+        'Cantidad_Adquirida': cantidad,
+        'Costo_Unitario': costo_unitario,
+        'Costo_Total_Compra': costo_total
+    })
+    
+    return df[['ID_Compra', 'ID_Producto', 'Fecha_Compra', 
+              'Cantidad_Adquirida', 'Costo_Unitario', 'Costo_Total_Compra']]
+
+def iter_compras(productos_df, num_compras=500, chunk_size=100000,
+                 start_date='2020-01-01', end_date='2023-12-31', ordered=False):
+    """
+    Generate purchases in fixed-size chunks, so the table never has to be in memory at once.
+    
+    Each chunk is a vectorized generate_compras batch sorted by date; IDs
+    continue across chunks. With ordered=True the daily counts of the whole
+    period are drawn up front and the chunks are consecutive slices of the
+    calendar, so the concatenated chunks are in date order too.
+    
+    Args:
+        productos_df: DataFrame containing product information
+        num_compras: Total number of purchase transactions to generate
+        chunk_size: Number of purchases per chunk
+        start_date: First day of the simulation period ('YYYY-MM-DD')
+        end_date: Last day of the simulation period ('YYYY-MM-DD')
+        ordered: If True, emit the purchases in global date order
+        
+    Yields:
+        DataFrame: Consecutive chunks of purchase information
+    """
+    if ordered:
+        acumulado = np.cumsum(conteos_diarios(num_compras, start_date, end_date))
+    for inicio in range(0, num_compras, chunk_size):
+        fin = min(inicio + chunk_size, num_compras)
+        dias = dias_de_filas(acumulado, inicio, fin) if ordered else None
+        chunk = _generate_compras_vectorized(productos_df, fin - inicio, start_date, end_date, dias)
+        chunk['ID_Compra'] += inicio
+        yield chunk
@@ -0,0 +1,208 @@
+import re
+from string import Formatter
+
+import numpy as np
+import pandas as pd
+
+# Dictionary-encoded concepts. Every Concepto of the journal and of the bank
+# movements is one of the templates below with up to two integer IDs filled
+# in, so it can be stored as a small template code plus the referenced IDs
+# instead of a string per row. The text is only materialized where a format
+# needs it (CSV output); Arrow-based formats keep the encoded columns.
+# Codes are positions in this list: append new templates at the end.
+PLANTILLAS_CONCEPTO = [
+    # Sales and cost of sales
+    "Venta #{ID_Venta} - Cliente #{ID_Cliente}",
+    "Venta #{ID_Venta} - Cliente #{ID_Cliente} (incluye IVA)",
+    "Costo de Venta #{ID_Venta}",
+    "Costo de Venta #{ID_Venta} - Ajuste de inventario",
+
+    # Monthly operating expenses
+    "Gastos administrativos del mes",
+    "Pago de gastos administrativos del mes",
+    "Gastos de venta del mes",
+    "Pago de gastos de venta del mes",
+
+    # Purchases
+    "Compra #{ID_Compra} - Producto #{ID_Producto}",
+    "IVA por Compra #{ID_Compra}",
+
+    # Bank movements
+    "Cobro venta #{ID_Venta}",
+    "Pago compra #{ID_Compra}",
+    "Préstamo recibido",
+    "Devolución impuestos",
+    "Venta de activo",
+    "Inversión",
+    "Otros ingresos",
+    "Pago nómina",
+    "Servicios",
+    "Impuestos",
+    "Seguros",
+    "Mantenimiento",
+    "Alquiler",
+    "Otros gastos"
+]
+
+# Encoded columns, replacing 'Concepto'. Unused references are -1.
+COLUMNAS_REFERENCIA = ['Concepto_Ref1', 'Concepto_Ref2']
+COLUMNAS_PLANTILLA = ['Concepto_Plantilla'] + COLUMNAS_REFERENCIA
+SIN_REFERENCIA = -1
+
+# Fields of every template, in the order they map to COLUMNAS_REFERENCIA
+CAMPOS_PLANTILLA = [tuple(campo for _, campo, _, _ in Formatter().parse(plantilla) if campo is not None)
+                    for plantilla in PLANTILLAS_CONCEPTO]
+
+_CODIGOS = pd.Index(PLANTILLAS_CONCEPTO)
+
+def codigos_plantilla(plantillas):
+    """
+    Code of every template in an array of template strings.
+
+    Raises:
+        ValueError: If a template is not in PLANTILLAS_CONCEPTO
+    """
+    codigos = _CODIGOS.get_indexer(np.asarray(plantillas, dtype=object))
+    if (codigos < 0).any():
+        desconocida = np.asarray(plantillas, dtype=object)[codigos < 0][0]
+        raise ValueError(f"Concept template '{desconocida}' is not in PLANTILLAS_CONCEPTO")
+    return codigos.astype(np.int16)
+
+def codificar_plantilla(plantilla, lotes):
+    """
+    Encoded concept columns of a batch that uses one template.
+
+    Args:
+        plantilla: Template string, one of PLANTILLAS_CONCEPTO
+        lotes: DataFrame with the columns the template references
+
+    Returns:
+        dict: COLUMNAS_PLANTILLA -> arrays
+    """
+    codigo = int(codigos_plantilla([plantilla])[0])
+    columnas = {'Concepto_Plantilla': np.full(len(lotes), codigo, dtype=np.int16)}
+    campos = CAMPOS_PLANTILLA[codigo]
+    for i, columna in enumerate(COLUMNAS_REFERENCIA):
+        columnas[columna] = lotes[campos[i]].to_numpy(dtype=np.int64) if i < len(campos) \
+            else np.full(len(lotes), SIN_REFERENCIA, dtype=np.int64)
+    return columnas
+
+def codificar_conceptos(conceptos):
+    """
+    Encode concept strings, e.g. 'Cobro venta #12', into template columns.
+
+    Each template is matched once, as a regex, against the concepts no
+    earlier template has matched.
+
+    Args:
+        conceptos: Series of concept strings
+
+    Returns:
+        dict: COLUMNAS_PLANTILLA -> arrays
+
+    Raises:
+        ValueError: If a concept does not match any template
+    """
+    conceptos = pd.Series(conceptos).reset_index(drop=True)
+    codigo = np.full(len(conceptos), -1, dtype=np.int16)
+    referencias = np.full((len(COLUMNAS_REFERENCIA), len(conceptos)), SIN_REFERENCIA, dtype=np.int64)
+
+    pendientes = np.arange(len(conceptos))
+    for i, plantilla in enumerate(PLANTILLAS_CONCEPTO):
+        if not len(pendientes):
+            break
+        patron = ''.join(re.escape(literal) + ('' if campo is None else r'(\d+)')
+                         for literal, campo, _, _ in Formatter().parse(plantilla))
+        valores = conceptos.iloc[pendientes]
+        if CAMPOS_PLANTILLA[i]:
+            extraidos = valores.str.extract('^' + patron + '$')
+            coincide = extraidos[0].notna().to_numpy()
+            for j in range(extraidos.shape[1]):
+                referencias[j, pendientes[coincide]] = extraidos[j].to_numpy()[coincide].astype(np.int64)
+        else:
+            coincide = (valores == plantilla).to_numpy(dtype=bool)
+        codigo[pendientes[coincide]] = i
+        pendientes = pendientes[~coincide]
+
+    if len(pendientes):
+        raise ValueError(f"Concept '{conceptos.iloc[pendientes[0]]}' does not match any template in PLANTILLAS_CONCEPTO")
+
+    columnas = {'Concepto_Plantilla': codigo}
+    columnas.update(zip(COLUMNAS_REFERENCIA, referencias))
+    return columnas
+
+def formatear_concepto(plantilla, columnas):
+    """
+    Format a concept template over whole columns with vectorized string concatenation.
+
+    Args:
+        plantilla: Format string over the keys of `columnas`
+        columnas: DataFrame with the columns the template references
+
+    Returns:
+        ndarray: object array of strings
+    """
+    texto = np.full(len(columnas), '', dtype=object)
+    for literal, campo, _, _ in Formatter().parse(plantilla):
+        if literal:
+            texto = texto + literal
+        if campo is not None:
+            texto = texto + columnas[campo].astype(str).to_numpy(dtype=object)
+    return texto
+
+def materializar_conceptos(df):
+    """
+    Replace the encoded concept columns of a table with a 'Concepto' text column.
+
+    Tables without encoded columns are returned as they are.
+
+    Args:
+        df: DataFrame, possibly with COLUMNAS_PLANTILLA
+
+    Returns:
+        DataFrame: With 'Concepto' where 'Concepto_Plantilla' was
+    """
+    if 'Concepto_Plantilla' not in df:
+        return df
+    codigo = df['Concepto_Plantilla'].to_numpy()
+    referencias = [df[columna].to_numpy() for columna in COLUMNAS_REFERENCIA]
+
+    # One vectorized format per template present, over its rows only
+    texto = np.empty(len(df), dtype=object)
+    for i in np.unique(codigo):
+        filas = np.flatnonzero(codigo == i)
+        campos = pd.DataFrame({campo: referencia[filas]
+                               for campo, referencia in zip(CAMPOS_PLANTILLA[i], referencias)}, index=filas)
+        texto[filas] = formatear_concepto(PLANTILLAS_CONCEPTO[i], campos) if CAMPOS_PLANTILLA[i] \
+            else PLANTILLAS_CONCEPTO[i]
+
+    posicion = df.columns.get_loc('Concepto_Plantilla')
+    df = df.drop(columns=COLUMNAS_PLANTILLA)
+    df.insert(posicion, 'Concepto', texto)
+    return df
+
+def columnas_con_conceptos(columnas, df):
+    """Output columns of a table: `columnas`, with COLUMNAS_PLANTILLA in place of 'Concepto' if `df` is encoded."""
+    if 'Concepto_Plantilla' not in df:
+        return columnas
+    posicion = columnas.index('Concepto')
+    return columnas[:posicion] + COLUMNAS_PLANTILLA + columnas[posicion + 1:]
+
+def conceptos_de(df, plantillas):
+    """
+    Concept columns of a table in the requested representation.
+
+    Args:
+        df: DataFrame with 'Concepto' or COLUMNAS_PLANTILLA
+        plantillas: If True, return COLUMNAS_PLANTILLA; otherwise 'Concepto'
+
+    Returns:
+        dict: Column name -> array
+    """
+    if plantillas:
+        if 'Concepto_Plantilla' in df:
+            return {columna: df[columna].to_numpy() for columna in COLUMNAS_PLANTILLA}
+        return codificar_conceptos(df['Concepto'])
+    if 'Concepto' not in df:
+        df = materializar_conceptos(df[COLUMNAS_PLANTILLA])
+    return {'Concepto': df['Concepto'].to_numpy()}
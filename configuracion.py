@@ -0,0 +1,257 @@
+import importlib.util
+import os
+
+from pipeline_scheduler import ETAPAS
+from modelo_ctgan import generate_ventas_ctgan
+from sharding import (
+    generate_ventas_sharded, generate_compras_sharded, generate_movimientos_bancarios_sharded,
+    generate_libro_diario_sharded
+)
+
+# Settings of a run. A configuration is resolved from, in increasing order
+# of precedence: these defaults, a scale tier, a TOML/YAML profile and
+# explicit overrides (e.g. command-line flags).
+CONFIGURACION_POR_DEFECTO = {
+    # Execution
+    'seed': 42,
+    'workers': None,
+    'chunk_size': None,
+    'shards': 1,
+    'intermediate_dir': None,
+
+    # Output
+    'output_dir': 'generated_data',
+    'output_format': 'csv',
+    'compression': None,
+    'row_group_size': None,
+    'money': None,
+    # Store concepts as a template code plus referenced IDs, materialized
+    # as text only in CSV output
+    'concept_templates': False,
+
+    # Stage cache
+    'cache_dir': None,
+    'cache_max_bytes': None,
+    'cache_max_age': None,
+
+    # Instrumentation: run report (relative to output_dir; empty to skip)
+    # and optional profile of one stage
+    'run_report': 'run_report.json',
+    'profile_stage': None,
+    'profiler': 'cprofile',
+
+    # Check the double-entry invariants of the written dataset
+    'validate': True,
+
+    # Learned generator mode: sales sampled from a CTGAN fitted to
+    # generated seed sales (requires requirements-ml.txt); trained models
+    # are reused from ctgan_model_dir
+    'ctgan': False,
+    'ctgan_model_dir': 'ctgan_models',
+    'ctgan_training_rows': 10000,
+    'ctgan_epochs': None,
+
+    # Table sizes
+    'num_clientes': 100,
+    'num_productos': 50,
+    'num_activos': 30,
+    'num_cuentas': 5,
+    'num_ventas': 1000,
+    'num_compras': 500,
+    'num_movimientos_extra': 200,
+
+    # Simulation and general ledger periods
+    'start_date': '2020-01-01',
+    'end_date': '2023-12-31',
+    'mayor_start_date': '2020-01-01',
+    'mayor_end_date': '2022-12-31'
+}
+
+# Predefined scale tiers, named after their number of sales. Large tiers
+# stream the transactional tables in chunks and write Parquet, which needs
+# pyarrow (requirements.txt).
+ESCALAS = {
+    'small': {},
+    '1M': {
+        'num_clientes': 10000,
+        'num_productos': 5000,
+        'num_activos': 1000,
+        'num_cuentas': 20,
+        'num_ventas': 1000000,
+        'num_compras': 500000,
+        'num_movimientos_extra': 200000,
+        'shards': 4,
+        'output_format': 'parquet'
+    },
+    '100M': {
+        'num_clientes': 10000000,
+        'num_productos': 1000000,
+        'num_activos': 100000,
+        'num_cuentas': 200,
+        'num_ventas': 100000000,
+        'num_compras': 50000000,
+        'num_movimientos_extra': 20000000,
+        'chunk_size': 1000000,
+        'output_format': 'parquet',
+        'concept_templates': True
+    }
+}
+
+# Stage parameters taken from the configuration: stage -> {parameter: key}
+PARAMETROS_ETAPAS = {
+    'clientes': {'num_clientes': 'num_clientes'},
+    'productos': {'num_productos': 'num_productos'},
+    'activos': {'num_activos': 'num_activos'},
+    'cuentas_bancarias': {'num_cuentas': 'num_cuentas'},
+    'ventas': {'num_ventas': 'num_ventas', 'start_date': 'start_date', 'end_date': 'end_date'},
+    'compras': {'num_compras': 'num_compras', 'start_date': 'start_date', 'end_date': 'end_date'},
+    'movimientos_bancarios': {'num_movimientos_extra': 'num_movimientos_extra',
+                              'start_date': 'start_date', 'end_date': 'end_date',
+                              'concept_templates': 'concept_templates'},
+    'libro_diario': {'concept_templates': 'concept_templates'},
+    'libro_mayor': {'start_date': 'mayor_start_date', 'end_date': 'mayor_end_date'}
+}
+
+# Sharded generator of every shardable stage, used when shards > 1
+FUNCIONES_SHARDED = {
+    'ventas': generate_ventas_sharded,
+    'compras': generate_compras_sharded,
+    'movimientos_bancarios': generate_movimientos_bancarios_sharded,
+    'libro_diario': generate_libro_diario_sharded
+}
+
+# Learned generator of every stage that supports it, used when ctgan is set
+FUNCIONES_CTGAN = {
+    'ventas': generate_ventas_ctgan
+}
+
+# Sharded generators that take almacen_columnar references as inputs
+ETAPAS_COLUMNARES = {'libro_diario'}
+
+# Output formats written with pyarrow
+FORMATOS_ARROW = {'parquet', 'feather'}
+
+def cargar_configuracion(ruta=None, escala=None, **cambios):
+    """
+    Resolve the configuration of a run.
+
+    Args:
+        ruta: Optional TOML (.toml) or YAML (.yaml/.yml) profile with any
+            keys of CONFIGURACION_POR_DEFECTO, plus an optional 'scale'
+        escala: Optional scale tier, a key of ESCALAS; overrides the
+            profile's 'scale'
+        **cambios: Settings overriding everything else; None values are
+            ignored
+
+    Returns:
+        dict: Complete configuration
+
+    Raises:
+        ImportError: If the output format needs pyarrow, or ctgan needs
+            ctgan and torch, and they are not installed
+    """
+    perfil = leer_perfil(ruta) if ruta is not None else {}
+    escala = escala or perfil.pop('scale', None) or 'small'
+    if escala not in ESCALAS:
+        raise ValueError(f"Unknown scale '{escala}'; expected one of {list(ESCALAS)}")
+
+    configuracion = dict(CONFIGURACION_POR_DEFECTO)
+    configuracion.update(ESCALAS[escala])
+    configuracion.update(perfil)
+    configuracion.update({clave: valor for clave, valor in cambios.items() if valor is not None})
+
+    desconocidas = set(configuracion) - set(CONFIGURACION_POR_DEFECTO)
+    if desconocidas:
+        raise ValueError(f"Unknown configuration keys: {sorted(desconocidas)}")
+
+    # Fail before any stage runs rather than when the first table is written;
+    # find_spec does not import the packages, so startup stays fast
+    formato = configuracion['output_format']
+    if formato in FORMATOS_ARROW and importlib.util.find_spec('pyarrow') is None:
+        raise ImportError(f"pyarrow is required for the {formato} output format "
+                          f"(pip install -r requirements.txt, or set output_format='csv')")
+    if configuracion['ctgan']:
+        faltantes = [paquete for paquete in ('ctgan', 'torch') if importlib.util.find_spec(paquete) is None]
+        if faltantes:
+            raise ImportError(f"The CTGAN generator mode requires ctgan and torch; missing: {', '.join(faltantes)} "
+                              f"(pip install -r requirements-ml.txt, or set ctgan=false)")
+    return configuracion
+
+def workers_muestreo(workers):
+    """
+    Sampling processes of a CTGAN stage running in a pipeline with `workers`.
+
+    The stage runs inside one of the pipeline's worker processes, so its
+    sampling pool only gets the CPUs the pipeline pool leaves free: one
+    process with the default workers (the CPU count), every CPU with
+    workers=1, when the stages run in the main process.
+    """
+    cpus = os.cpu_count() or 1
+    return max(1, cpus // (workers or cpus))
+
+def leer_perfil(ruta):
+    """
+    Read a TOML or YAML profile into a flat dict.
+
+    Tables/mappings are only for grouping ([output], [counts], ...): their
+    keys are merged into the top level.
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.toml':
+        import tomllib
+        with open(ruta, 'rb') as archivo:
+            perfil = tomllib.load(archivo)
+    elif extension in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError as e:
+            raise ImportError("PyYAML is required for YAML profiles (pip install pyyaml)") from e
+        with open(ruta, encoding='utf-8') as archivo:
+            perfil = yaml.safe_load(archivo) or {}
+    else:
+        raise ValueError(f"Unsupported profile format '{extension}'; expected .toml, .yaml or .yml")
+
+    plano = {}
+    for clave, valor in perfil.items():
+        if isinstance(valor, dict):
+            plano.update(valor)
+        else:
+            plano[clave] = valor
+    return plano
+
+def etapas_configuradas(configuracion, etapas=None):
+    """
+    Pipeline stages with the sizes and periods of a configuration.
+
+    With shards > 1 the shardable stages run their sharded generator; with
+    ctgan the stages in FUNCIONES_CTGAN run their learned generator instead.
+
+    Args:
+        configuracion: Configuration from cargar_configuracion
+        etapas: Stage definitions (defaults to pipeline_scheduler.ETAPAS)
+
+    Returns:
+        dict: New stage definitions; `etapas` is not modified
+    """
+    if etapas is None:
+        etapas = ETAPAS
+
+    configuradas = {}
+    for nombre, etapa in etapas.items():
+        etapa = dict(etapa, parametros=dict(etapa['parametros']))
+        for parametro, clave in PARAMETROS_ETAPAS.get(nombre, {}).items():
+            etapa['parametros'][parametro] = configuracion[clave]
+        if configuracion['ctgan'] and nombre in FUNCIONES_CTGAN:
+            etapa['funcion'] = FUNCIONES_CTGAN[nombre]
+            etapa['parametros'].pop('vectorized', None)
+            etapa['parametros'].update(filas_entrenamiento=configuracion['ctgan_training_rows'],
+                                       epochs=configuracion['ctgan_epochs'],
+                                       directorio_modelos=configuracion['ctgan_model_dir'],
+                                       workers=workers_muestreo(configuracion['workers']))
+        elif configuracion['shards'] > 1 and nombre in FUNCIONES_SHARDED:
+            etapa['funcion'] = FUNCIONES_SHARDED[nombre]
+            etapa['parametros']['num_shards'] = configuracion['shards']
+            etapa['parametros']['workers'] = configuracion['workers']
+            etapa['columnar'] = nombre in ETAPAS_COLUMNARES
+        configuradas[nombre] = etapa
+    return configuradas
@@ -0,0 +1,150 @@
+import numpy as np
+
+from pipeline_scheduler import dependencias, ejecutar_pipeline, semilla_etapa
+from ventas_generator import iter_ventas
+from compras_generator import iter_compras
+from cache import CacheEtapas
+from configuracion import cargar_configuracion, etapas_configuradas
+
+# On-demand access to the tables of a configuration. Every stage draws from
+# its own seed (pipeline_scheduler.semilla_etapa), so a table generated on
+# its own, with only its upstream stages, is identical to the same table in
+# a full generate_datasets run with the same configuration.
+
+# Tables that can be generated chunk by chunk: the chunked generator and the
+# stage parameter with the number of rows
+GENERADORES_POR_CHUNKS = {
+    'ventas': (iter_ventas, 'num_ventas'),
+    'compras': (iter_compras, 'num_compras')
+}
+
+class Dataset:
+    """
+    Lazily generated dataset: each table is generated, or loaded from the
+    stage cache, the first time it is accessed.
+
+    Accessing a table runs only the stages it depends on that have not run
+    yet (e.g. dataset['ventas'] runs clientes, productos and ventas, but not
+    activos) and keeps every resolved table in memory for later accesses.
+    Nothing is written to output_dir; the tables are the batch pipeline's
+    (chunk_size does not switch to streaming generation here). For bounded
+    memory, use iter_chunks.
+
+    Args:
+        config: Optional configuration from configuracion.cargar_configuracion
+            (defaults to the 'small' scale)
+        **opciones: Settings overriding the configuration, as in
+            dataset_generator.generate_datasets
+    """
+
+    def __init__(self, config=None, **opciones):
+        config = dict(config if config is not None else cargar_configuracion())
+        config.update({clave: valor for clave, valor in opciones.items() if valor is not None})
+        self.config = config
+        self.etapas = etapas_configuradas(config)
+        self.cache = None
+        if config['cache_dir'] is not None:
+            self.cache = CacheEtapas(config['cache_dir'], max_bytes=config['cache_max_bytes'],
+                                     max_edad=config['cache_max_age'])
+        self._tablas = {}
+
+    @property
+    def nombres(self):
+        """Names of every table of the dataset."""
+        return list(self.etapas)
+
+    @property
+    def resueltas(self):
+        """Names of the tables generated or loaded so far."""
+        return list(self._tablas)
+
+    def __getitem__(self, nombre):
+        return self.cargar(nombre)[nombre]
+
+    def __contains__(self, nombre):
+        return nombre in self.etapas
+
+    def cargar(self, *nombres):
+        """
+        Resolve several tables at once, so that their missing upstream
+        stages run together (concurrently, with workers > 1).
+
+        Args:
+            *nombres: Table names
+
+        Returns:
+            dict: DataFrames by table name
+        """
+        necesarias = dependencias(self.etapas, nombres)
+        if any(nombre not in self._tablas for nombre in necesarias):
+            previas = {nombre: self._tablas[nombre] for nombre in necesarias if nombre in self._tablas}
+            self._tablas.update(ejecutar_pipeline(
+                {nombre: self.etapas[nombre] for nombre in necesarias}, seed=self.config['seed'],
+                workers=self.config['workers'], cache=self.cache, intermedios=self.config['intermediate_dir'],
+                previas=previas))
+        return {nombre: self._tablas[nombre] for nombre in nombres}
+
+    def iter_chunks(self, nombre, chunk_size=None):
+        """
+        Generate a table chunk by chunk, never holding it whole in memory.
+
+        Only the tables in GENERADORES_POR_CHUNKS can be streamed; only their
+        (small) master inputs are resolved. Rows come from the chunked
+        generator in date order (see calendario), as in streaming mode, so
+        they follow the same distributions as dataset[nombre] but are a
+        different draw. The draw is seeded from the run seed and the table
+        name and does not touch the caller's NumPy random state.
+
+        Args:
+            nombre: Table name, a key of GENERADORES_POR_CHUNKS
+            chunk_size: Number of rows per chunk (defaults to the configured
+                chunk_size, or 100000)
+
+        Raises:
+            ValueError: If the table cannot be generated in chunks (see slices)
+        """
+        if nombre not in GENERADORES_POR_CHUNKS:
+            raise ValueError(f"Table '{nombre}' cannot be generated in chunks; expected one of "
+                             f"{list(GENERADORES_POR_CHUNKS)} (use slices for other tables)")
+        generador, clave_filas = GENERADORES_POR_CHUNKS[nombre]
+        etapa = self.etapas[nombre]
+        entradas = self.cargar(*etapa['entradas'])
+        parametros = etapa['parametros']
+        chunks = generador(*(entradas[entrada] for entrada in etapa['entradas']), parametros[clave_filas],
+                           chunk_size or self.config['chunk_size'] or 100000,
+                           start_date=parametros['start_date'], end_date=parametros['end_date'], ordered=True)
+
+        # The generator draws from the global NumPy state: swap in its own
+        # state around every chunk, so the caller can use np.random freely
+        np.random.seed(semilla_etapa(self.config['seed'], nombre))
+        propio = np.random.get_state()
+        while True:
+            ajeno = np.random.get_state()
+            np.random.set_state(propio)
+            try:
+                chunk = next(chunks, None)
+            finally:
+                propio = np.random.get_state()
+                np.random.set_state(ajeno)
+            if chunk is None:
+                return
+            yield chunk
+
+    def slices(self, nombre, chunk_size=None):
+        """
+        Yield a resolved table in consecutive slices of rows.
+
+        The slices concatenate to exactly dataset[nombre], but the whole
+        table is generated and kept in memory first: this does not limit
+        memory (see iter_chunks).
+
+        Args:
+            nombre: Table name
+            chunk_size: Number of rows per slice (defaults to the configured
+                chunk_size, or 100000)
+        """
+        if chunk_size is None:
+            chunk_size = self.config['chunk_size'] or 100000
+        df = self[nombre]
+        for inicio in range(0, len(df), chunk_size):
+            yield df.iloc[inicio:inicio + chunk_size]
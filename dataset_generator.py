@@ -1,84 +1,174 @@
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
 import os
-import random
-
-# Set random seeds for reproducibility
-np.random.seed(42)
-random.seed(42)
-
-# Define constants
-START_DATE = '2020-01-01'  # Start of 4-year simulation
-END_DATE = '2023-12-31'    # End of 4-year simulation
-OUTPUT_DIR = 'generated_data'
-
-# Create output directory if it doesn't exist
-if not os.path.exists(OUTPUT_DIR):
-    os.makedirs(OUTPUT_DIR)
-
-# Helper functions
-def generate_dates(start_date, end_date):
-    """Generate a list of dates between start_date and end_date"""
-    start = datetime.strptime(start_date, '%Y-%m-%d')
-    end = datetime.strptime(end_date, '%Y-%m-%d')
-    date_list = [start + timedelta(days=x) for x in range((end - start).days + 1)]
-    return [date.strftime('%Y-%m-%d') for date in date_list]
-
-def save_to_csv(df, filename):
-    """Save DataFrame to CSV with UTF-8 encoding"""
-    filepath = os.path.join(OUTPUT_DIR, filename)
-    df.to_csv(filepath, index=False, encoding='utf-8')
-    print(f"Saved {filename} with {len(df)} records")
+import argparse
 
 # Main function to generate all datasets
-def generate_datasets():
-    # Generate each dataset
-    plan_cuentas_df = generate_plan_cuentas()
-    save_to_csv(plan_cuentas_df, 'plan_cuentas.csv')
+def generate_datasets(config=None, **opciones):
+    """
+    Generate every table and save it as soon as it is ready.
     
-    clientes_df = generate_clientes()
-    save_to_csv(clientes_df, 'clientes.csv')
+    Stages run on a process pool following the dependencies declared in
+    pipeline_scheduler.ETAPAS; each stage is seeded from `seed` and its own
+    name, so the output does not depend on `workers`.
     
-    productos_df = generate_productos()
-    save_to_csv(productos_df, 'productos.csv')
+    Args:
+        config: Optional configuration from configuracion.cargar_configuracion
+            (defaults to the 'small' scale)
+        **opciones: Settings overriding the configuration; any key of
+            configuracion.CONFIGURACION_POR_DEFECTO, e.g.
+            seed: Seed of the whole run
+            workers: Number of worker processes (defaults to the CPU count)
+            chunk_size: If set, stream the transactional tables to disk in
+                chunks of this many rows instead of building them in memory
+            shards: Number of shards of the ventas, compras,
+                movimientos_bancarios and libro_diario stages
+            intermediate_dir: If set, hand tables between stages through
+                memory-mapped columnar files in this directory instead of
+                pickling DataFrames between processes
+            output_format: 'csv', 'parquet' or 'feather'
+            cache_dir: If set, reuse stage outputs cached in this directory
+                when their parameters, seed, code and inputs are unchanged
+                (not used in streaming mode)
+            run_report: JSON file (in output_dir) the per-stage wall time,
+                CPU time, rows, bytes written and peak memory are saved to
+            profile_stage: If set, profile this stage with `profiler`
+                ('cprofile' or 'pyinstrument') into output_dir
+            validate: If True, check the written journal and ledger with
+                validacion.validar_dataset and print the offending IDs
+            ctgan: If True, sample ventas from a CTGAN fitted to generated
+                seed sales, reusing trained models from ctgan_model_dir
+                (requires requirements-ml.txt; not used in streaming mode)
+            num_ventas, start_date, ...: Table sizes and periods
     
-    activos_df = generate_activos()
-    save_to_csv(activos_df, 'activos.csv')
+    Returns:
+        validacion.ValidadorContable with the check results, or None if
+        validate is False
+    """
+    config = dict(config if config is not None else cargar_configuracion())
+    config.update({clave: valor for clave, valor in opciones.items() if valor is not None})
     
-    cuentas_bancarias_df = generate_cuentas_bancarias()
-    save_to_csv(cuentas_bancarias_df, 'cuentas_bancarias.csv')
+    output_dir = config['output_dir']
+    os.makedirs(output_dir, exist_ok=True)
+    backend = crear_backend(config['output_format'], output_dir, compression=config['compression'],
+                            row_group_size=config['row_group_size'], money=config['money'])
+    etapas = etapas_configuradas(config)
+    instrumentacion = Instrumentacion(config['profile_stage'], config['profiler'], output_dir)
     
-    # Generate time-dependent datasets
-    ventas_df = generate_ventas(clientes_df, productos_df)
-    save_to_csv(ventas_df, 'ventas.csv')
+    # A regenerated dataset starts a new incremental history
+    borrar_estado(output_dir)
     
-    compras_df = generate_compras(productos_df)
-    save_to_csv(compras_df, 'compras.csv')
+    if config['chunk_size'] is not None:
+        generate_datasets_streaming(
+            backend, chunk_size=config['chunk_size'], seed=config['seed'], workers=config['workers'],
+            num_ventas=config['num_ventas'], num_compras=config['num_compras'],
+            num_movimientos_extra=config['num_movimientos_extra'],
+            start_date=config['start_date'], end_date=config['end_date'],
+            mayor_start_date=config['mayor_start_date'], mayor_end_date=config['mayor_end_date'],
+            etapas=etapas, instrumentacion=instrumentacion, concept_templates=config['concept_templates']
+        )
+    else:
+        cache = None
+        if config['cache_dir'] is not None:
+            cache = CacheEtapas(config['cache_dir'], max_bytes=config['cache_max_bytes'],
+                                max_edad=config['cache_max_age'])
+        ejecutar_pipeline(etapas, seed=config['seed'], workers=config['workers'],
+                          al_completar=instrumentacion.escritura(backend), cache=cache,
+                          instrumentacion=instrumentacion, intermedios=config['intermediate_dir'])
     
-    movimientos_bancarios_df = generate_movimientos_bancarios(cuentas_bancarias_df, ventas_df, compras_df)
-    save_to_csv(movimientos_bancarios_df, 'movimientos_bancarios.csv')
+    validador = None
+    if config['validate']:
+        with instrumentacion.medir('validacion', origen='check'):
+            validador = validar_dataset(backend, chunk_size=config['chunk_size'] or 1000000)
+        instrumentacion.registrar('validacion', filas=validador.lineas, errores=dict(validador.conteos))
+        print(validador.resumen())
     
-    libro_diario_df = generate_libro_diario(plan_cuentas_df, ventas_df, compras_df, movimientos_bancarios_df, productos_df)
-    save_to_csv(libro_diario_df, 'libro_diario.csv')
+    print(instrumentacion.resumen())
+    if config['run_report']:
+        instrumentacion.guardar(os.path.join(output_dir, config['run_report']))
+    print("Dataset generation complete!")
+    return validador
+
+def extend_datasets(start_date, end_date, num_ventas=100, num_compras=50, num_movimientos_extra=20,
+                    config=None, **opciones):
+    """
+    Append the transactions of a new period to an existing dataset.
     
-    libro_mayor_df = generate_libro_mayor(plan_cuentas_df, libro_diario_df)
-    save_to_csv(libro_mayor_df, 'libro_mayor.csv')
+    Continues the ID sequences and RNG state of the existing tables and
+    rolls the general ledger forward; see incremental.extender_datasets.
     
-    print("Dataset generation complete!")
+    Args:
+        start_date: First day of the new period ('YYYY-MM-DD')
+        end_date: Last day of the new period ('YYYY-MM-DD')
+        num_ventas: Number of sales transactions in the new period
+        num_compras: Number of purchase transactions in the new period
+        num_movimientos_extra: Number of other bank movements in the new period
+        config: Optional configuration from configuracion.cargar_configuracion;
+            its output settings locate the dataset and its seed is used if
+            the dataset has never been extended. The new rows keep the
+            stored concept encoding; concept_templates=True on a dataset
+            with text concepts raises ValueError
+        **opciones: Settings overriding the configuration
+    """
+    config = dict(config if config is not None else cargar_configuracion())
+    config.update({clave: valor for clave, valor in opciones.items() if valor is not None})
+    
+    backend = crear_backend(config['output_format'], config['output_dir'], compression=config['compression'],
+                            row_group_size=config['row_group_size'], money=config['money'])
+    # concept_templates defaults to False, which is not a request for text
+    # concepts: only an explicit True is checked against the stored tables
+    extender_datasets(backend, start_date, end_date, num_ventas=num_ventas, num_compras=num_compras,
+                      num_movimientos_extra=num_movimientos_extra, seed=config['seed'],
+                      concept_templates=config['concept_templates'] or None)
+    print("Dataset extension complete!")
+
+def parse_args(argv=None):
+    """Command-line interface: a profile and/or scale tier, plus per-setting overrides."""
+    parser = argparse.ArgumentParser(description="Generate the synthetic accounting datasets.")
+    parser.add_argument('--config', help="TOML or YAML run profile")
+    parser.add_argument('--scale', choices=list(ESCALAS), help="Predefined scale tier")
+    parser.add_argument('--extend', nargs=2, metavar=('START_DATE', 'END_DATE'),
+                        help="Append a new period to the existing dataset instead of regenerating it")
+    
+    # One flag per configuration key, e.g. --num-ventas or --output-format
+    for clave, defecto in CONFIGURACION_POR_DEFECTO.items():
+        tipo = str if defecto is None or isinstance(defecto, str) else type(defecto)
+        if clave in ('workers', 'chunk_size', 'row_group_size', 'cache_max_bytes', 'cache_max_age', 'ctgan_epochs'):
+            tipo = int
+        elif isinstance(defecto, bool):
+            tipo = _booleano
+        parser.add_argument('--' + clave.replace('_', '-'), dest=clave, type=tipo, default=None)
+    
+    return parser.parse_args(argv)
+
+def _booleano(texto):
+    """Parse a boolean flag value such as 'true', 'no' or '1'."""
+    if texto.lower() in ('1', 'true', 'yes', 'on'):
+        return True
+    if texto.lower() in ('0', 'false', 'no', 'off'):
+        return False
+    raise argparse.ArgumentTypeError(f"expected a boolean, got '{texto}'")
 
-# Import individual dataset generation functions
-from plan_cuentas_generator import generate_plan_cuentas
-from clientes_generator import generate_clientes
-from productos_generator import generate_productos
-from activos_generator import generate_activos
-from cuentas_bancarias_generator import generate_cuentas_bancarias
-from ventas_generator import generate_ventas
-from compras_generator import generate_compras
-from movimientos_bancarios_generator import generate_movimientos_bancarios
-from libro_diario_generator import generate_libro_diario
-from libro_mayor_generator import generate_libro_mayor
+# Every stage and its seed come from pipeline_scheduler.ETAPAS (see
+# configuracion.etapas_configuradas and pipeline_scheduler.semilla_etapa)
+from pipeline_scheduler import ejecutar_pipeline
+from streaming import generate_datasets_streaming
+from output_backends import crear_backend
+from cache import CacheEtapas
+from instrumentacion import Instrumentacion
+from validacion import validar_dataset
+from incremental import extender_datasets, borrar_estado
+from configuracion import CONFIGURACION_POR_DEFECTO, ESCALAS, cargar_configuracion, etapas_configuradas
 
 # Run the generator
 if __name__ == "__main__":
-    generate_datasets()
\ No newline at end of file
+    args = parse_args()
+    cambios = {clave: getattr(args, clave) for clave in CONFIGURACION_POR_DEFECTO}
+    config = cargar_configuracion(args.config, escala=args.scale, **cambios)
+    if args.extend:
+        # Explicit sizes apply to the new period
+        tamanos = {clave: getattr(args, clave) for clave in ('num_ventas', 'num_compras', 'num_movimientos_extra')
+                   if getattr(args, clave) is not None}
+        extend_datasets(*args.extend, config=config, **tamanos)
+    else:
+        validador = generate_datasets(config)
+        if validador is not None and not validador.es_valido():
+            raise SystemExit(1)
\ No newline at end of file
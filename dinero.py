@@ -0,0 +1,69 @@
+import numpy as np
+
+# Money is carried internally as int64 cents: amounts are rounded once when
+# they enter a computation and turned back into decimal amounts only when a
+# table is returned. Sums of cents are exact, so every journal entry
+# balances to the cent and ledger balances do not drift.
+
+def a_centavos(valores):
+    """
+    Convert amounts to int64 cents, rounding half away from zero in one vectorized pass.
+
+    Args:
+        valores: Scalar or array of amounts in currency units
+
+    Returns:
+        ndarray: int64 cents
+    """
+    return _redondear_entero(np.asarray(valores, dtype=np.float64) * 100)
+
+def a_moneda(centavos):
+    """
+    Convert int64 cents back to amounts in currency units.
+
+    The result is the float closest to each 2-decimal amount, so it prints
+    and serializes without rounding noise.
+
+    Args:
+        centavos: Scalar or array of cents
+
+    Returns:
+        ndarray: float64 amounts
+    """
+    return np.asarray(centavos, dtype=np.int64) / 100
+
+def porcentaje_centavos(centavos, tasa):
+    """
+    Apply a rate to amounts in cents, rounding half cents away from zero.
+
+    Args:
+        centavos: Array of cents
+        tasa: Rate to apply (e.g. 0.16 for IVA)
+
+    Returns:
+        ndarray: int64 cents
+    """
+    return _redondear_entero(np.asarray(centavos, dtype=np.int64) * tasa)
+
+def sumar_centavos(grupos, centavos, minlength=0):
+    """
+    Exact per-group sums of cents.
+
+    Uses a weighted bincount, which sums in float64 and is therefore exact
+    while every partial sum stays below 2**53 cents (about 9e13 in currency
+    units).
+
+    Args:
+        grupos: Non-negative integer group of every value
+        centavos: Array of cents
+        minlength: Minimum number of groups in the result
+
+    Returns:
+        ndarray: int64 cents per group
+    """
+    return np.rint(np.bincount(grupos, weights=np.asarray(centavos, dtype=np.float64),
+                               minlength=minlength)).astype(np.int64)
+
+def _redondear_entero(valores):
+    """Round to the nearest integer, halves away from zero, as int64."""
+    return (np.sign(valores) * np.floor(np.abs(valores) + 0.5)).astype(np.int64)
@@ -1,8 +1,9 @@
 import pandas as pd
 import numpy as np
-from ctgan import CTGAN
 import datetime
 
+from depreciacion import tabla_patrimonio
+
 # Configuración de semilla para reproducibilidad
 np.random.seed(42)
 
@@ -43,19 +44,31 @@ def calculate_depreciation(valor_inicial, fecha_adquisicion, fecha_actual, vida_
     deprec_anual = valor_inicial / vida_util_anos
     return round(deprec_anual * anos_deprec, 2)
 
-def generate_patrimonio_data(activos_df):
-    """Genera datos sintéticos para la tabla Patrimonio"""
-    registros = []
+# Rangos de valores iniciales según tipo de activo (en moneda local)
+RANGOS_VALOR = {
+    'Maquinaria': (50000, 200000),
+    'Vehiculos': (25000, 80000),
+    'Equipos_Informaticos': (1000, 5000),
+    'Mobiliario': (500, 3000)
+}
+
+ANOS_FISCALES = [2022, 2023, 2024]
+
+def generate_patrimonio_data(activos_df, vectorized=False, metodo='linea_recta'):
+    """
+    Genera datos sintéticos para la tabla Patrimonio
     
-    # Rangos de valores iniciales según tipo de activo (en moneda local)
-    rangos_valor = {
-        'Maquinaria': (50000, 200000),
-        'Vehiculos': (25000, 80000),
-        'Equipos_Informaticos': (1000, 5000),
-        'Mobiliario': (500, 3000)
-    }
+    Con vectorized=True los valores iniciales se sortean como un arreglo y
+    la depreciación de todos los activos y años sale del motor compartido
+    en depreciacion (mismas columnas y distribuciones, distinta secuencia
+    aleatoria); metodo elige 'linea_recta' o 'saldo_decreciente'.
+    """
+    if vectorized:
+        return _generate_patrimonio_data_vectorized(activos_df, metodo)
     
-    anos_fiscales = [2022, 2023, 2024]
+    registros = []
+    rangos_valor = RANGOS_VALOR
+    anos_fiscales = ANOS_FISCALES
     
     for _, activo in activos_df.iterrows():
         # Generar valor inicial realista según tipo de activo
@@ -86,6 +99,22 @@ def generate_patrimonio_data(activos_df):
     
     return pd.DataFrame(registros)
 
+def _generate_patrimonio_data_vectorized(activos_df, metodo):
+    """Versión vectorizada de generate_patrimonio_data"""
+    codigos, tipos = pd.factorize(activos_df['tipo_activo'])
+    valor_min = np.array([RANGOS_VALOR[tipo][0] for tipo in tipos], dtype=float)[codigos]
+    valor_max = np.array([RANGOS_VALOR[tipo][1] for tipo in tipos], dtype=float)[codigos]
+    valor_inicial = np.random.uniform(valor_min, valor_max)
+    
+    return tabla_patrimonio(
+        activos_df['id_activo'].to_numpy(),
+        valor_inicial,
+        activos_df['fecha_adquisicion'].to_numpy(),
+        activos_df['vida_util_anos'].to_numpy(),
+        ANOS_FISCALES,
+        metodo=metodo
+    )
+
 def validate_patrimonio_data(df):
     """Realiza validaciones sobre los datos generados"""
     validations = {
@@ -124,7 +153,7 @@ def main():
     activos = generate_activos_base()
     
     # Generar datos de patrimonio
-    patrimonio = generate_patrimonio_data(activos)
+    patrimonio = generate_patrimonio_data(activos, vectorized=True)
     
     # Validar datos
     validations = validate_patrimonio_data(patrimonio)
@@ -0,0 +1,242 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from pipeline_scheduler import semilla_etapa
+from ventas_generator import generate_ventas
+from compras_generator import generate_compras
+from movimientos_bancarios_generator import generate_movimientos_bancarios
+from libro_diario_generator import (
+    COLUMNAS_LIBRO_DIARIO, postear_ventas, postear_gastos_mensuales, postear_compras,
+    postear_movimientos, ventas_mensuales
+)
+from libro_mayor_generator import acumular_movimientos_mensuales, construir_libro_mayor
+from plan_cuentas_generator import PlanCuentas
+from conceptos import columnas_con_conceptos
+
+# State of an incrementally extended dataset, kept next to its tables: the
+# last day covered by the transactions and by the general ledger, the next
+# free ID of every sequence, the sales of months whose expenses are not
+# posted yet, the concept encoding and the RNG state to continue from
+ARCHIVO_ESTADO = 'estado_incremental.json'
+
+# ID column and date column of every table whose sequence is continued
+SECUENCIAS = {
+    'ventas': ('ID_Venta', 'Fecha'),
+    'compras': ('ID_Compra', 'Fecha_Compra'),
+    'movimientos_bancarios': ('ID_Movimiento', 'Fecha'),
+    'libro_diario': ('ID_Asiento', 'Fecha_Transaccion')
+}
+
+def extender_datasets(backend, start_date, end_date, num_ventas=100, num_compras=50,
+                      num_movimientos_extra=20, seed=42, concept_templates=None):
+    """
+    Extend an existing dataset with the transactions of a new period.
+
+    Only the new period is generated: its sales, purchases, bank movements
+    and journal lines are appended to the existing tables with their ID
+    sequences continued, and the general ledger is rolled forward from
+    the last Saldo_Final of every account. Monthly expenses and the ledger
+    cover complete months only: the sales of a trailing partial month are
+    kept in ARCHIVO_ESTADO, and its expenses and ledger rows are added by
+    the next extension.
+
+    The first extension of a dataset scans the existing tables for the
+    last IDs and dates (and posts to the ledger any journal lines past its
+    last month); later ones read them from ARCHIVO_ESTADO.
+
+    Args:
+        backend: Output backend of the dataset, from output_backends.crear_backend
+        start_date: First day of the new period ('YYYY-MM-DD'); must be after
+            every date already in the dataset
+        end_date: Last day of the new period ('YYYY-MM-DD')
+        num_ventas: Number of sales transactions in the new period
+        num_compras: Number of purchase transactions in the new period
+        num_movimientos_extra: Number of bank movements not tied to sales or purchases
+        seed: Seed used when the dataset has no saved RNG state yet
+        concept_templates: Optional concept encoding requested for the new
+            rows (see libro_diario_generator.generate_libro_diario). The
+            new rows always use the encoding of the stored tables; None
+            accepts it, and a conflicting value raises ValueError
+
+    Raises:
+        ValueError: If the period overlaps the dataset, or the requested
+            concept encoding differs from the stored one
+    """
+    ruta_estado = os.path.join(backend.output_dir, ARCHIVO_ESTADO)
+    estado = cargar_estado(ruta_estado)
+    if estado is None:
+        estado = estado_inicial(backend, seed)
+    if 'concept_templates' not in estado:
+        # State saved before the encoding was recorded
+        estado['concept_templates'] = conceptos_codificados(backend)
+    # CSV tables store concepts as text whatever the encoding in memory
+    if concept_templates is not None and backend.conceptos_codificados \
+            and bool(concept_templates) != estado['concept_templates']:
+        raise ValueError(f"The dataset stores {'encoded' if estado['concept_templates'] else 'text'} concepts; "
+                         f"extend it with concept_templates={estado['concept_templates']}")
+    concept_templates = estado['concept_templates']
+
+    if start_date <= max(estado['fin'], estado['mayor_fin']):
+        raise ValueError(f"The new period must start after {max(estado['fin'], estado['mayor_fin'])}, "
+                         f"the last date already in the dataset")
+    if end_date < start_date:
+        raise ValueError(f"end_date {end_date} is before start_date {start_date}")
+
+    np.random.set_state(_decodificar_rng(estado['rng']))
+
+    plan_cuentas_df = backend.read('plan_cuentas')
+    productos_df = backend.read('productos')
+    cuentas = PlanCuentas(plan_cuentas_df)
+    siguiente = estado['siguiente']
+
+    # Transactions of the new period, numbered after the existing ones
+    ventas_df = generate_ventas(backend.read('clientes'), productos_df, num_ventas, vectorized=True,
+                                start_date=start_date, end_date=end_date)
+    ventas_df['ID_Venta'] += siguiente['ID_Venta'] - 1
+    compras_df = generate_compras(productos_df, num_compras, vectorized=True,
+                                  start_date=start_date, end_date=end_date)
+    compras_df['ID_Compra'] += siguiente['ID_Compra'] - 1
+    movimientos_df = generate_movimientos_bancarios(backend.read('cuentas_bancarias'), ventas_df, compras_df,
+                                                    num_movimientos_extra, vectorized=True,
+                                                    start_date=start_date, end_date=end_date,
+                                                    concept_templates=concept_templates)
+    movimientos_df['ID_Movimiento'] += siguiente['ID_Movimiento'] - 1
+
+    # Monthly sales: the pending months of earlier extensions plus the new
+    # period. Expenses are posted only for the months complete by end_date,
+    # so a month split across extensions gets one pair of expense entries
+    fin = end_date
+    mayor_fin = _ultimo_fin_de_mes(fin)
+    mensuales = pd.concat([pd.DataFrame(estado.get('ventas_pendientes', []), columns=['Fecha', 'Total_Venta']),
+                           ventas_mensuales(ventas_df)], ignore_index=True)
+    mensuales = mensuales.groupby('Fecha', as_index=False, sort=True)['Total_Venta'].sum()
+    completo = mensuales['Fecha'].to_numpy() <= mayor_fin
+    pendientes = mensuales[~completo]
+
+    # Journal lines of the new period
+    bloques = []
+    asiento_id = siguiente['ID_Asiento']
+    bloque, asiento_id = postear_ventas(ventas_df, productos_df, cuentas, asiento_id, concept_templates)
+    bloques.append(bloque)
+    bloque, asiento_id = postear_gastos_mensuales(mensuales[completo].reset_index(drop=True), cuentas,
+                                                  asiento_id, concept_templates)
+    bloques.append(bloque)
+    bloque, asiento_id = postear_compras(compras_df, cuentas, asiento_id, concept_templates)
+    bloques.append(bloque)
+    bloque, asiento_id = postear_movimientos(movimientos_df, cuentas, asiento_id, concept_templates)
+    bloques.append(bloque)
+    libro_diario_df = pd.concat(bloques, ignore_index=True)
+    libro_diario_df = libro_diario_df.sort_values(['Fecha_Transaccion', 'ID_Asiento'], kind='stable')
+    libro_diario_df = libro_diario_df[columnas_con_conceptos(COLUMNAS_LIBRO_DIARIO, libro_diario_df)] \
+        .reset_index(drop=True)
+
+    # Roll the ledger forward over the complete months after its last one
+    mayor_inicio = (pd.Period(estado['mayor_fin'], freq='M') + 1).start_time.strftime('%Y-%m-%d')
+    libro_mayor_df = None
+    if mayor_fin >= mayor_inicio:
+        totales = acumular_movimientos_mensuales(cuentas, libro_diario_df, mayor_inicio, mayor_fin)
+        if estado['fin'] > estado['mayor_fin']:
+            # Existing journal lines the ledger did not cover yet
+            diario_previo = backend.read('libro_diario', ['Fecha_Transaccion', 'ID_Cuenta', 'Debito', 'Credito'])
+            diario_previo = diario_previo[diario_previo['Fecha_Transaccion'] > estado['mayor_fin']]
+            previos = acumular_movimientos_mensuales(cuentas, diario_previo, mayor_inicio, mayor_fin)
+            totales = tuple(nuevo + previo for nuevo, previo in zip(totales, previos))
+        libro_mayor_df = construir_libro_mayor(cuentas, totales, mayor_inicio, mayor_fin,
+                                               saldos_iniciales=saldos_finales(backend, cuentas, estado['mayor_fin']))
+
+    backend.append('ventas', ventas_df)
+    backend.append('compras', compras_df)
+    backend.append('movimientos_bancarios', movimientos_df)
+    backend.append('libro_diario', libro_diario_df)
+    if libro_mayor_df is not None:
+        backend.append('libro_mayor', libro_mayor_df)
+
+    guardar_estado(ruta_estado, {
+        'fin': fin,
+        'mayor_fin': mayor_fin if libro_mayor_df is not None else estado['mayor_fin'],
+        'siguiente': {
+            'ID_Venta': siguiente['ID_Venta'] + len(ventas_df),
+            'ID_Compra': siguiente['ID_Compra'] + len(compras_df),
+            'ID_Movimiento': siguiente['ID_Movimiento'] + len(movimientos_df),
+            'ID_Asiento': asiento_id
+        },
+        'ventas_pendientes': [[fecha, int(total)] for fecha, total
+                              in zip(pendientes['Fecha'], pendientes['Total_Venta'])],
+        'concept_templates': bool(concept_templates),
+        'rng': _codificar_rng(np.random.get_state())
+    })
+
+def estado_inicial(backend, seed):
+    """
+    State of a dataset that has not been extended yet, read from its tables.
+
+    Only the ID and date columns of the transactional tables are loaded.
+    The RNG starts from a seed derived from `seed`, so the first extension
+    does not repeat the draws of the original run. The original run posted
+    the expenses of all its months, so no sales are pending. The concept
+    encoding is the one of the stored journal.
+    """
+    siguiente = {}
+    fin = None
+    for nombre, (columna_id, columna_fecha) in SECUENCIAS.items():
+        df = backend.read(nombre, [columna_id, columna_fecha])
+        siguiente[columna_id] = int(df[columna_id].max()) + 1 if len(df) else 1
+        if len(df):
+            fin = df[columna_fecha].max() if fin is None else max(fin, df[columna_fecha].max())
+
+    mayor = backend.read('libro_mayor', ['Fecha'])
+    np.random.seed(semilla_etapa(seed, 'incremental'))
+    return {
+        'fin': fin,
+        'mayor_fin': mayor['Fecha'].max(),
+        'siguiente': siguiente,
+        'ventas_pendientes': [],
+        'concept_templates': conceptos_codificados(backend),
+        'rng': _codificar_rng(np.random.get_state())
+    }
+
+def conceptos_codificados(backend):
+    """Whether the stored journal keeps encoded concepts (see conceptos)."""
+    return 'Concepto_Plantilla' in backend.columnas('libro_diario')
+
+def saldos_finales(backend, cuentas, fecha):
+    """Saldo_Final of every account on a ledger date, in chart order (zero if missing)."""
+    mayor = backend.read('libro_mayor', ['ID_Cuenta', 'Fecha', 'Saldo_Final'])
+    mayor = mayor[mayor['Fecha'] == fecha]
+    return mayor.set_index('ID_Cuenta')['Saldo_Final'].reindex(cuentas.ids, fill_value=0).to_numpy()
+
+def cargar_estado(ruta):
+    """Saved state of a dataset, or None if it has not been extended yet."""
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+def guardar_estado(ruta, estado):
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(estado, archivo)
+
+def borrar_estado(output_dir):
+    """Forget the saved state, e.g. when the dataset is regenerated from scratch."""
+    ruta = os.path.join(output_dir, ARCHIVO_ESTADO)
+    if os.path.exists(ruta):
+        os.remove(ruta)
+
+def _ultimo_fin_de_mes(fecha):
+    """Last month end on or before a date."""
+    periodo = pd.Period(fecha, freq='M')
+    if periodo.end_time.strftime('%Y-%m-%d') != fecha:
+        periodo -= 1
+    return periodo.end_time.strftime('%Y-%m-%d')
+
+def _codificar_rng(estado):
+    """np.random state as a JSON-serializable list."""
+    algoritmo, claves, posicion, tiene_gauss, gauss = estado
+    return [algoritmo, claves.tolist(), int(posicion), int(tiene_gauss), float(gauss)]
+
+def _decodificar_rng(estado):
+    algoritmo, claves, posicion, tiene_gauss, gauss = estado
+    return algoritmo, np.array(claves, dtype=np.uint32), posicion, tiene_gauss, gauss
@@ -0,0 +1,195 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # POSIX only; on Windows peak memory comes from psutil, if installed
+    resource = None
+
+# Per-stage instrumentation of a run: wall time, CPU time, rows produced,
+# time spent writing and bytes written, and peak memory of every stage,
+# collected into a run report. Stages are measured in the process that
+# runs them (see medir_llamada) and the metrics are sent back with the
+# table, so the report is the same with any number of workers. Peak
+# memory is None (shown as n/a) where it cannot be measured.
+
+PERFILADORES = ('cprofile', 'pyinstrument')
+
+class Instrumentacion:
+    """
+    Metrics of the stages of one run.
+
+    Args:
+        etapa_perfil: Optional stage to profile while it runs
+        perfilador: 'cprofile' (a .prof file for pstats/snakeviz) or
+            'pyinstrument' (an .html report; requires pyinstrument)
+        directorio_perfil: Directory the profile is written to
+    """
+
+    def __init__(self, etapa_perfil=None, perfilador='cprofile', directorio_perfil='.'):
+        if perfilador not in PERFILADORES:
+            raise ValueError(f"Unknown profiler '{perfilador}'; expected one of {PERFILADORES}")
+        self.etapa_perfil = etapa_perfil
+        self.perfilador = perfilador
+        self.directorio_perfil = directorio_perfil
+        self.etapas = {}
+        self._inicio = time.perf_counter()
+
+    def registrar(self, nombre, **metricas):
+        """Add metrics to a stage (stages are reported in the order they are first registered)."""
+        self.etapas.setdefault(nombre, {}).update(metricas)
+
+    def ruta_perfil(self, nombre):
+        """Profile file of a stage, or None if the stage is not profiled."""
+        if nombre != self.etapa_perfil:
+            return None
+        extension = '.prof' if self.perfilador == 'cprofile' else '.html'
+        return os.path.join(self.directorio_perfil, f"profile_{nombre}{extension}")
+
+    @contextmanager
+    def medir(self, nombre, **metricas):
+        """Measure a block of code run in this process as stage `nombre`, with extra `metricas`."""
+        inicio = _contadores()
+        yield
+        self.registrar(nombre, **metricas, **_diferencia(inicio, _contadores()))
+
+    def escritura(self, backend):
+        """
+        Wrap backend.write so that the time spent writing each table and the
+        size of its file are recorded with its stage.
+
+        Returns:
+            callable: write(nombre, df), usable as the pipeline's al_completar
+        """
+        def escribir(nombre, df):
+            inicio = time.perf_counter()
+            backend.write(nombre, df)
+            self.registrar(nombre, filas=len(df), segundos_escritura=time.perf_counter() - inicio,
+                           bytes_escritos=tamano_archivo(backend.ruta(nombre)))
+        return escribir
+
+    def reporte(self):
+        """Run report: total wall time and the metrics of every stage."""
+        return {
+            'segundos_totales': time.perf_counter() - self._inicio,
+            'memoria_pico_mb': memoria_pico_mb(),
+            'etapas': self.etapas
+        }
+
+    def guardar(self, ruta):
+        """Write the run report as JSON."""
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(self.reporte(), archivo, indent=2)
+        print(f"Saved run report to {ruta}")
+
+    def resumen(self):
+        """Run report as a text table, slowest stage first."""
+        reporte = self.reporte()
+        total = reporte['segundos_totales']
+        lineas = [f"{'Stage':<22} {'Source':<9} {'Wall s':>9} {'CPU s':>9} {'Write s':>8} {'Rows':>12} "
+                  f"{'MB written':>11} {'Peak MB':>9} {'% run':>6}"]
+        orden = sorted(self.etapas.items(), key=lambda item: -(item[1].get('segundos', 0)
+                                                             + item[1].get('segundos_escritura', 0)))
+        for nombre, m in orden:
+            segundos = m.get('segundos', 0) + m.get('segundos_escritura', 0)
+            lineas.append(
+                f"{nombre:<22} {m.get('origen', ''):<9} {m.get('segundos', 0):>9.2f} {m.get('cpu_segundos', 0):>9.2f} "
+                f"{m.get('segundos_escritura', 0):>8.2f} {m.get('filas', 0):>12,} "
+                f"{m.get('bytes_escritos', 0) / 1e6:>11.1f} {formatear_mb(m.get('memoria_pico_mb')):>9} "
+                f"{100 * segundos / total if total else 0:>5.1f}%")
+        pico = reporte['memoria_pico_mb']
+        lineas.append(f"Total {total:.2f}s, peak memory of the main process "
+                      f"{'unavailable' if pico is None else f'{pico:.1f} MB'}")
+        return "\n".join(lineas)
+
+def medir_llamada(funcion, argumentos, parametros, ruta_perfil=None, perfilador='cprofile'):
+    """
+    Call a stage function and measure it.
+
+    CPU time includes child processes started and joined by the call (e.g.
+    the shards of a sharded stage) where the resource module is available.
+    Peak memory is the high-water mark of the process that ran the call,
+    which may include earlier stages run by the same worker.
+
+    Args:
+        funcion: Function to call
+        argumentos: Positional arguments
+        parametros: Keyword arguments
+        ruta_perfil: If set, profile the call and write the profile here
+        perfilador: One of PERFILADORES
+
+    Returns:
+        tuple: (result, metrics dict)
+    """
+    inicio = _contadores()
+    if ruta_perfil is None:
+        resultado = funcion(*argumentos, **parametros)
+    elif perfilador == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError as e:
+            raise ImportError("pyinstrument is required for --profiler pyinstrument "
+                              "(pip install pyinstrument)") from e
+        perfil = Profiler()
+        perfil.start()
+        try:
+            resultado = funcion(*argumentos, **parametros)
+        finally:
+            perfil.stop()
+            with open(ruta_perfil, 'w', encoding='utf-8') as archivo:
+                archivo.write(perfil.output_html())
+    else:
+        import cProfile
+        perfil = cProfile.Profile()
+        try:
+            resultado = perfil.runcall(funcion, *argumentos, **parametros)
+        finally:
+            perfil.dump_stats(ruta_perfil)
+
+    metricas = _diferencia(inicio, _contadores())
+    metricas['filas'] = len(resultado)
+    if ruta_perfil is not None:
+        metricas['perfil'] = ruta_perfil
+    return resultado, metricas
+
+def tamano_archivo(ruta):
+    """Size of a file in bytes (0 if it does not exist)."""
+    return os.path.getsize(ruta) if os.path.exists(ruta) else 0
+
+def memoria_pico_mb():
+    """Peak resident set size of this process in MB, or None if it cannot be measured."""
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memoria = psutil.Process().memory_info()
+    # peak_wset is the peak working set on Windows; elsewhere only the
+    # current RSS is available
+    return getattr(memoria, 'peak_wset', memoria.rss) / (1024 * 1024)
+
+def formatear_mb(mb):
+    """Megabytes as text, 'n/a' for None."""
+    return 'n/a' if mb is None else f"{mb:.1f}"
+
+def _contadores():
+    # Child processes' CPU time is only available through resource
+    cpu = time.process_time()
+    if resource is not None:
+        hijos = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu += hijos.ru_utime + hijos.ru_stime
+    return time.perf_counter(), cpu
+
+def _diferencia(inicio, fin):
+    return {
+        'segundos': fin[0] - inicio[0],
+        'cpu_segundos': fin[1] - inicio[1],
+        'memoria_pico_mb': memoria_pico_mb()
+    }
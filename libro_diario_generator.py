@@ -1,328 +1,285 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from dinero import a_centavos, a_moneda, porcentaje_centavos
+from plan_cuentas_generator import PlanCuentas
+from clasificador_movimientos import REGLAS_MOVIMIENTOS, clasificar_movimientos
+from conceptos import codificar_plantilla, conceptos_de, columnas_con_conceptos, formatear_concepto
 
-def generate_libro_diario(plan_cuentas_df, ventas_df, compras_df, movimientos_bancarios_df, productos_df):
+# Posting templates: one (account name, side, amount, concept) tuple per
+# journal line of an entry. The amount names a column of the batch being
+# posted, in int64 cents, and the concept is a format string over the
+# batch's columns, one of conceptos.PLANTILLAS_CONCEPTO ('{Concepto}' copies
+# the concept of the source row).
+# 'Contrapartida' stands for the per-movement counter-account assigned by
+# the rules in clasificador_movimientos.
+PLANTILLAS_ASIENTO = {
+    'venta': [
+        ('Cuentas por Cobrar', 'Debito', 'Total_Venta', "Venta #{ID_Venta} - Cliente #{ID_Cliente}"),
+        ('Ventas', 'Credito', 'Total_Venta', "Venta #{ID_Venta} - Cliente #{ID_Cliente} (incluye IVA)")
+    ],
+    'costo_venta': [
+        ('Costo de Ventas', 'Debito', 'Costo_Venta', "Costo de Venta #{ID_Venta}"),
+        ('Inventario de Mercancías', 'Credito', 'Costo_Venta', "Costo de Venta #{ID_Venta} - Ajuste de inventario")
+    ],
+    'gastos_admin': [
+        ('Gastos de Administración', 'Debito', 'Gastos_Admin', "Gastos administrativos del mes"),
+        ('Bancos', 'Credito', 'Gastos_Admin', "Pago de gastos administrativos del mes")
+    ],
+    'gastos_venta': [
+        ('Gastos de Venta', 'Debito', 'Gastos_Venta', "Gastos de venta del mes"),
+        ('Bancos', 'Credito', 'Gastos_Venta', "Pago de gastos de venta del mes")
+    ],
+    'compra': [
+        ('Inventario de Mercancías', 'Debito', 'Subtotal', "Compra #{ID_Compra} - Producto #{ID_Producto}"),
+        ('IVA Acreditable', 'Debito', 'IVA', "IVA por Compra #{ID_Compra}"),
+        ('Proveedores', 'Credito', 'Costo_Total_Compra', "Compra #{ID_Compra} - Producto #{ID_Producto}")
+    ],
+    'ingreso_bancario': [
+        ('Bancos', 'Debito', 'Monto', "{Concepto}"),
+        ('Contrapartida', 'Credito', 'Monto', "{Concepto}")
+    ],
+    'egreso_bancario': [
+        ('Contrapartida', 'Debito', 'Monto', "{Concepto}"),
+        ('Bancos', 'Credito', 'Monto', "{Concepto}")
+    ]
+}
+
+COLUMNAS_LIBRO_DIARIO = ['ID_Asiento', 'Fecha_Transaccion', 'ID_Cuenta', 'Concepto', 'Debito', 'Credito']
+
+def generate_libro_diario(plan_cuentas_df, ventas_df, compras_df, movimientos_bancarios_df, productos_df,
+                          concept_templates=False):
     """
     Generate a synthetic dataset of accounting journal entries with realistic attributes.
-    
+
+    Entries are posted per source table as column arrays using the templates
+    in PLANTILLAS_ASIENTO, then concatenated and sorted once.
+
     Args:
-        plan_cuentas_df: DataFrame containing chart of accounts
+        plan_cuentas_df: DataFrame (or PlanCuentas) containing chart of accounts
         ventas_df: DataFrame containing sales information
         compras_df: DataFrame containing purchase information
         movimientos_bancarios_df: DataFrame containing bank transactions
         productos_df: DataFrame containing product information
-        
+        concept_templates: If True, store every Concepto as a template code
+            plus the referenced IDs (conceptos.COLUMNAS_PLANTILLA) instead
+            of a string; the text is materialized when written to CSV
+
     Returns:
         DataFrame: A pandas DataFrame containing journal entries
     """
-    # Initialize empty list for journal entries
-    asientos = []
+    cuentas = PlanCuentas.de(plan_cuentas_df)
+
+    # Post each source table, numbering entries in the order of the tables
+    bloques = []
     asiento_id = 1
-    
-    # Get account IDs for common accounts
-    cuenta_ventas = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'Ventas']['ID_Cuenta'].iloc[0]
-    cuenta_costo_ventas = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'Costo de Ventas']['ID_Cuenta'].iloc[0]
-    cuenta_inventario = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'Inventario de Mercancías']['ID_Cuenta'].iloc[0]
-    cuenta_cuentas_cobrar = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'Cuentas por Cobrar']['ID_Cuenta'].iloc[0]
-    cuenta_bancos = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'Bancos']['ID_Cuenta'].iloc[0]
-    cuenta_iva_acreditable = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'IVA Acreditable']['ID_Cuenta'].iloc[0]
-    cuenta_iva_por_pagar = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'IVA por Pagar']['ID_Cuenta'].iloc[0]
-    cuenta_proveedores = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'Proveedores']['ID_Cuenta'].iloc[0]
-    cuenta_compras = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'Compras']['ID_Cuenta'].iloc[0]
-    
-    # Generate journal entries for sales
-    for _, venta in ventas_df.iterrows():
-        fecha = venta['Fecha']
-        total_venta = venta['Total_Venta']
-        # Get product cost from productos_df
-        producto_row = productos_df[productos_df['ID_Producto'] == venta['ID_Producto']].iloc[0]
-        costo_variable_unitario = producto_row['Costo_Variable_Unitario']
-        # Apply a 75% reduction to the cost of goods sold (adjusted from 60%)
-        # This decreases costs compared to previous implementation
-        costo_variable_unitario = costo_variable_unitario * 0.25
-        costo_venta = venta['Cantidad_Vendida'] * costo_variable_unitario
-        
-        # Calculate tax (IVA 16%)
-        iva = round(total_venta * 0.16, 2)
-        subtotal = round(total_venta - iva, 2)
-        
-        # 1. Record the sale (debit accounts receivable, credit sales and IVA)
-        asientos.append({
-            'ID_Asiento': asiento_id,
-            'Fecha_Transaccion': fecha,
-            'ID_Cuenta': cuenta_cuentas_cobrar,
-            'Concepto': f"Venta #{venta['ID_Venta']} - Cliente #{venta['ID_Cliente']}",
-            'Debito': total_venta,
-            'Credito': 0
-        })
-        
-        # Combined entry for sales and IVA (instead of two separate entries)
-        asientos.append({
-            'ID_Asiento': asiento_id,
-            'Fecha_Transaccion': fecha,
-            'ID_Cuenta': cuenta_ventas,
-            'Concepto': f"Venta #{venta['ID_Venta']} - Cliente #{venta['ID_Cliente']} (incluye IVA)",
-            'Debito': 0,
-            'Credito': total_venta
-        })
-        
-        asiento_id += 1
-        
-        # 2. Record the cost of goods sold - use proper accounting entries
-        # Lower threshold to ensure more cost entries are recorded
-        if round(costo_venta, 2) > 10:  # Decreased threshold from 20 to 10
-            asientos.append({
-                'ID_Asiento': asiento_id,
-                'Fecha_Transaccion': fecha,
-                'ID_Cuenta': cuenta_costo_ventas,
-                'Concepto': f"Costo de Venta #{venta['ID_Venta']}",
-                'Debito': round(costo_venta, 2),
-                'Credito': 0
-            })
-            
-            asientos.append({
-                'ID_Asiento': asiento_id,
-                'Fecha_Transaccion': fecha,
-                'ID_Cuenta': cuenta_inventario,
-                'Concepto': f"Costo de Venta #{venta['ID_Venta']} - Ajuste de inventario",
-                'Debito': 0,
-                'Credito': round(costo_venta, 2)
-            })
-            
-            asiento_id += 1
-    
-    # Generate additional operating expenses based on sales volume
-    # This will create a more realistic EBIT by adding administrative and selling expenses
-    
-    # Get account IDs for expense accounts
-    cuenta_gastos_admin = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'Gastos de Administración']['ID_Cuenta'].iloc[0]
-    cuenta_gastos_venta = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'Gastos de Venta']['ID_Cuenta'].iloc[0]
-    
-    # Group sales by month for expense allocation
-    ventas_df['Mes'] = pd.to_datetime(ventas_df['Fecha']).dt.to_period('M')
-    ventas_mensuales = ventas_df.groupby('Mes')['Total_Venta'].sum().reset_index()
-    
-    # Generate monthly operating expenses
-    for _, mes_venta in ventas_mensuales.iterrows():
-        # Convert period to date string (use the first day of the month)
-        fecha = mes_venta['Mes'].to_timestamp().strftime('%Y-%m-%d')
-        total_ventas_mes = mes_venta['Total_Venta']
-        
-        # Calculate administrative expenses (reduced from 15% to 10% of monthly sales)
-        gastos_admin = round(total_ventas_mes * 0.10, 2)
-        
-        # Calculate selling expenses (reduced from 20% to 15% of monthly sales)
-        gastos_venta = round(total_ventas_mes * 0.15, 2)
-        
-        # Record administrative expenses
-        asientos.append({
-            'ID_Asiento': asiento_id,
-            'Fecha_Transaccion': fecha,
-            'ID_Cuenta': cuenta_gastos_admin,
-            'Concepto': f"Gastos administrativos del mes",
-            'Debito': gastos_admin,
-            'Credito': 0
-        })
-        
-        asientos.append({
-            'ID_Asiento': asiento_id,
-            'Fecha_Transaccion': fecha,
-            'ID_Cuenta': cuenta_bancos,
-            'Concepto': f"Pago de gastos administrativos del mes",
-            'Debito': 0,
-            'Credito': gastos_admin
-        })
-        
-        asiento_id += 1
-        
-        # Record selling expenses
-        asientos.append({
-            'ID_Asiento': asiento_id,
-            'Fecha_Transaccion': fecha,
-            'ID_Cuenta': cuenta_gastos_venta,
-            'Concepto': f"Gastos de venta del mes",
-            'Debito': gastos_venta,
-            'Credito': 0
-        })
-        
-        asientos.append({
-            'ID_Asiento': asiento_id,
-            'Fecha_Transaccion': fecha,
-            'ID_Cuenta': cuenta_bancos,
-            'Concepto': f"Pago de gastos de venta del mes",
-            'Debito': 0,
-            'Credito': gastos_venta
-        })
-        
-        asiento_id += 1
-    
-    # Generate journal entries for purchases
-    for _, compra in compras_df.iterrows():
-        fecha = compra['Fecha_Compra']
-        total_compra = compra['Costo_Total_Compra']
-        
-        # Lower threshold to ensure more purchase entries are recorded
-        if total_compra > 100:  # Decreased threshold from 200 to 100
-            # Calculate tax (IVA 16%)
-            iva = round(total_compra * 0.16, 2)
-            subtotal = round(total_compra - iva, 2)
-            
-            # Record the purchase with proper accounting entries
-            asientos.append({
-                'ID_Asiento': asiento_id,
-                'Fecha_Transaccion': fecha,
-                'ID_Cuenta': cuenta_inventario,
-                'Concepto': f"Compra #{compra['ID_Compra']} - Producto #{compra['ID_Producto']}",
-                'Debito': subtotal,
-                'Credito': 0
-            })
-            
-            asientos.append({
-                'ID_Asiento': asiento_id,
-                'Fecha_Transaccion': fecha,
-                'ID_Cuenta': cuenta_iva_acreditable,
-                'Concepto': f"IVA por Compra #{compra['ID_Compra']}",
-                'Debito': iva,
-                'Credito': 0
-            })
-            
-            asientos.append({
-                'ID_Asiento': asiento_id,
-                'Fecha_Transaccion': fecha,
-                'ID_Cuenta': cuenta_proveedores,
-                'Concepto': f"Compra #{compra['ID_Compra']} - Producto #{compra['ID_Producto']}",
-                'Debito': 0,
-                'Credito': total_compra
-            })
-            
-            asiento_id += 1
-    
-    # Generate journal entries for bank transactions
-    for _, movimiento in movimientos_bancarios_df.iterrows():
-        fecha = movimiento['Fecha']
-        monto = movimiento['Monto']
-        concepto = movimiento['Concepto']
-        
-        if 'Cobro venta' in concepto:
-            # Payment received from customer
-            asientos.append({
-                'ID_Asiento': asiento_id,
-                'Fecha_Transaccion': fecha,
-                'ID_Cuenta': cuenta_bancos,
-                'Concepto': concepto,
-                'Debito': monto,
-                'Credito': 0
-            })
-            
-            asientos.append({
-                'ID_Asiento': asiento_id,
-                'Fecha_Transaccion': fecha,
-                'ID_Cuenta': cuenta_cuentas_cobrar,
-                'Concepto': concepto,
-                'Debito': 0,
-                'Credito': monto
-            })
-            
-        elif 'Pago compra' in concepto:
-            # Payment to supplier
-            asientos.append({
-                'ID_Asiento': asiento_id,
-                'Fecha_Transaccion': fecha,
-                'ID_Cuenta': cuenta_proveedores,
-                'Concepto': concepto,
-                'Debito': monto,
-                'Credito': 0
-            })
-            
-            asientos.append({
-                'ID_Asiento': asiento_id,
-                'Fecha_Transaccion': fecha,
-                'ID_Cuenta': cuenta_bancos,
-                'Concepto': concepto,
-                'Debito': 0,
-                'Credito': monto
-            })
-            
-        else:
-            # Other bank transactions
-            # Determine appropriate accounts based on transaction type
-            if movimiento['Tipo'] == 'Ingreso':
-                # Income transactions
-                if 'Préstamo' in concepto:
-                    cuenta_contraparte = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'Préstamos Bancarios a Largo Plazo']['ID_Cuenta'].iloc[0]
-                elif 'Devolución impuestos' in concepto:
-                    cuenta_contraparte = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'ISR por Pagar']['ID_Cuenta'].iloc[0]
-                elif 'Venta de activo' in concepto:
-                    cuenta_contraparte = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'Otros Ingresos']['ID_Cuenta'].iloc[0]
-                else:
-                    cuenta_contraparte = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'Otros Ingresos']['ID_Cuenta'].iloc[0]
-                
-                asientos.append({
-                    'ID_Asiento': asiento_id,
-                    'Fecha_Transaccion': fecha,
-                    'ID_Cuenta': cuenta_bancos,
-                    'Concepto': concepto,
-                    'Debito': monto,
-                    'Credito': 0
-                })
-                
-                asientos.append({
-                    'ID_Asiento': asiento_id,
-                    'Fecha_Transaccion': fecha,
-                    'ID_Cuenta': cuenta_contraparte,
-                    'Concepto': concepto,
-                    'Debito': 0,
-                    'Credito': monto
-                })
-                
-            else:  # Egreso
-                # Expense transactions
-                if 'nómina' in concepto.lower():
-                    cuenta_contraparte = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'Gastos de Administración']['ID_Cuenta'].iloc[0]
-                elif 'Servicios' in concepto:
-                    cuenta_contraparte = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'Gastos de Administración']['ID_Cuenta'].iloc[0]
-                elif 'Impuestos' in concepto:
-                    cuenta_contraparte = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'ISR por Pagar']['ID_Cuenta'].iloc[0]
-                elif 'Seguros' in concepto or 'Mantenimiento' in concepto:
-                    cuenta_contraparte = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'Gastos de Administración']['ID_Cuenta'].iloc[0]
-                elif 'Alquiler' in concepto:
-                    cuenta_contraparte = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'Gastos de Administración']['ID_Cuenta'].iloc[0]
-                else:
-                    cuenta_contraparte = plan_cuentas_df[plan_cuentas_df['Nombre_Cuenta'] == 'Otros Gastos']['ID_Cuenta'].iloc[0]
-                
-                asientos.append({
-                    'ID_Asiento': asiento_id,
-                    'Fecha_Transaccion': fecha,
-                    'ID_Cuenta': cuenta_contraparte,
-                    'Concepto': concepto,
-                    'Debito': monto,
-                    'Credito': 0
-                })
-                
-                asientos.append({
-                    'ID_Asiento': asiento_id,
-                    'Fecha_Transaccion': fecha,
-                    'ID_Cuenta': cuenta_bancos,
-                    'Concepto': concepto,
-                    'Debito': 0,
-                    'Credito': monto
-                })
-        
-        asiento_id += 1
-    
-    # Create DataFrame from the list of journal entries
-    libro_diario_df = pd.DataFrame(asientos)
-    
-    # Sort by date and ID
-    libro_diario_df = libro_diario_df.sort_values(['Fecha_Transaccion', 'ID_Asiento'])
-    
+
+    bloque, asiento_id = postear_ventas(ventas_df, productos_df, cuentas, asiento_id, concept_templates)
+    bloques.append(bloque)
+
+    # Operating expenses are allocated from the monthly sales volume
+    bloque, asiento_id = postear_gastos_mensuales(ventas_mensuales(ventas_df), cuentas, asiento_id,
+                                                 concept_templates)
+    bloques.append(bloque)
+
+    bloque, asiento_id = postear_compras(compras_df, cuentas, asiento_id, concept_templates)
+    bloques.append(bloque)
+
+    bloque, asiento_id = postear_movimientos(movimientos_bancarios_df, cuentas, asiento_id, concept_templates)
+    bloques.append(bloque)
+
+    libro_diario_df = pd.concat(bloques, ignore_index=True)
+
+    # Sort by date and ID. The sort is stable, so the lines of an entry keep
+    # the order of their posting template.
+    libro_diario_df = libro_diario_df.sort_values(['Fecha_Transaccion', 'ID_Asiento'], kind='stable')
+
     # Reset index
     libro_diario_df = libro_diario_df.reset_index(drop=True)
-    
-    # Round monetary values to 2 decimal places
-    libro_diario_df['Debito'] = libro_diario_df['Debito'].round(2)
-    libro_diario_df['Credito'] = libro_diario_df['Credito'].round(2)
-    
-    # Return the DataFrame with columns in the correct order
-    return libro_diario_df[['ID_Asiento', 'Fecha_Transaccion', 'ID_Cuenta', 'Concepto', 'Debito', 'Credito']]
\ No newline at end of file
+
+    return libro_diario_df[columnas_con_conceptos(COLUMNAS_LIBRO_DIARIO, libro_diario_df)]
+
+def postear_ventas(ventas_df, productos_df, cuentas, primer_asiento, concept_templates=False):
+    """
+    Post the sale entry and, when significant, the cost of goods sold entry
+    of every sale.
+
+    Args:
+        ventas_df: DataFrame containing sales information
+        productos_df: DataFrame containing product information
+        cuentas: PlanCuentas of the chart of accounts
+        primer_asiento: ID_Asiento of the first entry to post
+        concept_templates: If True, encode concepts (see generate_libro_diario)
+
+    Returns:
+        tuple: (DataFrame of journal lines, next free ID_Asiento)
+    """
+    # Get product cost with an indexed join on ID_Producto. A 75% reduction
+    # is applied to the cost of goods sold (adjusted from 60%).
+    costo_unitario = productos_df.set_index('ID_Producto')['Costo_Variable_Unitario'] \
+        .reindex(ventas_df['ID_Producto']).to_numpy()
+    costo_venta = a_centavos(ventas_df['Cantidad_Vendida'].to_numpy() * (costo_unitario * 0.25))
+
+    # Only costs above the threshold (10.00) get their own entry
+    con_costo = costo_venta > 1000
+
+    # Each sale uses one entry, plus one more when its cost is recorded
+    asientos_por_venta = 1 + con_costo.astype(np.int64)
+    id_venta = primer_asiento + np.cumsum(asientos_por_venta) - asientos_por_venta
+
+    lotes = pd.DataFrame({
+        'ID_Asiento': id_venta,
+        'Fecha_Transaccion': ventas_df['Fecha'].to_numpy(),
+        'ID_Venta': ventas_df['ID_Venta'].to_numpy(),
+        'ID_Cliente': ventas_df['ID_Cliente'].to_numpy(),
+        'Total_Venta': a_centavos(ventas_df['Total_Venta']),
+        'Costo_Venta': costo_venta
+    })
+
+    bloques = [
+        _aplicar_plantilla('venta', lotes, cuentas, concept_templates),
+        _aplicar_plantilla('costo_venta', lotes[con_costo].assign(ID_Asiento=id_venta[con_costo] + 1), cuentas,
+                           concept_templates)
+    ]
+
+    return pd.concat(bloques, ignore_index=True), primer_asiento + int(asientos_por_venta.sum())
+
+def ventas_mensuales(ventas_df):
+    """
+    Total sales per month, keyed by the first day of the month.
+
+    Args:
+        ventas_df: DataFrame containing sales information
+
+    Returns:
+        DataFrame: Columns 'Fecha' ('YYYY-MM-01') and 'Total_Venta' (int64
+            cents), sorted by month
+    """
+    mes = ventas_df['Fecha'].str.slice(0, 7)
+    totales = pd.Series(a_centavos(ventas_df['Total_Venta'])).groupby(mes.to_numpy()).sum()
+    return pd.DataFrame({
+        'Fecha': totales.index.to_numpy().astype(str) + '-01',
+        'Total_Venta': totales.to_numpy()
+    })
+
+def postear_gastos_mensuales(ventas_mensuales_df, cuentas, primer_asiento, concept_templates=False):
+    """
+    Post administrative and selling expenses for every month with sales.
+
+    Args:
+        ventas_mensuales_df: DataFrame as returned by ventas_mensuales
+        cuentas: PlanCuentas of the chart of accounts
+        primer_asiento: ID_Asiento of the first entry to post
+        concept_templates: If True, encode concepts (see generate_libro_diario)
+
+    Returns:
+        tuple: (DataFrame of journal lines, next free ID_Asiento)
+    """
+    num_meses = len(ventas_mensuales_df)
+    id_admin = primer_asiento + 2 * np.arange(num_meses)
+    total_ventas_mes = ventas_mensuales_df['Total_Venta'].to_numpy(dtype=np.int64)
+
+    # Administrative expenses are 10% and selling expenses 15% of monthly sales
+    lotes = pd.DataFrame({
+        'ID_Asiento': id_admin,
+        'Fecha_Transaccion': ventas_mensuales_df['Fecha'].to_numpy(),
+        'Gastos_Admin': porcentaje_centavos(total_ventas_mes, 0.10),
+        'Gastos_Venta': porcentaje_centavos(total_ventas_mes, 0.15)
+    })
+
+    bloques = [
+        _aplicar_plantilla('gastos_admin', lotes, cuentas, concept_templates),
+        _aplicar_plantilla('gastos_venta', lotes.assign(ID_Asiento=id_admin + 1), cuentas, concept_templates)
+    ]
+
+    return pd.concat(bloques, ignore_index=True), primer_asiento + 2 * num_meses
+
+def postear_compras(compras_df, cuentas, primer_asiento, concept_templates=False):
+    """
+    Post every purchase above the recording threshold, splitting out IVA (16%).
+
+    Args:
+        compras_df: DataFrame containing purchase information
+        cuentas: PlanCuentas of the chart of accounts
+        primer_asiento: ID_Asiento of the first entry to post
+        concept_templates: If True, encode concepts (see generate_libro_diario)
+
+    Returns:
+        tuple: (DataFrame of journal lines, next free ID_Asiento)
+    """
+    total_compra = a_centavos(compras_df['Costo_Total_Compra'])
+    registrada = total_compra > 10000
+    compras = compras_df[registrada]
+    total_compra = total_compra[registrada]
+    iva = porcentaje_centavos(total_compra, 0.16)
+
+    lotes = pd.DataFrame({
+        'ID_Asiento': primer_asiento + np.arange(len(compras)),
+        'Fecha_Transaccion': compras['Fecha_Compra'].to_numpy(),
+        'ID_Compra': compras['ID_Compra'].to_numpy(),
+        'ID_Producto': compras['ID_Producto'].to_numpy(),
+        'Costo_Total_Compra': total_compra,
+        'IVA': iva,
+        'Subtotal': total_compra - iva
+    })
+
+    return _aplicar_plantilla('compra', lotes, cuentas, concept_templates), primer_asiento + len(compras)
+
+def postear_movimientos(movimientos_bancarios_df, cuentas, primer_asiento, concept_templates=False):
+    """
+    Post every bank movement against its counter-account.
+
+    The template and counter-account of each movement come from the rule
+    table in clasificador_movimientos.
+
+    Args:
+        movimientos_bancarios_df: DataFrame containing bank transactions
+        cuentas: PlanCuentas of the chart of accounts
+        primer_asiento: ID_Asiento of the first entry to post
+        concept_templates: If True, encode concepts (see generate_libro_diario)
+
+    Returns:
+        tuple: (DataFrame of journal lines, next free ID_Asiento)
+    """
+    plantillas, contrapartidas = clasificar_movimientos(movimientos_bancarios_df, cuentas)
+
+    lotes = pd.DataFrame({
+        'ID_Asiento': primer_asiento + np.arange(len(movimientos_bancarios_df)),
+        'Fecha_Transaccion': movimientos_bancarios_df['Fecha'].to_numpy(),
+        'Monto': a_centavos(movimientos_bancarios_df['Monto']),
+        **conceptos_de(movimientos_bancarios_df, concept_templates),
+        'Contrapartida': contrapartidas
+    })
+
+    bloques = [_aplicar_plantilla(plantilla, lotes[plantillas == plantilla], cuentas, concept_templates)
+               for plantilla in dict.fromkeys(regla['plantilla'] for regla in REGLAS_MOVIMIENTOS)]
+
+    return pd.concat(bloques, ignore_index=True), primer_asiento + len(movimientos_bancarios_df)
+
+def _aplicar_plantilla(nombre_plantilla, lotes, cuentas, concept_templates=False):
+    """
+    Expand a batch of entries into journal lines with a posting template.
+
+    The lines are emitted leg by leg, so within each entry they appear in
+    template order once the result is stably sorted by ID_Asiento. Amounts
+    go from cents back to currency units here, the engine's output boundary.
+    With concept_templates the concept is encoded instead of formatted.
+    """
+    lineas = []
+    for cuenta, lado, importe, concepto in PLANTILLAS_ASIENTO[nombre_plantilla]:
+        montos = a_moneda(lotes[importe].to_numpy())
+        ceros = np.zeros(len(lotes))
+        lineas.append(pd.DataFrame({
+            'ID_Asiento': lotes['ID_Asiento'].to_numpy(),
+            'Fecha_Transaccion': lotes['Fecha_Transaccion'].to_numpy(),
+            'ID_Cuenta': lotes[cuenta].to_numpy() if cuenta in lotes else np.full(len(lotes), cuentas[cuenta], dtype=object),
+            **_conceptos(concepto, lotes, concept_templates),
+            'Debito': montos if lado == 'Debito' else ceros,
+            'Credito': montos if lado == 'Credito' else ceros
+        }))
+    return pd.concat(lineas, ignore_index=True)
+
+def _conceptos(concepto, lotes, concept_templates):
+    """Concept columns of one template leg: copied from the batch for '{Concepto}', else formatted or encoded."""
+    if concept_templates:
+        return conceptos_de(lotes, True) if concepto == "{Concepto}" else codificar_plantilla(concepto, lotes)
+    return {'Concepto': formatear_concepto(concepto, lotes)}
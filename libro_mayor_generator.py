@@ -1,105 +1,132 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 
-def generate_libro_mayor(plan_cuentas_df, libro_diario_df):
+from dinero import a_centavos, a_moneda, sumar_centavos
+from plan_cuentas_generator import PlanCuentas
+
+def generate_libro_mayor(plan_cuentas_df, libro_diario_df, start_date='2020-01-01', end_date='2022-12-31'):
     """
     Generate a synthetic dataset of general ledger entries with realistic attributes.
-    
+
+    The journal is bucketed by (ID_Cuenta, month) in a single pass and the
+    balances are a per-account cumulative sum over the months.
+
     Args:
-        plan_cuentas_df: DataFrame containing chart of accounts
+        plan_cuentas_df: DataFrame (or PlanCuentas) containing chart of accounts
         libro_diario_df: DataFrame containing journal entries
-        
+        start_date: First day of the ledger period ('YYYY-MM-DD')
+        end_date: Last day of the ledger period ('YYYY-MM-DD'); the ledger
+            runs to the end of that month
+
     Returns:
         DataFrame: A pandas DataFrame containing general ledger information
     """
-    # Define date range for the simulation (3 years by months)
-    start_date = datetime.strptime('2020-01-01', '%Y-%m-%d')
-    end_date = datetime.strptime('2022-12-31', '%Y-%m-%d')
-    
-    # Generate a list of month-end dates
-    month_ends = []
-    current_date = start_date
-    while current_date <= end_date:
-        # Get the last day of the current month
-        if current_date.month == 12:
-            last_day = datetime(current_date.year, current_date.month, 31)
-        else:
-            last_day = datetime(current_date.year, current_date.month + 1, 1) - timedelta(days=1)
-        
-        month_ends.append(last_day.strftime('%Y-%m-%d'))
-        
-        # Move to the next month
-        if current_date.month == 12:
-            current_date = datetime(current_date.year + 1, 1, 1)
-        else:
-            current_date = datetime(current_date.year, current_date.month + 1, 1)
-    
-    # Initialize empty list for general ledger entries
-    libro_mayor_entries = []
-    
-    # Process each account
-    for _, cuenta in plan_cuentas_df.iterrows():
-        id_cuenta = cuenta['ID_Cuenta']
-        tipo_cuenta = cuenta['Tipo_Cuenta']
-        
-        # Initialize running balance
-        saldo_acumulado = 0
-        
-        # For asset and expense accounts, debits increase the balance
-        # For liability, equity, and income accounts, credits increase the balance
-        is_debit_account = tipo_cuenta in ['Activo', 'Gastos']
-        
-        # Process each month
-        for i, fecha in enumerate(month_ends):
-            # Get the start date for the period (first day of month or simulation start)
-            if i == 0:
-                start_period = start_date.strftime('%Y-%m-%d')
-            else:
-                prev_month_end = datetime.strptime(month_ends[i-1], '%Y-%m-%d')
-                start_period = (prev_month_end + timedelta(days=1)).strftime('%Y-%m-%d')
-            
-            # Get journal entries for this account and period
-            period_entries = libro_diario_df[
-                (libro_diario_df['ID_Cuenta'] == id_cuenta) & 
-                (libro_diario_df['Fecha_Transaccion'] >= start_period) & 
-                (libro_diario_df['Fecha_Transaccion'] <= fecha)
-            ]
-            
-            # Calculate total debits and credits for the period
-            total_debitos = period_entries['Debito'].sum()
-            total_creditos = period_entries['Credito'].sum()
-            
-            # Calculate the change in balance for the period
-            if is_debit_account:
-                cambio_saldo = total_debitos - total_creditos
-            else:
-                cambio_saldo = total_creditos - total_debitos
-            
-            # Calculate ending balance
-            saldo_final = saldo_acumulado + cambio_saldo
-            
-            # Add entry to the general ledger
-            libro_mayor_entries.append({
-                'ID_Cuenta': id_cuenta,
-                'Fecha': fecha,
-                'Saldo_Inicial': round(saldo_acumulado, 2),
-                'Debitos': round(total_debitos, 2),
-                'Creditos': round(total_creditos, 2),
-                'Saldo_Final': round(saldo_final, 2)
-            })
-            
-            # Update running balance for next period
-            saldo_acumulado = saldo_final
-    
-    # Create DataFrame from the list of general ledger entries
-    libro_mayor_df = pd.DataFrame(libro_mayor_entries)
-    
+    plan = PlanCuentas.de(plan_cuentas_df)
+    totales = acumular_movimientos_mensuales(plan, libro_diario_df, start_date, end_date)
+    return construir_libro_mayor(plan, totales, start_date, end_date)
+
+def meses_periodo(start_date, end_date):
+    """
+    Months covered by a ledger period.
+
+    Args:
+        start_date: First day of the period ('YYYY-MM-DD')
+        end_date: Last day of the period ('YYYY-MM-DD')
+
+    Returns:
+        PeriodIndex: Monthly periods from start_date to end_date inclusive
+    """
+    return pd.period_range(start=start_date, end=end_date, freq='M')
+
+def acumular_movimientos_mensuales(plan_cuentas_df, libro_diario_df, start_date, end_date):
+    """
+    Total debits and credits per account and month of the ledger period.
+
+    Totals of several journal chunks can simply be added together, so the
+    journal does not have to be in memory at once.
+
+    Args:
+        plan_cuentas_df: DataFrame (or PlanCuentas) containing chart of accounts
+        libro_diario_df: DataFrame (or chunk) containing journal entries
+        start_date: First day of the ledger period ('YYYY-MM-DD')
+        end_date: Last day of the ledger period ('YYYY-MM-DD')
+
+    Returns:
+        tuple: (debits, credits) as int64 cents arrays of shape
+            (accounts, months), with accounts in plan_cuentas_df order
+    """
+    plan = PlanCuentas.de(plan_cuentas_df)
+    meses = meses_periodo(start_date, end_date)
+    num_cuentas = len(plan)
+
+    # Dates repeat a lot, so the month of each distinct date is resolved once
+    codigos_fecha, fechas = pd.factorize(libro_diario_df['Fecha_Transaccion'])
+    fechas = pd.Index(fechas.astype(str))
+
+    # Period bounds as 'YYYY-MM-DD' strings, compared like the journal dates
+    inicio = pd.Timestamp(start_date).strftime('%Y-%m-%d')
+    fin = meses[-1].end_time.strftime('%Y-%m-%d')
+    mes_fecha = pd.Index(meses.strftime('%Y-%m')).get_indexer(fechas.str.slice(0, 7))
+    mes_fecha[(fechas < inicio) | (fechas > fin)] = -1
+
+    # Bucket every line by (account position, month position)
+    pos_cuenta = plan.posiciones(libro_diario_df['ID_Cuenta'])
+    pos_mes = mes_fecha[codigos_fecha]
+    validas = (pos_mes >= 0) & (pos_cuenta >= 0)
+    cubeta = pos_cuenta[validas] * len(meses) + pos_mes[validas]
+
+    forma = (num_cuentas, len(meses))
+    debitos = sumar_centavos(cubeta, a_centavos(libro_diario_df['Debito'].to_numpy()[validas]),
+                             minlength=num_cuentas * len(meses)).reshape(forma)
+    creditos = sumar_centavos(cubeta, a_centavos(libro_diario_df['Credito'].to_numpy()[validas]),
+                              minlength=num_cuentas * len(meses)).reshape(forma)
+    return debitos, creditos
+
+def construir_libro_mayor(plan_cuentas_df, totales, start_date, end_date, saldos_iniciales=None):
+    """
+    Build the general ledger from monthly debit and credit totals.
+
+    Args:
+        plan_cuentas_df: DataFrame (or PlanCuentas) containing chart of accounts
+        totales: (debits, credits) as returned by acumular_movimientos_mensuales
+        start_date: First day of the ledger period ('YYYY-MM-DD')
+        end_date: Last day of the ledger period ('YYYY-MM-DD')
+        saldos_iniciales: Optional opening balance per account, in
+            plan_cuentas_df order (defaults to zero)
+
+    Returns:
+        DataFrame: A pandas DataFrame containing general ledger information
+    """
+    plan = PlanCuentas.de(plan_cuentas_df)
+    debitos, creditos = totales
+    meses = meses_periodo(start_date, end_date)
+
+    # Debit-normal accounts grow with debits, credit-normal ones with credits
+    cambio_saldo = np.where(plan.deudoras[:, None], debitos - creditos, creditos - debitos)
+
+    # Running balance per account, exact in int64 cents
+    if saldos_iniciales is None:
+        saldos_iniciales = np.zeros(len(plan))
+    saldos_iniciales = a_centavos(saldos_iniciales)
+    cambio_saldo[:, 0] += saldos_iniciales
+    saldo_final = np.cumsum(cambio_saldo, axis=1)
+    saldo_inicial = np.column_stack([saldos_iniciales, saldo_final[:, :-1]])
+
+    num_meses = len(meses)
+    libro_mayor_df = pd.DataFrame({
+        'ID_Cuenta': np.repeat(plan.ids.to_numpy(), num_meses),
+        'Fecha': np.tile(meses.end_time.strftime('%Y-%m-%d').to_numpy(), len(plan)),
+        'Saldo_Inicial': a_moneda(saldo_inicial.ravel()),
+        'Debitos': a_moneda(debitos.ravel()),
+        'Creditos': a_moneda(creditos.ravel()),
+        'Saldo_Final': a_moneda(saldo_final.ravel())
+    })
+
     # Sort by account and date
-    libro_mayor_df = libro_mayor_df.sort_values(['ID_Cuenta', 'Fecha'])
-    
+    libro_mayor_df = libro_mayor_df.sort_values(['ID_Cuenta', 'Fecha'], kind='stable')
+
     # Reset index
     libro_mayor_df = libro_mayor_df.reset_index(drop=True)
-    
+
     # Return the DataFrame with columns in the correct order
-    return libro_mayor_df[['ID_Cuenta', 'Fecha', 'Saldo_Inicial', 'Debitos', 'Creditos', 'Saldo_Final']]
\ No newline at end of file
+    return libro_mayor_df[['ID_Cuenta', 'Fecha', 'Saldo_Inicial', 'Debitos', 'Creditos', 'Saldo_Final']]
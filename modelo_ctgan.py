@@ -0,0 +1,213 @@
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from dinero import a_centavos, a_moneda
+from ventas_generator import generate_ventas
+
+# Learned generator mode. A CTGAN is fitted (on CPU) to a seed table drawn
+# with the hand-written generators and then sampled for the full table.
+# Fitting takes minutes, so trained models are stored on disk under a hash
+# of the training data, the hyperparameters, the seed and the ctgan
+# version, and reused by every later run with the same inputs. Sampling is
+# done in large batches, each with its own seed, optionally over a process
+# pool, so the sample does not depend on the number of workers.
+# ctgan and torch are optional dependencies (requirements-ml.txt) and are
+# only imported here, when a model is fitted or sampled.
+
+HIPERPARAMETROS_CTGAN = {
+    'epochs': 300,
+    'batch_size': 500,
+    'embedding_dim': 128,
+    'generator_dim': (256, 256),
+    'discriminator_dim': (256, 256)
+}
+
+# Rows sampled per batch
+TAMANO_LOTE = 100000
+
+def entrenar_ctgan(datos, columnas_discretas, directorio_modelos, hiperparametros=None, semilla=0):
+    """
+    Fit a CTGAN to a table, or reuse the model already fitted to the same inputs.
+
+    Args:
+        datos: DataFrame to learn
+        columnas_discretas: Columns modelled as categories
+        directorio_modelos: Directory the trained models are stored in
+        hiperparametros: CTGAN arguments overriding HIPERPARAMETROS_CTGAN
+        semilla: Seed of the fit
+
+    Returns:
+        str: Path of the stored model
+    """
+    ctgan = _importar_ctgan()
+    hiperparametros = dict(HIPERPARAMETROS_CTGAN, **(hiperparametros or {}))
+    clave = clave_modelo(datos, columnas_discretas, hiperparametros, semilla, ctgan.__version__)
+    ruta = os.path.join(directorio_modelos, clave + '.pkl')
+    if os.path.exists(ruta):
+        print(f"Reusing CTGAN model {clave[:12]}")
+        return ruta
+
+    print(f"Fitting CTGAN model {clave[:12]} on {len(datos)} rows ({hiperparametros['epochs']} epochs)")
+    _fijar_semilla(None, semilla)
+    try:
+        modelo = ctgan.CTGAN(**hiperparametros, enable_gpu=False)
+    except TypeError:
+        # ctgan < 0.8 selects the device with 'cuda'
+        modelo = ctgan.CTGAN(**hiperparametros, cuda=False)
+    modelo.fit(datos, discrete_columns=list(columnas_discretas))
+
+    # Publish the model atomically, so a crash never leaves half a file
+    os.makedirs(directorio_modelos, exist_ok=True)
+    modelo.save(ruta + '.tmp')
+    os.replace(ruta + '.tmp', ruta)
+    return ruta
+
+def clave_modelo(datos, columnas_discretas, hiperparametros, semilla, version):
+    """
+    Key of a trained model: a hash of everything that determines the fit.
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    resumen = hashlib.sha256()
+    resumen.update(json.dumps({
+        'columnas': [[columna, str(tipo)] for columna, tipo in datos.dtypes.items()],
+        'discretas': sorted(columnas_discretas),
+        'hiperparametros': {clave: repr(valor) for clave, valor in sorted(hiperparametros.items())},
+        'semilla': int(semilla),
+        'version': version
+    }, sort_keys=True).encode('utf-8'))
+    resumen.update(pd.util.hash_pandas_object(datos, index=False).to_numpy().tobytes())
+    return resumen.hexdigest()
+
+def muestrear_ctgan(ruta, num_filas, semilla=0, tamano_lote=TAMANO_LOTE, workers=1):
+    """
+    Sample rows from a stored model in batches.
+
+    Batch i is sampled with a seed derived from (semilla, i), so the result
+    is the same for any number of workers.
+
+    Args:
+        ruta: Path from entrenar_ctgan
+        num_filas: Number of rows to sample
+        semilla: Seed of the sample
+        tamano_lote: Rows per batch
+        workers: Number of worker processes (each loads the model once)
+
+    Returns:
+        DataFrame
+    """
+    lotes = [(min(tamano_lote, num_filas - inicio), _semilla_lote(semilla, i))
+             for i, inicio in enumerate(range(0, num_filas, tamano_lote))]
+    workers = min(workers or os.cpu_count() or 1, len(lotes))
+    if workers <= 1:
+        _cargar_modelo(ruta, un_hilo=False)
+        muestras = [_muestrear_lote(*lote) for lote in lotes]
+    else:
+        # Spawned, not forked: torch's thread pools do not survive a fork
+        # of a process that has already used them
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_cargar_modelo, initargs=(ruta,)) as pool:
+            muestras = list(pool.map(_muestrear_lote, *zip(*lotes)))
+    return pd.concat(muestras, ignore_index=True) if muestras else pd.DataFrame()
+
+def generate_ventas_ctgan(clientes_df, productos_df, num_ventas=1000, start_date='2020-01-01',
+                          end_date='2023-12-31', filas_entrenamiento=10000, epochs=None,
+                          directorio_modelos='ctgan_models', workers=1):
+    """
+    Generate sales with a CTGAN fitted to a seed table of generated sales.
+
+    The seed table is drawn with the vectorized generate_ventas. The model
+    learns the joint distribution of day, client, product and quantity;
+    prices and totals come from the product catalog, so every sale stays
+    consistent (Total_Venta = Cantidad_Vendida x Precio_Unitario).
+
+    Args:
+        clientes_df: DataFrame containing client information
+        productos_df: DataFrame containing product information
+        num_ventas: Number of sales transactions to generate
+        start_date: First day of the simulation period ('YYYY-MM-DD')
+        end_date: Last day of the simulation period ('YYYY-MM-DD')
+        filas_entrenamiento: Rows of the seed table the model is fitted to
+        epochs: Training epochs (defaults to HIPERPARAMETROS_CTGAN)
+        directorio_modelos: Directory the trained models are stored in
+        workers: Number of worker processes for sampling
+
+    Returns:
+        DataFrame: Same columns as generate_ventas, sorted by date
+    """
+    semilla = np.random.randint(0, 2**31 - 1)
+    semilla_ventas = generate_ventas(clientes_df, productos_df, min(filas_entrenamiento, num_ventas),
+                                     vectorized=True, start_date=start_date, end_date=end_date)
+
+    inicio = np.datetime64(start_date, 'D')
+    dias = int((np.datetime64(end_date, 'D') - inicio).astype(int)) + 1
+    datos = pd.DataFrame({
+        'Dia': (np.asarray(semilla_ventas['Fecha'].to_numpy(), dtype='datetime64[D]') - inicio).astype(np.int64),
+        'ID_Cliente': semilla_ventas['ID_Cliente'].to_numpy(),
+        'ID_Producto': semilla_ventas['ID_Producto'].to_numpy(),
+        'Cantidad_Vendida': semilla_ventas['Cantidad_Vendida'].to_numpy()
+    })
+    hiperparametros = {} if epochs is None else {'epochs': epochs}
+    ruta = entrenar_ctgan(datos, ['ID_Cliente', 'ID_Producto'], directorio_modelos, hiperparametros, semilla)
+    muestras = muestrear_ctgan(ruta, num_ventas, semilla=semilla, workers=workers)
+
+    # Sampled values back into the table's domain: whole days inside the
+    # period, quantities of at least 1, and prices from the catalog
+    dia = np.clip(np.rint(muestras['Dia'].to_numpy(dtype=np.float64)), 0, dias - 1).astype(np.int64)
+    cantidad = np.maximum(np.rint(muestras['Cantidad_Vendida'].to_numpy(dtype=np.float64)), 1).astype(np.int64)
+    id_producto = muestras['ID_Producto'].to_numpy()
+    precio_unitario = productos_df.set_index('ID_Producto')['Precio_Venta_Unitario'] \
+        .reindex(id_producto).to_numpy()
+
+    orden = np.argsort(dia, kind='stable')
+    return pd.DataFrame({
+        'ID_Venta': np.arange(1, num_ventas + 1),
+        'Fecha': np.datetime_as_string(inicio + dia[orden], unit='D'),
+        'ID_Cliente': muestras['ID_Cliente'].to_numpy()[orden],
+        'ID_Producto': id_producto[orden],
+        'Cantidad_Vendida': cantidad[orden],
+        'Precio_Unitario': precio_unitario[orden],
+        'Total_Venta': a_moneda(cantidad[orden] * a_centavos(precio_unitario[orden]))
+    })
+
+# Model loaded by each sampling process
+_modelo = None
+
+def _cargar_modelo(ruta, un_hilo=True):
+    global _modelo
+    ctgan = _importar_ctgan()
+    if un_hilo:
+        import torch
+        # One thread per pool process; parallelism comes from the pool
+        torch.set_num_threads(1)
+    _modelo = ctgan.CTGAN.load(ruta)
+
+def _muestrear_lote(num_filas, semilla):
+    _fijar_semilla(_modelo, semilla)
+    return _modelo.sample(num_filas)
+
+def _fijar_semilla(modelo, semilla):
+    import torch
+    np.random.seed(semilla)
+    torch.manual_seed(semilla)
+    if modelo is not None and hasattr(modelo, 'set_random_state'):
+        modelo.set_random_state(semilla)
+
+def _semilla_lote(semilla, indice):
+    return int(np.random.SeedSequence([semilla, indice]).generate_state(1)[0])
+
+def _importar_ctgan():
+    """Import ctgan lazily; it is only needed by the learned generator mode."""
+    try:
+        import ctgan
+    except ImportError as e:
+        raise ImportError("ctgan is required for the CTGAN generator mode "
+                          "(pip install -r requirements-ml.txt)") from e
+    return ctgan
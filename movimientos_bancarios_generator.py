@@ -2,7 +2,31 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
-def generate_movimientos_bancarios(cuentas_bancarias_df, ventas_df, compras_df, num_movimientos_extra=200):
+from dinero import a_centavos, a_moneda
+from vocabularios import elegir_por_categoria
+from conceptos import SIN_REFERENCIA, codigos_plantilla, materializar_conceptos
+
+# Maximum payment delay in days (exclusive) after a sale or a purchase
+DEMORA_COBRO = 15
+DEMORA_PAGO = 30
+
+# Additional movements by type: probability, amount range and concepts
+MOVIMIENTOS_EXTRA = {
+    'Ingreso': {
+        'probabilidad': 0.4,
+        'monto': (1000, 50000),
+        'conceptos': ['Préstamo recibido', 'Devolución impuestos', 'Venta de activo', 'Inversión', 'Otros ingresos']
+    },
+    'Egreso': {
+        'probabilidad': 0.6,
+        'monto': (500, 30000),
+        'conceptos': ['Pago nómina', 'Servicios', 'Impuestos', 'Seguros', 'Mantenimiento', 'Alquiler', 'Otros gastos']
+    }
+}
+
+def generate_movimientos_bancarios(cuentas_bancarias_df, ventas_df, compras_df, num_movimientos_extra=200,
+                                   vectorized=False, start_date='2020-01-01', end_date='2023-12-31',
+                                   concept_templates=False):
     """
     Generate a synthetic dataset of bank transactions with realistic attributes.
     
@@ -11,13 +35,27 @@ def generate_movimientos_bancarios(cuentas_bancarias_df, ventas_df, compras_df,
         ventas_df: DataFrame containing sales information
         compras_df: DataFrame containing purchase information
         num_movimientos_extra: Number of additional transactions to generate
+        vectorized: If True, draw the whole table as NumPy arrays instead of
+            one movement at a time (same columns and distributions, different
+            random stream)
+        start_date: First day of the simulation period ('YYYY-MM-DD')
+        end_date: Last day of the simulation period ('YYYY-MM-DD'); later
+            payments are moved to this day
+        concept_templates: If True, store every Concepto as a template code
+            plus the referenced ID (conceptos.COLUMNAS_PLANTILLA) instead of
+            a string; implies vectorized
         
     Returns:
         DataFrame: A pandas DataFrame containing bank transaction information
     """
-    # Define date range for the simulation (4 years)
-    start_date = datetime.strptime('2020-01-01', '%Y-%m-%d')
-    end_date = datetime.strptime('2023-12-31', '%Y-%m-%d')
+    if vectorized or concept_templates:
+        return _generate_movimientos_bancarios_vectorized(cuentas_bancarias_df, ventas_df, compras_df,
+                                                          num_movimientos_extra, start_date, end_date,
+                                                          concept_templates)
+    
+    # Define date range for the simulation
+    start_date = datetime.strptime(start_date, '%Y-%m-%d')
+    end_date = datetime.strptime(end_date, '%Y-%m-%d')
     days_range = (end_date - start_date).days
     
     # Create transactions based on sales (ingresos)
@@ -116,4 +154,84 @@ def generate_movimientos_bancarios(cuentas_bancarias_df, ventas_df, compras_df,
     all_movimientos['ID_Movimiento'] = range(1, len(all_movimientos) + 1)
     
     # Return the DataFrame with columns in the correct order
-    return all_movimientos[['ID_Movimiento', 'ID_Cuenta_Bancaria', 'Fecha', 'Tipo', 'Monto', 'Concepto']]
\ No newline at end of file
+    return all_movimientos[['ID_Movimiento', 'ID_Cuenta_Bancaria', 'Fecha', 'Tipo', 'Monto', 'Concepto']]
+
+def _generate_movimientos_bancarios_vectorized(cuentas_bancarias_df, ventas_df, compras_df, num_movimientos_extra,
+                                               start_date='2020-01-01', end_date='2023-12-31',
+                                               concept_templates=False):
+    """
+    Vectorized version of generate_movimientos_bancarios.
+    
+    Source dates are parsed once as datetime64 and every delay, account and
+    amount is drawn as a single array, so the cost grows with the array
+    size rather than with per-row Python work. Extra movements are drawn
+    over the whole period, end_date included. Concepts are built encoded
+    and only turned into text unless concept_templates is set.
+    """
+    # Define date range for the simulation
+    start_date = np.datetime64(start_date, 'D')
+    end_date = np.datetime64(end_date, 'D')
+    days_range = int((end_date - start_date).astype(int)) + 1
+    
+    cuentas = cuentas_bancarias_df['ID_Cuenta_Bancaria'].to_numpy()
+    num_ventas = len(ventas_df)
+    num_compras = len(compras_df)
+    
+    # Collections of sales (ingresos), paid 0-14 days after the sale and
+    # clipped to the end of the simulation period
+    cuenta_ventas = np.random.choice(cuentas, size=num_ventas)
+    fecha_ventas = np.asarray(ventas_df['Fecha'].to_numpy(), dtype='datetime64[D]')
+    fecha_cobro = np.minimum(fecha_ventas + np.random.randint(0, DEMORA_COBRO, size=num_ventas), end_date)
+    
+    # Payments of purchases (egresos), paid 0-29 days after the purchase
+    cuenta_compras = np.random.choice(cuentas, size=num_compras)
+    fecha_compras = np.asarray(compras_df['Fecha_Compra'].to_numpy(), dtype='datetime64[D]')
+    fecha_pago = np.minimum(fecha_compras + np.random.randint(0, DEMORA_PAGO, size=num_compras), end_date)
+    
+    # Additional transactions: date, account and type first, then the amount
+    # range and concept of each row's type
+    fecha_extra = start_date + np.random.randint(0, days_range, size=num_movimientos_extra)
+    cuenta_extra = np.random.choice(cuentas, size=num_movimientos_extra)
+    tipos = list(MOVIMIENTOS_EXTRA)
+    codigo_tipo = np.random.choice(len(tipos), size=num_movimientos_extra,
+                                   p=[MOVIMIENTOS_EXTRA[tipo]['probabilidad'] for tipo in tipos])
+    
+    monto_min = np.array([MOVIMIENTOS_EXTRA[tipo]['monto'][0] for tipo in tipos], dtype=float)[codigo_tipo]
+    monto_max = np.array([MOVIMIENTOS_EXTRA[tipo]['monto'][1] for tipo in tipos], dtype=float)[codigo_tipo]
+    monto_extra = a_moneda(a_centavos(np.random.uniform(monto_min, monto_max)))
+    
+    concepto_extra = elegir_por_categoria(codigo_tipo, [MOVIMIENTOS_EXTRA[tipo]['conceptos'] for tipo in tipos])
+    
+    # Combine all transactions and sort by date on the datetime64 values
+    # (stable, so same-day movements keep sales, purchases, extras order)
+    fechas = np.concatenate([fecha_cobro, fecha_pago, fecha_extra])
+    orden = np.argsort(fechas, kind='stable')
+    
+    df = pd.DataFrame({
+        'ID_Movimiento': np.arange(1, len(fechas) + 1),
+        'ID_Cuenta_Bancaria': np.concatenate([cuenta_ventas, cuenta_compras, cuenta_extra])[orden],
+        'Fecha': np.datetime_as_string(fechas[orden], unit='D'),
+        'Tipo': np.concatenate([
+            np.full(num_ventas, 'Ingreso', dtype=object),
+            np.full(num_compras, 'Egreso', dtype=object),
+            np.array(tipos, dtype=object)[codigo_tipo]
+        ])[orden],
+        'Monto': np.concatenate([
+            ventas_df['Total_Venta'].to_numpy(dtype=float),
+            compras_df['Costo_Total_Compra'].to_numpy(dtype=float),
+            monto_extra
+        ])[orden],
+        'Concepto_Plantilla': np.concatenate([
+            np.repeat(codigos_plantilla(["Cobro venta #{ID_Venta}"]), num_ventas),
+            np.repeat(codigos_plantilla(["Pago compra #{ID_Compra}"]), num_compras),
+            codigos_plantilla(concepto_extra)
+        ])[orden],
+        'Concepto_Ref1': np.concatenate([
+            ventas_df['ID_Venta'].to_numpy(dtype=np.int64),
+            compras_df['ID_Compra'].to_numpy(dtype=np.int64),
+            np.full(num_movimientos_extra, SIN_REFERENCIA, dtype=np.int64)
+        ])[orden],
+        'Concepto_Ref2': np.full(len(fechas), SIN_REFERENCIA, dtype=np.int64)
+    })
+    
+    return df if concept_templates else materializar_conceptos(df)
@@ -0,0 +1,412 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from dinero import a_moneda
+from conceptos import PLANTILLAS_CONCEPTO, materializar_conceptos
+
+# Column types of every output table, used by the Arrow-based backends.
+# 'date' is date32, 'category' a dictionary-encoded string and 'money' a
+# decimal(18, 2) (or int64 cents with money='cents'). Columns not listed
+# keep the type Arrow infers. Tables with encoded concepts (see conceptos)
+# keep them encoded and carry the templates in the schema metadata.
+ESQUEMAS = {
+    'plan_cuentas': {
+        'ID_Cuenta': 'int32', 'Nombre_Cuenta': 'category', 'Tipo_Cuenta': 'category',
+        'Clasificacion': 'category'
+    },
+    'clientes': {
+        'ID_Cliente': 'int64', 'Nombre': 'category', 'Categoria': 'category'
+    },
+    'productos': {
+        'ID_Producto': 'int64', 'Nombre_Producto': 'string', 'Categoria': 'category',
+        'Precio_Venta_Unitario': 'money', 'Costo_Variable_Unitario': 'money'
+    },
+    'activos': {
+        'ID_Activo': 'int64', 'Nombre_Activo': 'string', 'Tipo_Activo': 'category',
+        'Fecha_Compra': 'date', 'Costo_Adquisicion': 'money', 'Vida_Util_Anios': 'int32',
+        'Valor_Residual': 'money', 'Depreciacion_Acumulada': 'money', 'Valor_Neto_Libros': 'money'
+    },
+    'cuentas_bancarias': {
+        'ID_Cuenta_Bancaria': 'int64', 'Banco': 'category', 'Tipo_Cuenta': 'category',
+        'Saldo_Inicial': 'money', 'Moneda': 'category'
+    },
+    'ventas': {
+        'ID_Venta': 'int64', 'Fecha': 'date', 'ID_Cliente': 'int64', 'ID_Producto': 'int64',
+        'Cantidad_Vendida': 'int64', 'Precio_Unitario': 'money', 'Total_Venta': 'money'
+    },
+    'compras': {
+        'ID_Compra': 'int64', 'ID_Producto': 'int64', 'Fecha_Compra': 'date',
+        'Cantidad_Adquirida': 'int64', 'Costo_Unitario': 'money', 'Costo_Total_Compra': 'money'
+    },
+    'movimientos_bancarios': {
+        'ID_Movimiento': 'int64', 'ID_Cuenta_Bancaria': 'int64', 'Fecha': 'date',
+        'Tipo': 'category', 'Monto': 'money', 'Concepto': 'category',
+        'Concepto_Plantilla': 'int16', 'Concepto_Ref1': 'int64', 'Concepto_Ref2': 'int64'
+    },
+    'libro_diario': {
+        'ID_Asiento': 'int64', 'Fecha_Transaccion': 'date', 'ID_Cuenta': 'int32',
+        'Concepto': 'category', 'Debito': 'money', 'Credito': 'money',
+        'Concepto_Plantilla': 'int16', 'Concepto_Ref1': 'int64', 'Concepto_Ref2': 'int64'
+    },
+    'libro_mayor': {
+        'ID_Cuenta': 'int32', 'Fecha': 'date', 'Saldo_Inicial': 'money', 'Debitos': 'money',
+        'Creditos': 'money', 'Saldo_Final': 'money'
+    }
+}
+
+class CSVBackend:
+    """Write tables as UTF-8 CSV files. Encoded concepts are written as text."""
+
+    extension = '.csv'
+    # Whether encoded concept columns are stored as they are
+    conceptos_codificados = False
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+
+    def ruta(self, nombre):
+        return os.path.join(self.output_dir, nombre + self.extension)
+
+    def write(self, nombre, df):
+        materializar_conceptos(df).to_csv(self.ruta(nombre), index=False, encoding='utf-8')
+        print(f"Saved {nombre}{self.extension} with {len(df)} records")
+
+    def open(self, nombre):
+        return ChunkedCSVWriter(self.ruta(nombre))
+
+    def exists(self, nombre):
+        return os.path.exists(self.ruta(nombre))
+
+    def columnas(self, nombre):
+        """Column names of a stored table, without reading its rows."""
+        return list(pd.read_csv(self.ruta(nombre), nrows=0, encoding='utf-8').columns)
+
+    def read(self, nombre, columnas=None):
+        # Account IDs are codes like '1001', not numbers
+        return pd.read_csv(self.ruta(nombre), usecols=columnas, dtype={'ID_Cuenta': str}, encoding='utf-8')
+
+    def read_chunks(self, nombre, columnas=None, chunk_size=1000000):
+        """Read a table in chunks of chunk_size rows."""
+        yield from pd.read_csv(self.ruta(nombre), usecols=columnas, dtype={'ID_Cuenta': str}, encoding='utf-8',
+                               chunksize=chunk_size)
+
+    def append(self, nombre, df):
+        materializar_conceptos(df).to_csv(self.ruta(nombre), mode='a', header=not self.exists(nombre), index=False,
+                                          encoding='utf-8')
+        print(f"Appended {len(df)} records to {nombre}{self.extension}")
+
+class ChunkedCSVWriter:
+    """
+    Append DataFrame chunks to a CSV file as they are produced.
+
+    The header is written with the first chunk only, so the file ends up
+    identical to writing the concatenated chunks at once.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.rows = 0
+        self._header = True
+        # Start from an empty file
+        open(filepath, 'w', encoding='utf-8').close()
+
+    def write(self, chunk):
+        materializar_conceptos(chunk).to_csv(self.filepath, mode='a', header=self._header, index=False,
+                                             encoding='utf-8')
+        self._header = False
+        self.rows += len(chunk)
+
+    def close(self):
+        print(f"Saved {os.path.basename(self.filepath)} with {self.rows} records")
+
+class ParquetBackend(CSVBackend):
+    """
+    Write tables as Parquet files with the typed schemas in ESQUEMAS.
+
+    Appended rows go to numbered part files in a directory named after the
+    table (e.g. libro_diario/part-0001.parquet), so extending a table never
+    rewrites it; reads return the table file followed by its parts.
+
+    Args:
+        output_dir: Directory the files are written to
+        compression: Parquet codec ('zstd', 'snappy', 'gzip', 'none', ...)
+        row_group_size: Maximum number of rows per row group
+        money: 'decimal' for decimal(18, 2) or 'cents' for int64 cents
+    """
+
+    extension = '.parquet'
+    conceptos_codificados = True
+
+    def __init__(self, output_dir, compression='zstd', row_group_size=1000000, money='decimal'):
+        super().__init__(output_dir)
+        self.pa, self.pq = _importar_pyarrow(self.formato)
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.money = money
+
+    def write(self, nombre, df):
+        self._borrar_partes(nombre)
+        self._escribir(self.ruta(nombre), a_tabla_arrow(nombre, df, self.money, formato=self.formato))
+        print(f"Saved {nombre}{self.extension} with {len(df)} records")
+
+    def open(self, nombre):
+        self._borrar_partes(nombre)
+        return _ChunkedArrowWriter(
+            self, nombre,
+            lambda esquema: self.pq.ParquetWriter(self.ruta(nombre), esquema, compression=self.compression),
+            lambda writer, tabla: writer.write_table(tabla, row_group_size=self.row_group_size)
+        )
+
+    def columnas(self, nombre):
+        return self.pq.read_schema(self.ruta(nombre)).names
+
+    def read(self, nombre, columnas=None):
+        partes = [de_tabla_arrow(nombre, self._leer(ruta, columnas)) for ruta in self.archivos(nombre)]
+        return partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
+
+    def read_chunks(self, nombre, columnas=None, chunk_size=1000000):
+        for ruta in self.archivos(nombre):
+            for lote in self.pq.ParquetFile(ruta).iter_batches(batch_size=chunk_size, columns=columnas):
+                yield de_tabla_arrow(nombre, self.pa.Table.from_batches([lote]))
+
+    def append(self, nombre, df):
+        # Parquet and Feather files cannot be extended in place: the new
+        # rows are written as the table's next part file
+        if not self.exists(nombre):
+            self.write(nombre, df)
+            return
+        codificados = 'Concepto_Plantilla' in self.columnas(nombre)
+        if codificados != ('Concepto_Plantilla' in df):
+            # Mixing both would mean rewriting the whole table as text
+            raise ValueError(f"Cannot append rows with {'text' if codificados else 'encoded'} concepts to "
+                             f"{nombre}{self.extension}, whose concepts are {'encoded' if codificados else 'text'}")
+        directorio = self._directorio_partes(nombre)
+        os.makedirs(directorio, exist_ok=True)
+        numero = len(self.archivos(nombre))
+        self._escribir(os.path.join(directorio, f"part-{numero:04d}{self.extension}"),
+                       a_tabla_arrow(nombre, df, self.money, formato=self.formato))
+        print(f"Appended {len(df)} records to {nombre}{self.extension} (part {numero})")
+
+    @property
+    def formato(self):
+        """Output format name, as in FORMATOS."""
+        return self.extension[1:]
+
+    def archivos(self, nombre):
+        """Files of a stored table: the table file followed by its appended parts, in order."""
+        directorio = self._directorio_partes(nombre)
+        partes = sorted(os.listdir(directorio)) if os.path.isdir(directorio) else []
+        return [self.ruta(nombre)] + [os.path.join(directorio, parte) for parte in partes
+                                      if parte.startswith('part-') and parte.endswith(self.extension)]
+
+    def _escribir(self, ruta, tabla):
+        self.pq.write_table(tabla, ruta, compression=self.compression, row_group_size=self.row_group_size)
+
+    def _leer(self, ruta, columnas):
+        return self.pq.read_table(ruta, columns=columnas)
+
+    def _directorio_partes(self, nombre):
+        return os.path.join(self.output_dir, nombre)
+
+    def _borrar_partes(self, nombre):
+        # A rewritten table starts without the parts appended to the old one
+        if os.path.isdir(self._directorio_partes(nombre)):
+            shutil.rmtree(self._directorio_partes(nombre))
+
+class FeatherBackend(ParquetBackend):
+    """
+    Write tables as Feather v2 (Arrow IPC) files with the typed schemas in
+    ESQUEMAS. Appended rows go to part files, as in ParquetBackend.
+
+    Args:
+        output_dir: Directory the files are written to
+        compression: IPC buffer codec ('zstd', 'lz4' or 'none')
+        row_group_size: Maximum number of rows per record batch
+        money: 'decimal' for decimal(18, 2) or 'cents' for int64 cents
+    """
+
+    extension = '.feather'
+
+    def _escribir(self, ruta, tabla):
+        # The whole table is converted at once, so every category column
+        # gets a single dictionary shared by all its record batches
+        with self.pa.ipc.new_file(ruta, tabla.schema, options=self._opciones_ipc()) as writer:
+            writer.write_table(tabla, max_chunksize=self.row_group_size)
+
+    def open(self, nombre):
+        self._borrar_partes(nombre)
+        # The IPC file format needs one dictionary per column for the whole
+        # file, so categories are written as plain strings when streaming
+        opciones = self._opciones_ipc()
+        return _ChunkedArrowWriter(
+            self, nombre,
+            lambda esquema: self.pa.ipc.new_file(self.ruta(nombre), esquema, options=opciones),
+            lambda writer, tabla: writer.write_table(tabla, max_chunksize=self.row_group_size),
+            diccionarios=False
+        )
+
+    def _opciones_ipc(self):
+        return self.pa.ipc.IpcWriteOptions(compression=None if self.compression == 'none' else self.compression)
+
+    def columnas(self, nombre):
+        with self.pa.memory_map(self.ruta(nombre)) as archivo:
+            return self.pa.ipc.open_file(archivo).schema.names
+
+    def read_chunks(self, nombre, columnas=None, chunk_size=1000000):
+        import pyarrow.feather
+        for ruta in self.archivos(nombre):
+            tabla = pyarrow.feather.read_table(ruta, columns=columnas, memory_map=True)
+            for lote in tabla.to_batches(max_chunksize=chunk_size):
+                yield de_tabla_arrow(nombre, self.pa.Table.from_batches([lote]))
+
+    def _leer(self, ruta, columnas):
+        import pyarrow.feather
+        return pyarrow.feather.read_table(ruta, columns=columnas)
+
+class _ChunkedArrowWriter:
+    """Append DataFrame chunks to an Arrow-based file opened on the first chunk."""
+
+    def __init__(self, backend, nombre, abrir, escribir, diccionarios=True):
+        self.backend = backend
+        self.nombre = nombre
+        self.rows = 0
+        self._abrir = abrir
+        self._escribir = escribir
+        self._diccionarios = diccionarios
+        self._writer = None
+
+    def write(self, chunk):
+        tabla = a_tabla_arrow(self.nombre, chunk, self.backend.money, self._diccionarios,
+                              formato=self.backend.formato)
+        if self._writer is None:
+            self._writer = self._abrir(tabla.schema)
+        self._escribir(self._writer, tabla)
+        self.rows += len(chunk)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        print(f"Saved {self.nombre}{self.backend.extension} with {self.rows} records")
+
+# Output formats selectable per run
+FORMATOS = {
+    'csv': CSVBackend,
+    'parquet': ParquetBackend,
+    'feather': FeatherBackend
+}
+
+def crear_backend(formato, output_dir, **opciones):
+    """
+    Create the output backend for a run.
+
+    Args:
+        formato: One of FORMATOS ('csv', 'parquet' or 'feather')
+        output_dir: Directory the files are written to
+        **opciones: Backend options (compression, row_group_size, money);
+            ignored by the CSV backend
+
+    Returns:
+        An object with write(nombre, df) and open(nombre) -> writer with
+        write(chunk) and close()
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Unknown output format '{formato}'; expected one of {sorted(FORMATOS)}")
+    if formato == 'csv':
+        return CSVBackend(output_dir)
+    opciones = {clave: valor for clave, valor in opciones.items() if valor is not None}
+    return FORMATOS[formato](output_dir, **opciones)
+
+def a_tabla_arrow(nombre, df, money='decimal', diccionarios=True, formato='parquet'):
+    """
+    Convert a DataFrame to an Arrow table with the column types in ESQUEMAS.
+
+    Args:
+        nombre: Table name, a key of ESQUEMAS
+        df: DataFrame to convert
+        money: 'decimal' for decimal(18, 2) or 'cents' for int64 cents
+        diccionarios: If False, 'category' columns are written as plain strings
+        formato: Output format the table is for, named if pyarrow is missing
+
+    Returns:
+        pyarrow.Table
+    """
+    pa, _ = _importar_pyarrow(formato)
+    tipos = ESQUEMAS.get(nombre, {})
+
+    columnas = []
+    campos = []
+    for columna in df.columns:
+        valores = df[columna]
+        tipo = tipos.get(columna)
+        metadata = None
+        if tipo == 'date':
+            array = pa.array(np.asarray(valores, dtype='datetime64[D]'), type=pa.date32())
+        elif tipo in ('int16', 'int32', 'int64'):
+            array = pa.array(valores.to_numpy(dtype=tipo))
+        elif tipo == 'category':
+            array = pa.array(valores.astype(str).to_numpy(dtype=object), type=pa.string())
+            if diccionarios:
+                array = array.dictionary_encode()
+        elif tipo == 'string':
+            array = pa.array(valores.astype(str).to_numpy(dtype=object), type=pa.string())
+        elif tipo == 'money' and money == 'cents':
+            array = pa.array(np.rint(valores.to_numpy(dtype=np.float64) * 100).astype(np.int64))
+            metadata = {b'unit': b'cents'}
+        elif tipo == 'money':
+            array = pa.array(valores.to_numpy(dtype=np.float64)).cast(pa.decimal128(18, 2))
+        else:
+            array = pa.array(valores.to_numpy())
+        columnas.append(array)
+        campos.append(pa.field(columna, array.type, metadata=metadata))
+
+    metadata = None
+    if 'Concepto_Plantilla' in df.columns:
+        metadata = {b'plantillas_concepto': json.dumps(PLANTILLAS_CONCEPTO, ensure_ascii=False).encode('utf-8')}
+    return pa.Table.from_arrays(columnas, schema=pa.schema(campos, metadata=metadata))
+
+def de_tabla_arrow(nombre, tabla):
+    """
+    Convert an Arrow table written by a_tabla_arrow back to a DataFrame
+    with the column types the generators produce.
+
+    Dates become 'YYYY-MM-DD' strings, account IDs strings, categories
+    plain strings and money float amounts. Encoded concepts stay encoded
+    (see conceptos.materializar_conceptos).
+
+    Args:
+        nombre: Table name, a key of ESQUEMAS
+        tabla: pyarrow.Table
+
+    Returns:
+        DataFrame
+    """
+    tipos = ESQUEMAS.get(nombre, {})
+    df = tabla.to_pandas()
+    for campo in tabla.schema:
+        columna = campo.name
+        tipo = tipos.get(columna)
+        if tipo == 'date':
+            df[columna] = pd.to_datetime(df[columna]).dt.strftime('%Y-%m-%d')
+        elif columna == 'ID_Cuenta':
+            df[columna] = df[columna].astype(str)
+        elif tipo == 'category':
+            df[columna] = df[columna].astype(str)
+        elif tipo == 'money' and campo.metadata and campo.metadata.get(b'unit') == b'cents':
+            df[columna] = a_moneda(df[columna].to_numpy())
+        elif tipo == 'money':
+            df[columna] = df[columna].astype(float)
+    return df
+
+def _importar_pyarrow(formato):
+    """Import pyarrow lazily; it is only needed by the Arrow-based backends."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(f"pyarrow is required for the {formato} output format "
+                          f"(pip install pyarrow)") from e
+    return pyarrow, pyarrow.parquet
@@ -0,0 +1,310 @@
+import os
+import random
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from instrumentacion import medir_llamada
+from almacen_columnar import TablaColumnar, guardar_columnar
+from plan_cuentas_generator import generate_plan_cuentas
+from clientes_generator import generate_clientes
+from productos_generator import generate_productos
+from activos_generator import generate_activos
+from cuentas_bancarias_generator import generate_cuentas_bancarias
+from ventas_generator import generate_ventas
+from compras_generator import generate_compras
+from movimientos_bancarios_generator import generate_movimientos_bancarios
+from libro_diario_generator import generate_libro_diario
+from libro_mayor_generator import generate_libro_mayor
+
+# Pipeline stages as a DAG: each table names its generator, the upstream
+# tables passed to it positionally (in order), extra keyword arguments and
+# the file it is saved to. A stage may also set 'columnar': True if its
+# generator takes almacen_columnar.TablaColumnar references as inputs.
+ETAPAS = {
+    'plan_cuentas': {
+        'funcion': generate_plan_cuentas,
+        'entradas': [],
+        'parametros': {},
+        'archivo': 'plan_cuentas.csv'
+    },
+    'clientes': {
+        'funcion': generate_clientes,
+        'entradas': [],
+        'parametros': {'vectorized': True},
+        'archivo': 'clientes.csv'
+    },
+    'productos': {
+        'funcion': generate_productos,
+        'entradas': [],
+        'parametros': {'vectorized': True},
+        'archivo': 'productos.csv'
+    },
+    'activos': {
+        'funcion': generate_activos,
+        'entradas': [],
+        'parametros': {'vectorized': True},
+        'archivo': 'activos.csv'
+    },
+    'cuentas_bancarias': {
+        'funcion': generate_cuentas_bancarias,
+        'entradas': [],
+        'parametros': {},
+        'archivo': 'cuentas_bancarias.csv'
+    },
+    'ventas': {
+        'funcion': generate_ventas,
+        'entradas': ['clientes', 'productos'],
+        'parametros': {'vectorized': True},
+        'archivo': 'ventas.csv'
+    },
+    'compras': {
+        'funcion': generate_compras,
+        'entradas': ['productos'],
+        'parametros': {'vectorized': True},
+        'archivo': 'compras.csv'
+    },
+    'movimientos_bancarios': {
+        'funcion': generate_movimientos_bancarios,
+        'entradas': ['cuentas_bancarias', 'ventas', 'compras'],
+        'parametros': {'vectorized': True},
+        'archivo': 'movimientos_bancarios.csv'
+    },
+    'libro_diario': {
+        'funcion': generate_libro_diario,
+        'entradas': ['plan_cuentas', 'ventas', 'compras', 'movimientos_bancarios', 'productos'],
+        'parametros': {},
+        'archivo': 'libro_diario.csv'
+    },
+    'libro_mayor': {
+        'funcion': generate_libro_mayor,
+        'entradas': ['plan_cuentas', 'libro_diario'],
+        'parametros': {},
+        'archivo': 'libro_mayor.csv'
+    }
+}
+
+def semilla_etapa(seed, nombre):
+    """
+    Derive the RNG seed of a stage from the run seed and the stage name.
+
+    The seed depends only on (seed, nombre), so a stage draws the same
+    numbers whichever worker runs it and whenever it is scheduled.
+
+    Args:
+        seed: Seed of the whole run
+        nombre: Stage name
+
+    Returns:
+        int: 32-bit seed for the stage
+    """
+    secuencia = np.random.SeedSequence([seed, zlib.crc32(nombre.encode('utf-8'))])
+    return int(secuencia.generate_state(1)[0])
+
+def orden_topologico(etapas):
+    """
+    Order stages so that every stage comes after its inputs.
+
+    Args:
+        etapas: Stage definitions as in ETAPAS
+
+    Returns:
+        list: Stage names in dependency order (ties keep definition order)
+    """
+    orden = []
+    pendientes = list(etapas)
+    while pendientes:
+        listas = [nombre for nombre in pendientes
+                  if all(entrada in orden for entrada in etapas[nombre]['entradas'])]
+        if not listas:
+            raise ValueError(f"Stages with missing or cyclic inputs: {pendientes}")
+        orden.extend(listas)
+        pendientes = [nombre for nombre in pendientes if nombre not in listas]
+    return orden
+
+def dependencias(etapas, nombres):
+    """
+    Stages needed to produce some stages: the stages themselves and all
+    their upstream stages.
+
+    Args:
+        etapas: Stage definitions as in ETAPAS
+        nombres: Stage names
+
+    Returns:
+        list: Stage names in dependency order
+    """
+    necesarias = set()
+    pendientes = list(nombres)
+    while pendientes:
+        nombre = pendientes.pop()
+        if nombre not in etapas:
+            raise KeyError(f"Unknown stage '{nombre}'; expected one of {list(etapas)}")
+        if nombre not in necesarias:
+            necesarias.add(nombre)
+            pendientes.extend(etapas[nombre]['entradas'])
+    return [nombre for nombre in orden_topologico(etapas) if nombre in necesarias]
+
+def ejecutar_etapa(funcion, entradas, parametros, semilla, destino=None, columnar=False):
+    """
+    Run one stage with its own deterministic RNG state.
+
+    Args:
+        funcion: Generator function of the stage
+        entradas: Upstream DataFrames or TablaColumnar references, in the
+            order the function expects them
+        parametros: Extra keyword arguments for the function
+        semilla: Seed from semilla_etapa
+        destino: If set, store the table in this columnar directory and
+            return a TablaColumnar reference instead of the DataFrame
+        columnar: If True, pass TablaColumnar inputs to the function as
+            they are instead of reading them into DataFrames
+
+    Returns:
+        DataFrame (or TablaColumnar): The generated table
+    """
+    np.random.seed(semilla)
+    random.seed(semilla)
+    df = funcion(*_entradas_etapa(entradas, columnar), **parametros)
+    return df if destino is None else guardar_columnar(destino, df)
+
+def ejecutar_etapa_medida(funcion, entradas, parametros, semilla, destino=None, columnar=False,
+                          ruta_perfil=None, perfilador='cprofile'):
+    """
+    Like ejecutar_etapa, also measuring the stage.
+
+    Returns:
+        tuple: (DataFrame or TablaColumnar, metrics from instrumentacion.medir_llamada)
+    """
+    np.random.seed(semilla)
+    random.seed(semilla)
+    df, metricas = medir_llamada(funcion, _entradas_etapa(entradas, columnar), parametros, ruta_perfil, perfilador)
+    return (df if destino is None else guardar_columnar(destino, df)), metricas
+
+def _entradas_etapa(entradas, columnar):
+    """Read TablaColumnar inputs (memory-mapped) unless the stage takes references."""
+    if columnar:
+        return list(entradas)
+    return [entrada.leer() if isinstance(entrada, TablaColumnar) else entrada for entrada in entradas]
+
+def ejecutar_pipeline(etapas=None, seed=42, workers=None, al_completar=None, cache=None,
+                      instrumentacion=None, intermedios=None, previas=None):
+    """
+    Run the pipeline, executing independent stages concurrently.
+
+    A stage is submitted to the process pool as soon as all its inputs are
+    available. With workers=1 the stages run in-process in topological
+    order; the output is the same for any number of workers.
+
+    With a cache, every stage whose key is already stored is loaded instead
+    of generated, and every generated stage is stored.
+
+    With instrumentation, every stage is measured in the process that runs
+    it and its metrics are registered as it completes.
+
+    With an intermediates directory, every table is stored there in the
+    columnar format of almacen_columnar and handed to downstream stages as a
+    reference: worker processes memory-map the columns they read instead of
+    exchanging pickled DataFrames with this process.
+
+    Args:
+        etapas: Stage definitions (defaults to ETAPAS)
+        seed: Seed of the whole run
+        workers: Number of worker processes (defaults to the CPU count)
+        al_completar: Optional callback(nombre, df) called as each stage finishes
+        cache: Optional cache.CacheEtapas of stage outputs
+        instrumentacion: Optional instrumentacion.Instrumentacion collecting
+            per-stage metrics
+        intermedios: Optional directory for the columnar intermediate tables
+        previas: Optional tables already available, by stage name; these
+            stages are neither run nor loaded and their tables are handed to
+            downstream stages as they are
+
+    Returns:
+        dict: Generated DataFrames by stage name (memory-mapped when
+            intermedios is set), without the previas
+    """
+    if etapas is None:
+        etapas = ETAPAS
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    orden = orden_topologico(etapas)
+    # Inputs handed to stages (references with intermedios) and results
+    tablas = dict(previas or {})
+    resultados = {}
+
+    # Cache keys depend only on upstream keys, so they are known up front
+    claves = {}
+    if cache is not None:
+        for nombre in orden:
+            claves[nombre] = cache.clave(nombre, etapas[nombre], semilla_etapa(seed, nombre),
+                                         [claves[entrada] for entrada in etapas[nombre]['entradas']])
+
+    def completar(nombre, df, generada=True):
+        if isinstance(df, TablaColumnar):
+            tablas[nombre], df = df, df.leer()
+        elif intermedios is not None:
+            tablas[nombre] = guardar_columnar(os.path.join(intermedios, nombre), df)
+        else:
+            tablas[nombre] = df
+        resultados[nombre] = df
+        if cache is not None and generada:
+            cache.guardar(claves[nombre], df)
+        if al_completar is not None:
+            al_completar(nombre, df)
+
+    def completar_medida(nombre, resultado):
+        if instrumentacion is None:
+            completar(nombre, resultado)
+        else:
+            df, metricas = resultado
+            instrumentacion.registrar(nombre, origen='generated', **metricas)
+            completar(nombre, df)
+
+    if cache is not None:
+        for nombre in orden:
+            if nombre in tablas:
+                continue
+            inicio = time.perf_counter()
+            df = cache.cargar(claves[nombre])
+            if df is not None:
+                if instrumentacion is not None:
+                    instrumentacion.registrar(nombre, origen='cache', segundos=time.perf_counter() - inicio,
+                                              filas=len(df))
+                completar(nombre, df, generada=False)
+
+    def argumentos(nombre):
+        etapa = etapas[nombre]
+        trabajo = (etapa['funcion'], [tablas[entrada] for entrada in etapa['entradas']],
+                   etapa['parametros'], semilla_etapa(seed, nombre),
+                   os.path.join(intermedios, nombre) if intermedios is not None else None,
+                   etapa.get('columnar', False))
+        if instrumentacion is None:
+            return (ejecutar_etapa,) + trabajo
+        return (ejecutar_etapa_medida,) + trabajo + (instrumentacion.ruta_perfil(nombre),
+                                                     instrumentacion.perfilador)
+
+    if workers == 1:
+        for nombre in orden:
+            if nombre not in tablas:
+                ejecutar, *trabajo = argumentos(nombre)
+                completar_medida(nombre, ejecutar(*trabajo))
+        return resultados
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        en_curso = {}
+        pendientes = [nombre for nombre in orden if nombre not in tablas]
+        while pendientes or en_curso:
+            # Submit every stage whose inputs are ready
+            for nombre in [n for n in pendientes if all(e in tablas for e in etapas[n]['entradas'])]:
+                en_curso[pool.submit(*argumentos(nombre))] = nombre
+                pendientes.remove(nombre)
+
+            terminadas, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in terminadas:
+                completar_medida(en_curso.pop(futuro), futuro.result())
+
+    return resultados
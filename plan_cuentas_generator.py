@@ -104,4 +104,66 @@ def generate_plan_cuentas():
     # Create DataFrame
     df = pd.DataFrame(data)
     
-    return df
\ No newline at end of file
+    return df
+
+class PlanCuentas:
+    """
+    Chart of accounts with constant-time lookups, built once and shared by the generators.
+    
+    Indexing by account name returns its ID, so a PlanCuentas can be used
+    wherever a name -> ID mapping is expected.
+    
+    Args:
+        plan_cuentas_df: DataFrame from generate_plan_cuentas (generated if omitted)
+    """
+    
+    def __init__(self, plan_cuentas_df=None):
+        if plan_cuentas_df is None:
+            plan_cuentas_df = generate_plan_cuentas()
+        self.df = plan_cuentas_df
+        self.ids = pd.Index(plan_cuentas_df['ID_Cuenta'])
+        self._id_por_nombre = dict(zip(plan_cuentas_df['Nombre_Cuenta'], plan_cuentas_df['ID_Cuenta']))
+        self._tipo_por_id = dict(zip(plan_cuentas_df['ID_Cuenta'], plan_cuentas_df['Tipo_Cuenta']))
+        self._clasificacion_por_id = dict(zip(plan_cuentas_df['ID_Cuenta'], plan_cuentas_df['Clasificacion']))
+        
+        # For asset and expense accounts, debits increase the balance
+        # For liability, equity, and income accounts, credits increase the balance
+        self.deudoras = plan_cuentas_df['Tipo_Cuenta'].isin(['Activo', 'Gastos']).to_numpy()
+    
+    @classmethod
+    def de(cls, plan_cuentas):
+        """Return plan_cuentas itself if it is a PlanCuentas, else build one from the DataFrame."""
+        return plan_cuentas if isinstance(plan_cuentas, cls) else cls(plan_cuentas)
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def __getitem__(self, nombre):
+        return self.id_cuenta(nombre)
+    
+    def id_cuenta(self, nombre):
+        """ID of the account with the given name."""
+        try:
+            return self._id_por_nombre[nombre]
+        except KeyError:
+            raise KeyError(f"Account '{nombre}' is not in the chart of accounts") from None
+    
+    def tipo(self, id_cuenta):
+        """Tipo_Cuenta of an account ID."""
+        return self._tipo_por_id[id_cuenta]
+    
+    def clasificacion(self, id_cuenta):
+        """Clasificacion of an account ID."""
+        return self._clasificacion_por_id[id_cuenta]
+    
+    def ids_por_nombre(self, nombres):
+        """Vectorized name -> ID lookup; unknown names raise KeyError."""
+        nombres = pd.Series(np.asarray(nombres, dtype=object))
+        ids = nombres.map(self._id_por_nombre)
+        if ids.isna().any():
+            raise KeyError(f"Accounts not in the chart of accounts: {sorted(set(nombres[ids.isna()]))}")
+        return ids.to_numpy(dtype=object)
+    
+    def posiciones(self, ids_cuenta):
+        """Row position of every account ID in the chart (-1 for unknown IDs)."""
+        return self.ids.get_indexer(ids_cuenta)
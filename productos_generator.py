@@ -1,24 +1,57 @@
 import pandas as pd
 import numpy as np
 
-def generate_productos(num_productos=50):
+from dinero import a_centavos, a_moneda
+from vocabularios import elegir_por_categoria, codigos_modelo
+
+# Define product categories and their characteristics with standardized margins for accounting coherence
+CATEGORIAS_PRODUCTO = [
+    {'nombre': 'Electrónica', 'precio_min': 450, 'precio_max': 7000, 'margen_min': 0.35, 'margen_max': 0.45},
+    {'nombre': 'Ropa', 'precio_min': 40, 'precio_max': 600, 'margen_min': 0.40, 'margen_max': 0.50},
+    {'nombre': 'Alimentos', 'precio_min': 15, 'precio_max': 150, 'margen_min': 0.25, 'margen_max': 0.35},
+    {'nombre': 'Hogar', 'precio_min': 80, 'precio_max': 1500, 'margen_min': 0.30, 'margen_max': 0.40},
+    {'nombre': 'Juguetes', 'precio_min': 25, 'precio_max': 400, 'margen_min': 0.35, 'margen_max': 0.45}
+]
+
+# Name vocabulary of each category
+NOMBRES_PRODUCTO = {
+    'Electrónica': {
+        'prefijos': ['Smartphone', 'Laptop', 'Tablet', 'TV', 'Auriculares', 'Altavoz', 'Cámara'],
+        'marcas': ['TechPro', 'Innovatech', 'DigiMax', 'ElectraSmart', 'FutureTech']
+    },
+    'Ropa': {
+        'prefijos': ['Camisa', 'Pantalón', 'Vestido', 'Chaqueta', 'Falda', 'Suéter', 'Abrigo'],
+        'marcas': ['FashionStyle', 'TrendyWear', 'ElegantLine', 'UrbanChic', 'ClassicMode']
+    },
+    'Alimentos': {
+        'prefijos': ['Cereal', 'Pasta', 'Conserva', 'Snack', 'Bebida', 'Lácteo', 'Condimento'],
+        'marcas': ['NutriFood', 'DeliciaGourmet', 'SaborNatural', 'FrescoPack', 'SaludVital']
+    },
+    'Hogar': {
+        'prefijos': ['Sillón', 'Mesa', 'Lámpara', 'Alfombra', 'Cortina', 'Estantería', 'Decoración'],
+        'marcas': ['HomeStyle', 'ComfortDesign', 'ElegantHome', 'ModernSpace', 'CozyLiving']
+    },
+    'Juguetes': {
+        'prefijos': ['Muñeco', 'Juego', 'Puzzle', 'Peluche', 'Construcción', 'Educativo', 'Vehículo'],
+        'marcas': ['FunToys', 'KidJoy', 'PlayWorld', 'ImagineThat', 'LearnPlay']
+    }
+}
+
+def generate_productos(num_productos=50, vectorized=False):
     """
     Generate a synthetic dataset of products with realistic pricing and cost attributes.
     
     Args:
         num_productos: Number of products to generate
+        vectorized: If True, draw the whole table as NumPy arrays instead of
+            one product at a time (same columns and distributions, different
+            random stream)
         
     Returns:
         DataFrame: A pandas DataFrame containing product information
     """
-    # Define product categories and their characteristics with standardized margins for accounting coherence
-    categorias = [
-        {'nombre': 'Electrónica', 'precio_min': 450, 'precio_max': 7000, 'margen_min': 0.35, 'margen_max': 0.45},
-        {'nombre': 'Ropa', 'precio_min': 40, 'precio_max': 600, 'margen_min': 0.40, 'margen_max': 0.50},
-        {'nombre': 'Alimentos', 'precio_min': 15, 'precio_max': 150, 'margen_min': 0.25, 'margen_max': 0.35},
-        {'nombre': 'Hogar', 'precio_min': 80, 'precio_max': 1500, 'margen_min': 0.30, 'margen_max': 0.40},
-        {'nombre': 'Juguetes', 'precio_min': 25, 'precio_max': 400, 'margen_min': 0.35, 'margen_max': 0.45}
-    ]
+    if vectorized:
+        return _generate_productos_vectorized(num_productos)
     
     # Initialize data lists
     data = {
@@ -31,7 +64,7 @@ def generate_productos(num_productos=50):
     
     # Generate data for each product
     for _ in range(num_productos):
-        categoria = np.random.choice(categorias)
+        categoria = np.random.choice(CATEGORIAS_PRODUCTO)
         precio_venta = np.random.uniform(categoria['precio_min'], categoria['precio_max'])
         margen = np.random.uniform(categoria['margen_min'], categoria['margen_max'])
         costo_variable = precio_venta * (1 - margen)  # El costo es menor debido al margen más alto
@@ -43,21 +76,8 @@ def generate_productos(num_productos=50):
     # Generate product names based on category
     nombres_productos = []
     for categoria in data['Categoria']:
-        if categoria == 'Electrónica':
-            prefijos = ['Smartphone', 'Laptop', 'Tablet', 'TV', 'Auriculares', 'Altavoz', 'Cámara']
-            marcas = ['TechPro', 'Innovatech', 'DigiMax', 'ElectraSmart', 'FutureTech']
-        elif categoria == 'Ropa':
-            prefijos = ['Camisa', 'Pantalón', 'Vestido', 'Chaqueta', 'Falda', 'Suéter', 'Abrigo']
-            marcas = ['FashionStyle', 'TrendyWear', 'ElegantLine', 'UrbanChic', 'ClassicMode']
-        elif categoria == 'Alimentos':
-            prefijos = ['Cereal', 'Pasta', 'Conserva', 'Snack', 'Bebida', 'Lácteo', 'Condimento']
-            marcas = ['NutriFood', 'DeliciaGourmet', 'SaborNatural', 'FrescoPack', 'SaludVital']
-        elif categoria == 'Hogar':
-            prefijos = ['Sillón', 'Mesa', 'Lámpara', 'Alfombra', 'Cortina', 'Estantería', 'Decoración']
-            marcas = ['HomeStyle', 'ComfortDesign', 'ElegantHome', 'ModernSpace', 'CozyLiving']
-        else:  # Juguetes
-            prefijos = ['Muñeco', 'Juego', 'Puzzle', 'Peluche', 'Construcción', 'Educativo', 'Vehículo']
-            marcas = ['FunToys', 'KidJoy', 'PlayWorld', 'ImagineThat', 'LearnPlay']
+        prefijos = NOMBRES_PRODUCTO[categoria]['prefijos']
+        marcas = NOMBRES_PRODUCTO[categoria]['marcas']
         
         prefijo = np.random.choice(prefijos)
         marca = np.random.choice(marcas)
@@ -72,4 +92,35 @@ def generate_productos(num_productos=50):
     df = pd.DataFrame(data)
     
     # Return only the required columns in the correct order
-    return df[['ID_Producto', 'Nombre_Producto', 'Precio_Venta_Unitario', 'Costo_Variable_Unitario']]
\ No newline at end of file
+    return df[['ID_Producto', 'Nombre_Producto', 'Precio_Venta_Unitario', 'Costo_Variable_Unitario']]
+
+def _generate_productos_vectorized(num_productos):
+    """
+    Vectorized version of generate_productos.
+    
+    Categories are drawn as integer codes first; their price and margin
+    ranges and their name vocabularies are then looked up by integer
+    indexing and the names are assembled by vectorized concatenation.
+    """
+    codigos = np.random.randint(0, len(CATEGORIAS_PRODUCTO), size=num_productos)
+    
+    def rango(clave):
+        return np.array([categoria[clave] for categoria in CATEGORIAS_PRODUCTO], dtype=float)[codigos]
+    
+    precio_venta = np.random.uniform(rango('precio_min'), rango('precio_max'))
+    margen = np.random.uniform(rango('margen_min'), rango('margen_max'))
+    costo_variable = precio_venta * (1 - margen)  # El costo es menor debido al margen más alto
+    
+    # Generate product names based on category
+    vocabularios = [NOMBRES_PRODUCTO[categoria['nombre']] for categoria in CATEGORIAS_PRODUCTO]
+    prefijo = elegir_por_categoria(codigos, [vocabulario['prefijos'] for vocabulario in vocabularios])
+    marca = elegir_por_categoria(codigos, [vocabulario['marcas'] for vocabulario in vocabularios])
+    nombre = marca + ' ' + prefijo + ' ' + codigos_modelo(num_productos)
+    
+    df = pd.DataFrame({
+        'ID_Producto': np.arange(1, num_productos + 1),
+        'Nombre_Producto': nombre,
+        'Precio_Venta_Unitario': a_moneda(a_centavos(precio_venta)),
+        'Costo_Variable_Unitario': a_moneda(a_centavos(costo_variable))
+    })
+    return df[['ID_Producto', 'Nombre_Producto', 'Precio_Venta_Unitario', 'Costo_Variable_Unitario']]
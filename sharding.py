@@ -0,0 +1,242 @@
+import inspect
+import os
+import random
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from ventas_generator import generate_ventas
+from compras_generator import generate_compras
+from movimientos_bancarios_generator import generate_movimientos_bancarios
+from libro_diario_generator import (
+    COLUMNAS_LIBRO_DIARIO, generate_libro_diario, postear_ventas, postear_gastos_mensuales,
+    postear_compras, postear_movimientos, ventas_mensuales
+)
+from plan_cuentas_generator import PlanCuentas
+from pipeline_scheduler import ejecutar_etapa
+from almacen_columnar import TablaColumnar, guardar_columnar, como_dataframe, particiones
+from conceptos import columnas_con_conceptos
+
+# Shardable generators: the keyword holding the row count that is split
+# across shards, the positional inputs whose rows are split across shards,
+# the ID and date columns used to merge the shards back together, and
+# whether IDs are renumbered in date order after the merge
+SHARDS = {
+    'ventas': {
+        'funcion': generate_ventas,
+        'conteo': 'num_ventas',
+        'entradas_por_filas': [],
+        'id': 'ID_Venta',
+        'fecha': 'Fecha',
+        'renumerar': False
+    },
+    'compras': {
+        'funcion': generate_compras,
+        'conteo': 'num_compras',
+        'entradas_por_filas': [],
+        'id': 'ID_Compra',
+        'fecha': 'Fecha_Compra',
+        'renumerar': False
+    },
+    'movimientos_bancarios': {
+        'funcion': generate_movimientos_bancarios,
+        'conteo': 'num_movimientos_extra',
+        'entradas_por_filas': [1, 2],  # ventas_df, compras_df
+        'id': 'ID_Movimiento',
+        'fecha': 'Fecha',
+        'renumerar': True  # IDs follow date order, as in the generator
+    }
+}
+
+def generar_en_shards(nombre, entradas, parametros=None, num_shards=1, workers=None):
+    """
+    Generate a transactional table as independent shards and merge them.
+
+    The row count (and any row-split inputs) is divided into num_shards
+    parts. Every shard runs in its own process with an RNG stream spawned
+    from a base seed drawn from the global NumPy state, so the result is
+    reproducible for a given seed and num_shards, whatever `workers` is.
+    IDs are renumbered into one gap-free global sequence.
+
+    Args:
+        nombre: Table name, a key of SHARDS
+        entradas: Upstream DataFrames, in the order the generator expects them
+        parametros: Extra keyword arguments for the generator
+        num_shards: Number of shards
+        workers: Number of worker processes (defaults to the CPU count)
+
+    Returns:
+        DataFrame: The merged table, sorted by date
+    """
+    spec = SHARDS[nombre]
+    parametros = dict(parametros or {})
+
+    if num_shards == 1:
+        return spec['funcion'](*entradas, **parametros)
+
+    # Split the row count and row-split inputs into contiguous parts
+    total = parametros.pop(spec['conteo'], _valor_por_defecto(spec['funcion'], spec['conteo']))
+    conteos = [len(parte) for parte in np.array_split(np.arange(total), num_shards)]
+    particiones = {i: np.array_split(np.arange(len(entradas[i])), num_shards)
+                   for i in spec['entradas_por_filas']}
+
+    # Independent, reproducible RNG stream per shard
+    base = np.random.SeedSequence(int(np.random.randint(0, 2**32, dtype=np.int64)))
+    semillas = [int(hijo.generate_state(1)[0]) for hijo in base.spawn(num_shards)]
+
+    trabajos = []
+    for i in range(num_shards):
+        entradas_shard = [entrada.iloc[particiones[j][i]] if j in particiones else entrada
+                          for j, entrada in enumerate(entradas)]
+        parametros_shard = dict(parametros, **{spec['conteo']: conteos[i]})
+        trabajos.append((spec['funcion'], entradas_shard, parametros_shard, semillas[i]))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, num_shards)
+    if workers == 1:
+        # Shards reseed the global state; restore it so the caller's stream
+        # continues exactly as it would after running them in other processes
+        estado_np, estado_random = np.random.get_state(), random.getstate()
+        shards = [ejecutar_etapa(*trabajo) for trabajo in trabajos]
+        np.random.set_state(estado_np)
+        random.setstate(estado_random)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(ejecutar_etapa, *zip(*trabajos)))
+
+    return unir_shards(shards, spec['id'], spec['fecha'], spec['renumerar'])
+
+def unir_shards(shards, columna_id, columna_fecha, renumerar=False):
+    """
+    Merge shards into one table with globally unique, gap-free IDs.
+
+    Each shard numbers its rows from 1, so its IDs are shifted by the row
+    count of the shards before it. The merged table is stably sorted by date.
+
+    Args:
+        shards: DataFrames generated per shard, in shard order
+        columna_id: Name of the ID column
+        columna_fecha: Name of the date column
+        renumerar: If True, number the IDs 1..n in the merged date order instead
+
+    Returns:
+        DataFrame: The merged table
+    """
+    desplazados = []
+    desplazamiento = 0
+    for shard in shards:
+        desplazados.append(shard.assign(**{columna_id: shard[columna_id] + desplazamiento}))
+        desplazamiento += len(shard)
+
+    df = pd.concat(desplazados, ignore_index=True)
+    df = df.sort_values(columna_fecha, kind='stable').reset_index(drop=True)
+    if renumerar:
+        df[columna_id] = np.arange(1, len(df) + 1)
+    return df
+
+def generate_ventas_sharded(clientes_df, productos_df, num_shards=1, workers=None, **parametros):
+    """Sharded generate_ventas; see generar_en_shards."""
+    return generar_en_shards('ventas', [clientes_df, productos_df], parametros, num_shards, workers)
+
+def generate_compras_sharded(productos_df, num_shards=1, workers=None, **parametros):
+    """Sharded generate_compras; see generar_en_shards."""
+    return generar_en_shards('compras', [productos_df], parametros, num_shards, workers)
+
+def generate_movimientos_bancarios_sharded(cuentas_bancarias_df, ventas_df, compras_df,
+                                           num_shards=1, workers=None, **parametros):
+    """Sharded generate_movimientos_bancarios; see generar_en_shards."""
+    return generar_en_shards('movimientos_bancarios', [cuentas_bancarias_df, ventas_df, compras_df],
+                             parametros, num_shards, workers)
+
+def generate_libro_diario_sharded(plan_cuentas_df, ventas_df, compras_df, movimientos_bancarios_df,
+                                  productos_df, num_shards=1, workers=None, concept_templates=False):
+    """
+    generate_libro_diario with the sales posted in parallel over shards of ventas.
+
+    Inputs may be DataFrames or almacen_columnar.TablaColumnar references.
+    Shard processes map their rows of ventas from the columnar store instead
+    of receiving a pickled copy (a ventas DataFrame is written to a temporary
+    store first), while this process posts the other sources. Shards are
+    contiguous row ranges and every block is numbered from 1 and then shifted
+    by the entries before it, so the result is identical to
+    generate_libro_diario for any num_shards and workers.
+
+    Args:
+        plan_cuentas_df: Chart of accounts
+        ventas_df: Sales, as a DataFrame or TablaColumnar
+        compras_df: Purchases
+        movimientos_bancarios_df: Bank transactions
+        productos_df: Products
+        num_shards: Number of shards of ventas
+        workers: Number of worker processes (defaults to the CPU count)
+        concept_templates: If True, encode concepts (see generate_libro_diario)
+
+    Returns:
+        DataFrame: Journal entries
+    """
+    plan_cuentas_df, compras_df, movimientos_bancarios_df, productos_df = (
+        como_dataframe(tabla) for tabla in (plan_cuentas_df, compras_df, movimientos_bancarios_df, productos_df))
+    if num_shards == 1:
+        return generate_libro_diario(plan_cuentas_df, como_dataframe(ventas_df), compras_df,
+                                     movimientos_bancarios_df, productos_df, concept_templates)
+
+    temporal = None
+    if isinstance(ventas_df, TablaColumnar):
+        ventas = ventas_df
+    else:
+        temporal = tempfile.mkdtemp(prefix='ventas_')
+        ventas = guardar_columnar(os.path.join(temporal, 'ventas'), ventas_df)
+
+    try:
+        trabajos = [(plan_cuentas_df, ventas, inicio, fin, productos_df, concept_templates)
+                    for inicio, fin in particiones(len(ventas), num_shards)]
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, num_shards)
+        cuentas = PlanCuentas.de(plan_cuentas_df)
+
+        def postear_resto():
+            # Numbered from 1; shifted once the sales entries are counted
+            gastos = postear_gastos_mensuales(ventas_mensuales(ventas.leer(['Fecha', 'Total_Venta'])), cuentas, 1,
+                                              concept_templates)
+            return [gastos, postear_compras(compras_df, cuentas, 1, concept_templates),
+                    postear_movimientos(movimientos_bancarios_df, cuentas, 1, concept_templates)]
+
+        if workers == 1:
+            bloques = [postear_ventas_shard(*trabajo) for trabajo in trabajos] + postear_resto()
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futuros = [pool.submit(postear_ventas_shard, *trabajo) for trabajo in trabajos]
+                resto = postear_resto()
+                bloques = [futuro.result() for futuro in futuros] + resto
+    finally:
+        if temporal is not None:
+            shutil.rmtree(temporal, ignore_errors=True)
+
+    desplazados = []
+    desplazamiento = 0
+    for bloque, siguiente in bloques:
+        desplazados.append(bloque.assign(ID_Asiento=bloque['ID_Asiento'] + desplazamiento))
+        desplazamiento += siguiente - 1
+
+    libro_diario_df = pd.concat(desplazados, ignore_index=True)
+    libro_diario_df = libro_diario_df.sort_values(['Fecha_Transaccion', 'ID_Asiento'], kind='stable')
+    return libro_diario_df.reset_index(drop=True)[columnas_con_conceptos(COLUMNAS_LIBRO_DIARIO, libro_diario_df)]
+
+def postear_ventas_shard(plan_cuentas_df, ventas, inicio, fin, productos_df, concept_templates=False):
+    """
+    Post rows [inicio, fin) of a columnar ventas table, numbering entries from 1.
+
+    Returns:
+        tuple: (DataFrame of journal lines, next free ID_Asiento)
+    """
+    return postear_ventas(ventas.leer(inicio=inicio, fin=fin), productos_df, PlanCuentas.de(plan_cuentas_df), 1,
+                          concept_templates)
+
+def _valor_por_defecto(funcion, parametro):
+    """Default value of a keyword argument of funcion."""
+    return inspect.signature(funcion).parameters[parametro].default
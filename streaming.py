@@ -0,0 +1,182 @@
+import time
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+
+from pipeline_scheduler import ETAPAS, ejecutar_pipeline, semilla_etapa
+from ventas_generator import iter_ventas
+from compras_generator import iter_compras
+from movimientos_bancarios_generator import generate_movimientos_bancarios
+from libro_diario_generator import (
+    COLUMNAS_LIBRO_DIARIO, postear_ventas, postear_gastos_mensuales, postear_compras,
+    postear_movimientos, ventas_mensuales
+)
+from libro_mayor_generator import acumular_movimientos_mensuales, construir_libro_mayor
+from plan_cuentas_generator import PlanCuentas
+from instrumentacion import tamano_archivo
+from conceptos import columnas_con_conceptos
+
+# Master tables are small and are generated whole before streaming starts
+TABLAS_MAESTRAS = ['plan_cuentas', 'clientes', 'productos', 'activos', 'cuentas_bancarias']
+
+COLUMNAS_VENTAS = ['ID_Venta', 'Fecha', 'ID_Cliente', 'ID_Producto',
+                   'Cantidad_Vendida', 'Precio_Unitario', 'Total_Venta']
+COLUMNAS_COMPRAS = ['ID_Compra', 'ID_Producto', 'Fecha_Compra',
+                    'Cantidad_Adquirida', 'Costo_Unitario', 'Costo_Total_Compra']
+
+def generate_datasets_streaming(backend, chunk_size=100000, seed=42, workers=None,
+                                num_ventas=1000, num_compras=500, num_movimientos_extra=200,
+                                start_date='2020-01-01', end_date='2023-12-31',
+                                mayor_start_date='2020-01-01', mayor_end_date='2022-12-31', etapas=None,
+                                instrumentacion=None, concept_templates=False):
+    """
+    Generate the transactional tables in chunks with bounded memory.
+
+    Sales and purchases are produced chunk by chunk; every chunk is appended
+    to its file and immediately turned into its bank movements and journal
+    lines, which are appended too. Extra bank movements are streamed last.
+    Only the master tables, the monthly sales totals and the
+    (accounts x months) ledger totals stay in memory.
+
+    Sales and purchases are generated in date order (see calendario), so
+    their files are sorted by date without a global sort and chunks reach
+    the writers in calendar order. Unlike the batch pipeline, bank movements
+    and journal lines are sorted by date within each chunk rather than
+    globally, and entries are numbered in the order the chunks are posted.
+
+    Args:
+        backend: Output backend from output_backends.crear_backend
+        chunk_size: Number of rows generated per chunk
+        seed: Seed of the whole run
+        workers: Number of worker processes for the master tables
+        num_ventas: Number of sales transactions to generate
+        num_compras: Number of purchase transactions to generate
+        num_movimientos_extra: Number of bank movements not tied to sales or purchases
+        start_date: First day of the simulation period
+        end_date: Last day of the simulation period
+        mayor_start_date: First day of the general ledger period
+        mayor_end_date: Last day of the general ledger period
+        etapas: Stage definitions the master tables are generated from
+            (defaults to ETAPAS)
+        instrumentacion: Optional instrumentacion.Instrumentacion; the master
+            tables are measured as stages, the interleaved streamed tables
+            as one 'streaming' stage plus the rows, write time and bytes of
+            each table
+        concept_templates: If True, bank movements and journal lines carry
+            encoded concepts (see conceptos); CSV output materializes them
+    """
+    if etapas is None:
+        etapas = ETAPAS
+    maestras = {nombre: etapas[nombre] for nombre in TABLAS_MAESTRAS}
+    escribir_tabla = backend.write if instrumentacion is None else instrumentacion.escritura(backend)
+    tablas = ejecutar_pipeline(maestras, seed=seed, workers=workers, al_completar=escribir_tabla,
+                               instrumentacion=instrumentacion)
+    plan_cuentas_df = tablas['plan_cuentas']
+    productos_df = tablas['productos']
+    cuentas_bancarias_df = tablas['cuentas_bancarias']
+    cuentas = PlanCuentas(plan_cuentas_df)
+
+    np.random.seed(semilla_etapa(seed, 'streaming'))
+
+    writers = {nombre: backend.open(nombre) for nombre in ['ventas', 'compras', 'movimientos_bancarios', 'libro_diario']}
+    segundos_escritura = dict.fromkeys(writers, 0.0)
+
+    def escribir(nombre, chunk):
+        inicio = time.perf_counter()
+        writers[nombre].write(chunk)
+        segundos_escritura[nombre] += time.perf_counter() - inicio
+
+    # Running state carried across chunks
+    estado = {
+        'movimiento_id': 1,
+        'asiento_id': 1,
+        'ventas_mes': None,
+        'mayor': None
+    }
+
+    def escribir_diario(bloques):
+        libro = pd.concat(bloques, ignore_index=True)
+        libro = libro.sort_values(['Fecha_Transaccion', 'ID_Asiento'], kind='stable')
+        escribir('libro_diario', libro[columnas_con_conceptos(COLUMNAS_LIBRO_DIARIO, libro)])
+
+        totales = acumular_movimientos_mensuales(cuentas, libro, mayor_start_date, mayor_end_date)
+        if estado['mayor'] is None:
+            estado['mayor'] = totales
+        else:
+            estado['mayor'] = tuple(acumulado + nuevo for acumulado, nuevo in zip(estado['mayor'], totales))
+
+    def escribir_movimientos(ventas_chunk, compras_chunk, num_extra=0):
+        movimientos = generate_movimientos_bancarios(cuentas_bancarias_df, ventas_chunk, compras_chunk,
+                                                     num_movimientos_extra=num_extra, vectorized=True,
+                                                     start_date=start_date, end_date=end_date,
+                                                     concept_templates=concept_templates)
+        movimientos['ID_Movimiento'] += estado['movimiento_id'] - 1
+        estado['movimiento_id'] += len(movimientos)
+        escribir('movimientos_bancarios', movimientos)
+        return movimientos
+
+    # Bank movements are generated per chunk from that chunk's sales or
+    # purchases only, so the other input is an empty table
+    ventas_vacias = pd.DataFrame(columns=COLUMNAS_VENTAS)
+    compras_vacias = pd.DataFrame(columns=COLUMNAS_COMPRAS)
+
+    medir = instrumentacion.medir if instrumentacion is not None else lambda nombre, **metricas: nullcontext()
+
+    with medir('streaming', origen='streamed'):
+        for ventas_chunk in iter_ventas(tablas['clientes'], productos_df, num_ventas, chunk_size,
+                                        start_date=start_date, end_date=end_date, ordered=True):
+            escribir('ventas', ventas_chunk)
+
+            mensuales = ventas_mensuales(ventas_chunk).set_index('Fecha')['Total_Venta']
+            estado['ventas_mes'] = mensuales if estado['ventas_mes'] is None \
+                else estado['ventas_mes'].add(mensuales, fill_value=0)
+
+            bloque_ventas, estado['asiento_id'] = postear_ventas(ventas_chunk, productos_df, cuentas, estado['asiento_id'],
+                                                                 concept_templates)
+            movimientos = escribir_movimientos(ventas_chunk, compras_vacias)
+            bloque_movimientos, estado['asiento_id'] = postear_movimientos(movimientos, cuentas, estado['asiento_id'],
+                                                                           concept_templates)
+            escribir_diario([bloque_ventas, bloque_movimientos])
+
+        for compras_chunk in iter_compras(productos_df, num_compras, chunk_size,
+                                          start_date=start_date, end_date=end_date, ordered=True):
+            escribir('compras', compras_chunk)
+
+            bloque_compras, estado['asiento_id'] = postear_compras(compras_chunk, cuentas, estado['asiento_id'],
+                                                                   concept_templates)
+            movimientos = escribir_movimientos(ventas_vacias, compras_chunk)
+            bloque_movimientos, estado['asiento_id'] = postear_movimientos(movimientos, cuentas, estado['asiento_id'],
+                                                                           concept_templates)
+            escribir_diario([bloque_compras, bloque_movimientos])
+
+        for inicio in range(0, num_movimientos_extra, chunk_size):
+            movimientos = escribir_movimientos(ventas_vacias, compras_vacias,
+                                               min(chunk_size, num_movimientos_extra - inicio))
+            bloque, estado['asiento_id'] = postear_movimientos(movimientos, cuentas, estado['asiento_id'],
+                                                               concept_templates)
+            escribir_diario([bloque])
+
+        # Operating expenses from the accumulated monthly sales
+        if estado['ventas_mes'] is not None:
+            ventas_mes = estado['ventas_mes'].sort_index()
+            gastos, estado['asiento_id'] = postear_gastos_mensuales(
+                pd.DataFrame({'Fecha': ventas_mes.index, 'Total_Venta': ventas_mes.to_numpy()}),
+                cuentas, estado['asiento_id'], concept_templates)
+            escribir_diario([gastos])
+
+        for writer in writers.values():
+            writer.close()
+
+    if instrumentacion is not None:
+        for nombre, writer in writers.items():
+            instrumentacion.registrar(nombre, origen='streamed', filas=writer.rows,
+                                      segundos_escritura=segundos_escritura[nombre],
+                                      bytes_escritos=tamano_archivo(backend.ruta(nombre)))
+
+    with medir('libro_mayor', origen='generated'):
+        if estado['mayor'] is None:
+            estado['mayor'] = acumular_movimientos_mensuales(
+                cuentas, pd.DataFrame(columns=COLUMNAS_LIBRO_DIARIO), mayor_start_date, mayor_end_date)
+        libro_mayor_df = construir_libro_mayor(cuentas, estado['mayor'], mayor_start_date, mayor_end_date)
+    escribir_tabla('libro_mayor', libro_mayor_df)
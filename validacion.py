@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+
+from dinero import a_centavos, a_moneda
+from plan_cuentas_generator import PlanCuentas
+
+# Accounting invariants of a generated dataset, checked as grouped,
+# vectorized passes. The journal is consumed in chunks, so it never has to
+# be in memory at once: the only state kept across chunks is the net amount
+# (debits minus credits, in int64 cents) of every ID_Asiento and a capped
+# sample of the offending rows.
+
+# Checks and the columns of the offending rows each one reports
+CHEQUEOS = {
+    'asientos_descuadrados': ['ID_Asiento', 'Diferencia'],
+    'cuentas_inexistentes_diario': ['ID_Asiento', 'ID_Cuenta'],
+    'cuentas_inexistentes_mayor': ['ID_Cuenta', 'Fecha'],
+    'saldos_discontinuos': ['ID_Cuenta', 'Fecha', 'Saldo_Inicial', 'Saldo_Final_Anterior'],
+    'saldos_incorrectos': ['ID_Cuenta', 'Fecha', 'Saldo_Final', 'Saldo_Calculado']
+}
+
+# Human-readable description of every check
+DESCRIPCIONES = {
+    'asientos_descuadrados': "Journal entries whose debits and credits differ",
+    'cuentas_inexistentes_diario': "Journal lines with an ID_Cuenta missing from plan_cuentas",
+    'cuentas_inexistentes_mayor': "Ledger rows with an ID_Cuenta missing from plan_cuentas",
+    'saldos_discontinuos': "Ledger months whose Saldo_Inicial differs from the previous Saldo_Final",
+    'saldos_incorrectos': "Ledger months whose Saldo_Final does not follow from their movements"
+}
+
+class ValidadorContable:
+    """
+    Double-entry checks of libro_diario and libro_mayor against plan_cuentas.
+
+    Feed the journal with agregar_diario (in as many chunks as needed) and
+    the ledger with validar_mayor, then read the results. Offending rows are
+    kept up to max_reportados per check; `conteos` has the full counts.
+
+    Args:
+        plan_cuentas_df: DataFrame (or PlanCuentas) containing chart of accounts
+        max_reportados: Maximum number of offending rows kept per check
+    """
+
+    def __init__(self, plan_cuentas_df, max_reportados=100):
+        self.cuentas = PlanCuentas.de(plan_cuentas_df)
+        self.max_reportados = max_reportados
+        self.lineas = 0
+        self.conteos = dict.fromkeys(CHEQUEOS, 0)
+        self._ejemplos = {chequeo: [] for chequeo in CHEQUEOS}
+        # Net cents of every ID_Asiento seen so far, indexed by ID
+        self._netos = np.zeros(0, dtype=np.int64)
+
+    def agregar_diario(self, chunk):
+        """
+        Check a chunk of journal lines.
+
+        Entries may span chunks; their balance is only checked in
+        `resultados`, once every chunk has been added.
+
+        Args:
+            chunk: DataFrame with ID_Asiento, ID_Cuenta, Debito and Credito
+        """
+        ids_asiento = chunk['ID_Asiento'].to_numpy(dtype=np.int64)
+        self.lineas += len(chunk)
+        if len(chunk) == 0:
+            return
+
+        # Net amount per entry, accumulated in place into a dense array by
+        # ID that grows geometrically as higher IDs appear
+        neto = a_centavos(chunk['Debito'].to_numpy()) - a_centavos(chunk['Credito'].to_numpy())
+        tamano = int(ids_asiento.max()) + 1
+        if tamano > len(self._netos):
+            netos = np.zeros(max(tamano, 2 * len(self._netos)), dtype=np.int64)
+            netos[:len(self._netos)] = self._netos
+            self._netos = netos
+        np.add.at(self._netos, ids_asiento, neto)
+
+        # Account existence, resolved once per distinct account of the chunk
+        codigos, valores = pd.factorize(chunk['ID_Cuenta'])
+        faltantes = (self.cuentas.posiciones(valores) < 0)[codigos]
+        if faltantes.any():
+            self._reportar('cuentas_inexistentes_diario', pd.DataFrame({
+                'ID_Asiento': ids_asiento[faltantes],
+                'ID_Cuenta': chunk['ID_Cuenta'].to_numpy()[faltantes]
+            }))
+
+    def validar_mayor(self, libro_mayor_df):
+        """
+        Check the general ledger: every account exists, every month opens
+        with the previous month's closing balance, and every closing balance
+        equals the opening balance plus the month's movements on the
+        account's normal side.
+
+        Args:
+            libro_mayor_df: DataFrame containing general ledger information
+        """
+        mayor = libro_mayor_df.sort_values(['ID_Cuenta', 'Fecha'], kind='stable')
+        id_cuenta = mayor['ID_Cuenta'].to_numpy()
+        fecha = mayor['Fecha'].to_numpy()
+        inicial = a_centavos(mayor['Saldo_Inicial'].to_numpy())
+        final = a_centavos(mayor['Saldo_Final'].to_numpy())
+        debitos = a_centavos(mayor['Debitos'].to_numpy())
+        creditos = a_centavos(mayor['Creditos'].to_numpy())
+
+        posicion = self.cuentas.posiciones(id_cuenta)
+        faltantes = posicion < 0
+        if faltantes.any():
+            self._reportar('cuentas_inexistentes_mayor', pd.DataFrame({
+                'ID_Cuenta': id_cuenta[faltantes], 'Fecha': fecha[faltantes]
+            }))
+
+        # Continuity between consecutive months of the same account
+        misma_cuenta = id_cuenta[1:] == id_cuenta[:-1]
+        discontinuos = np.flatnonzero(misma_cuenta & (inicial[1:] != final[:-1])) + 1
+        if len(discontinuos):
+            self._reportar('saldos_discontinuos', pd.DataFrame({
+                'ID_Cuenta': id_cuenta[discontinuos],
+                'Fecha': fecha[discontinuos],
+                'Saldo_Inicial': a_moneda(inicial[discontinuos]),
+                'Saldo_Final_Anterior': a_moneda(final[discontinuos - 1])
+            }))
+
+        # Debit-normal accounts grow with debits, credit-normal ones with
+        # credits (unknown accounts are already reported above)
+        deudora = self.cuentas.deudoras[np.maximum(posicion, 0)]
+        calculado = inicial + np.where(deudora, debitos - creditos, creditos - debitos)
+        incorrectos = ~faltantes & (calculado != final)
+        if incorrectos.any():
+            self._reportar('saldos_incorrectos', pd.DataFrame({
+                'ID_Cuenta': id_cuenta[incorrectos],
+                'Fecha': fecha[incorrectos],
+                'Saldo_Final': a_moneda(final[incorrectos]),
+                'Saldo_Calculado': a_moneda(calculado[incorrectos])
+            }))
+
+    def resultados(self):
+        """
+        Offending rows of every check (empty DataFrames for checks that pass).
+
+        Returns:
+            dict: DataFrame per check, with the columns in CHEQUEOS
+        """
+        descuadrados = np.flatnonzero(self._netos)
+        self.conteos['asientos_descuadrados'] = len(descuadrados)
+        self._ejemplos['asientos_descuadrados'] = [pd.DataFrame({
+            'ID_Asiento': descuadrados[:self.max_reportados],
+            'Diferencia': a_moneda(self._netos[descuadrados[:self.max_reportados]])
+        })]
+
+        return {chequeo: pd.concat(self._ejemplos[chequeo], ignore_index=True)
+                if self._ejemplos[chequeo] else pd.DataFrame(columns=columnas)
+                for chequeo, columnas in CHEQUEOS.items()}
+
+    def es_valido(self):
+        """Whether every check passed."""
+        self.resultados()
+        return not any(self.conteos.values())
+
+    def resumen(self):
+        """Results as text: one line per check and the first offending rows of the failing ones."""
+        resultados = self.resultados()
+        lineas = [f"Validated {self.lineas:,} journal lines"]
+        for chequeo, df in resultados.items():
+            conteo = self.conteos[chequeo]
+            lineas.append(f"  {'OK  ' if conteo == 0 else 'FAIL'} {DESCRIPCIONES[chequeo]}: {conteo:,}")
+            if conteo:
+                lineas.append("       " + df.head(10).to_string(index=False).replace("\n", "\n       "))
+        return "\n".join(lineas)
+
+    def _reportar(self, chequeo, filas):
+        self.conteos[chequeo] += len(filas)
+        guardadas = sum(len(df) for df in self._ejemplos[chequeo])
+        if guardadas < self.max_reportados:
+            self._ejemplos[chequeo].append(filas.iloc[:self.max_reportados - guardadas])
+
+def validar_dataset(backend, chunk_size=1000000, max_reportados=100):
+    """
+    Run every check on a dataset written by an output backend.
+
+    The journal is read chunk by chunk and only the columns the checks use.
+
+    Args:
+        backend: Output backend of the dataset, from output_backends.crear_backend
+        chunk_size: Number of journal lines per chunk
+        max_reportados: Maximum number of offending rows kept per check
+
+    Returns:
+        ValidadorContable: With the results of every check
+    """
+    validador = ValidadorContable(backend.read('plan_cuentas'), max_reportados)
+    for chunk in backend.read_chunks('libro_diario', ['ID_Asiento', 'ID_Cuenta', 'Debito', 'Credito'], chunk_size):
+        validador.agregar_diario(chunk)
+    validador.validar_mayor(backend.read('libro_mayor'))
+    return validador
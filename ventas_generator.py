@@ -2,7 +2,18 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
-def generate_ventas(clientes_df, productos_df, num_ventas=1000):
+from dinero import a_centavos, a_moneda
+from calendario import conteos_diarios, dias_de_filas
+
+# Quantity range [min, max) drawn for each client category
+RANGOS_CANTIDAD = {
+    'Minorista': (1, 10),
+    'Mayorista': (10, 50),
+    'Corporativo': (50, 200)
+}
+
+def generate_ventas(clientes_df, productos_df, num_ventas=1000, vectorized=False,
+                    start_date='2020-01-01', end_date='2023-12-31', ordered=False):
     """
     Generate a synthetic dataset of sales transactions with realistic attributes.
     
@@ -10,13 +21,27 @@ def generate_ventas(clientes_df, productos_df, num_ventas=1000):
         clientes_df: DataFrame containing client information
         productos_df: DataFrame containing product information
         num_ventas: Number of sales transactions to generate
+        vectorized: If True, draw the whole table as NumPy arrays instead of
+            one sale at a time (same columns and distributions, different
+            random stream)
+        start_date: First day of the simulation period ('YYYY-MM-DD')
+        end_date: Last day of the simulation period ('YYYY-MM-DD')
+        ordered: If True, draw the number of sales of every day and fill
+            each day's rows, so the table is generated in date order without
+            a sort and IDs follow the dates (implies vectorized)
         
     Returns:
         DataFrame: A pandas DataFrame containing sales information
     """
-    # Define date range for the simulation (4 years)
-    start_date = datetime.strptime('2020-01-01', '%Y-%m-%d')
-    end_date = datetime.strptime('2023-12-31', '%Y-%m-%d')
+    if ordered:
+        dias = dias_de_filas(np.cumsum(conteos_diarios(num_ventas, start_date, end_date)), 0, num_ventas)
+        return _generate_ventas_vectorized(clientes_df, productos_df, num_ventas, start_date, end_date, dias)
+    if vectorized:
+        return _generate_ventas_vectorized(clientes_df, productos_df, num_ventas, start_date, end_date)
+    
+    # Define date range for the simulation
+    start_date = datetime.strptime(start_date, '%Y-%m-%d')
+    end_date = datetime.strptime(end_date, '%Y-%m-%d')
     days_range = (end_date - start_date).days
     
     # Initialize data lists
@@ -75,4 +100,100 @@ def generate_ventas(clientes_df, productos_df, num_ventas=1000):
     
     # Return the DataFrame with columns in the correct order
     return df[['ID_Venta', 'Fecha', 'ID_Cliente', 'ID_Producto', 
-              'Cantidad_Vendida', 'Precio_Unitario', 'Total_Venta']]
\ No newline at end of file
+              'Cantidad_Vendida', 'Precio_Unitario', 'Total_Venta']]
+
+def _generate_ventas_vectorized(clientes_df, productos_df, num_ventas,
+                                start_date='2020-01-01', end_date='2023-12-31', dias=None):
+    """
+    Vectorized version of generate_ventas.
+    
+    Every column is drawn as a single array. Clients and products are drawn
+    as row positions, so prices and categories come from a positional join
+    instead of a per-row DataFrame scan. Dates are drawn over the whole
+    period, end_date included, unless `dias` gives the already sorted day
+    offsets of the rows (see calendario), in which case nothing is sorted.
+    """
+    # Define date range for the simulation
+    start_date = np.datetime64(start_date, 'D')
+    end_date = np.datetime64(end_date, 'D')
+    days_range = int((end_date - start_date).astype(int)) + 1
+    
+    # Generate random dates within the simulation period
+    random_days = np.random.randint(0, days_range, size=num_ventas) if dias is None else dias
+    
+    # Select random clients and products by row position
+    pos_cliente = np.random.randint(0, len(clientes_df), size=num_ventas)
+    pos_producto = np.random.randint(0, len(productos_df), size=num_ventas)
+    
+    id_cliente = clientes_df['ID_Cliente'].to_numpy()[pos_cliente]
+    id_producto = productos_df['ID_Producto'].to_numpy()[pos_producto]
+    precio_unitario = productos_df['Precio_Venta_Unitario'].to_numpy()[pos_producto]
+    
+    # Generate random quantity based on client category (anything that is
+    # neither Minorista nor Mayorista is treated as Corporativo)
+    categorias = clientes_df['Categoria'].to_numpy()[pos_cliente]
+    cantidad_min = np.full(num_ventas, RANGOS_CANTIDAD['Corporativo'][0])
+    cantidad_max = np.full(num_ventas, RANGOS_CANTIDAD['Corporativo'][1])
+    for categoria in ('Minorista', 'Mayorista'):
+        mask = categorias == categoria
+        cantidad_min[mask] = RANGOS_CANTIDAD[categoria][0]
+        cantidad_max[mask] = RANGOS_CANTIDAD[categoria][1]
+    cantidad = np.random.randint(cantidad_min, cantidad_max)
+    
+    total_venta = a_moneda(cantidad * a_centavos(precio_unitario))
+    
+    if dias is None:
+        # Sort by date on the integer day offsets (stable, so same-day sales
+        # keep their ID order) instead of sorting the formatted strings
+        orden = np.argsort(random_days, kind='stable')
+        random_days, id_cliente, id_producto, cantidad, precio_unitario, total_venta = (
+            columna[orden] for columna in (random_days, id_cliente, id_producto, cantidad,
+                                           precio_unitario, total_venta))
+    else:
+        orden = np.arange(num_ventas)
+    fechas = start_date + random_days
+    
+    # Create DataFrame
+    df = pd.DataFrame({
+        'ID_Venta': orden + 1,
+        'Fecha': np.datetime_as_string(fechas, unit='D'),
+        'ID_Cliente': id_cliente,
+        'ID_Producto': id_producto,
+        'Cantidad_Vendida': cantidad,
+        'Precio_Unitario': precio_unitario,
+        'Total_Venta': total_venta
+    })
+    
+    return df[['ID_Venta', 'Fecha', 'ID_Cliente', 'ID_Producto', 
+              'Cantidad_Vendida', 'Precio_Unitario', 'Total_Venta']]
+
+def iter_ventas(clientes_df, productos_df, num_ventas=1000, chunk_size=100000,
+                start_date='2020-01-01', end_date='2023-12-31', ordered=False):
+    """
+    Generate sales in fixed-size chunks, so the table never has to be in memory at once.
+    
+    Each chunk is a vectorized generate_ventas batch sorted by date; IDs
+    continue across chunks. With ordered=True the daily counts of the whole
+    period are drawn up front and the chunks are consecutive slices of the
+    calendar, so the concatenated chunks are in date order too.
+    
+    Args:
+        clientes_df: DataFrame containing client information
+        productos_df: DataFrame containing product information
+        num_ventas: Total number of sales transactions to generate
+        chunk_size: Number of sales per chunk
+        start_date: First day of the simulation period ('YYYY-MM-DD')
+        end_date: Last day of the simulation period ('YYYY-MM-DD')
+        ordered: If True, emit the sales in global date order
+        
+    Yields:
+        DataFrame: Consecutive chunks of sales information
+    """
+    if ordered:
+        acumulado = np.cumsum(conteos_diarios(num_ventas, start_date, end_date))
+    for inicio in range(0, num_ventas, chunk_size):
+        fin = min(inicio + chunk_size, num_ventas)
+        dias = dias_de_filas(acumulado, inicio, fin) if ordered else None
+        chunk = _generate_ventas_vectorized(clientes_df, productos_df, fin - inicio, start_date, end_date, dias)
+        chunk['ID_Venta'] += inicio
+        yield chunk
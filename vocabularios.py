@@ -0,0 +1,37 @@
+import numpy as np
+
+# Helpers for drawing words from per-category vocabularies in one vectorized
+# pass: the vocabularies are stacked into a padded (categories x words)
+# table and every row picks a cell by integer indexing.
+
+LETRAS = np.array([chr(65 + i) for i in range(26)], dtype=object)
+
+def elegir_por_categoria(codigos, vocabularios):
+    """
+    Draw one word per row from the vocabulary of the row's category.
+
+    Args:
+        codigos: Integer category code of every row
+        vocabularios: List with the list of words of each category code
+
+    Returns:
+        ndarray: object array with one word per row
+    """
+    tamanos = np.array([len(palabras) for palabras in vocabularios])
+    tabla = np.full((len(vocabularios), tamanos.max()), '', dtype=object)
+    for codigo, palabras in enumerate(vocabularios):
+        tabla[codigo, :tamanos[codigo]] = palabras
+
+    codigos = np.asarray(codigos)
+    return tabla[codigos, np.random.randint(0, tamanos[codigos])]
+
+def codigos_modelo(n):
+    """
+    Draw n model codes like 'K482': a capital letter and a number in [100, 1000).
+
+    Returns:
+        ndarray: object array of model codes
+    """
+    letras = LETRAS[np.random.randint(0, 26, size=n)]
+    numeros = np.random.randint(100, 1000, size=n).astype(str).astype(object)
+    return letras + numeros